@@ -0,0 +1,181 @@
+"""
+Defines the AsyncSolrClient class, through which async views send queries
+to Solr without blocking a thread, and get_async_solr_client, which returns
+the client shared by the coroutines of an event loop.
+
+Like a SolrClient (see cantusdata.helpers.solr_client), a client keeps a
+pool of keep-alive connections to Solr, retries queries that fail because
+Solr is briefly unavailable and records the latency of each call. It only
+sends queries: updates are sent by commands and signal handlers, which
+are synchronous. Requests are sent with an httpx AsyncClient.
+
+For example, a view awaits get_async_solr_client().select({"q": "*:*"})
+to get the JSON response of Solr to a query.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+import weakref
+from typing import Any, Mapping, Optional
+
+import httpx
+import requests
+from django.conf import settings
+
+from cantusdata.helpers.solr_client import RETRY_STATUSES, SolrMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncSolrClient:
+    """
+    Sends queries to a Solr core over a pool of at most pool_size keep-alive
+    connections, opened as needed. Queries wait for a connection when all
+    of them are in use. A client can only be used by the event loop on which
+    it is first used (see get_async_solr_client).
+
+    Errors are raised as requests exceptions, as they are by a SolrClient:
+    an HTTPError for an error response (once retries are exhausted), and a
+    ConnectionError or Timeout if Solr cannot be reached.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        select_timeout: float = 10.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ) -> None:
+        """
+        See SolrClient for the parameters. A query is retried after any
+        failure, including a keep-alive connection closed by Solr.
+        """
+        self.url = url.rstrip("/")
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.metrics = SolrMetrics()
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=pool_size, max_keepalive_connections=pool_size
+            ),
+            # Queries wait for as long as it takes to get a connection
+            # of the pool
+            timeout=httpx.Timeout(select_timeout, connect=connect_timeout, pool=None),
+        )
+
+    async def select(self, params: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Sends a query to the select handler (see SolrClient.select).
+
+        :return: The JSON response of Solr
+        """
+        start_time = time.perf_counter()
+        failed = True
+        try:
+            response = await self._post_with_retries(
+                f"{self.url}/select", {**params, "wt": "json"}
+            )
+            response_json: dict[str, Any] = response.json()
+            failed = False
+            return response_json
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            self.metrics.record("select", elapsed_time, failed)
+            logger.debug(
+                "Solr select %s in %.1f ms",
+                "failed" if failed else "completed",
+                elapsed_time * 1000,
+            )
+
+    async def aclose(self) -> None:
+        """
+        Closes the connections of the pool.
+        """
+        await self.http_client.aclose()
+
+    async def _post_with_retries(
+        self, url: str, data: Mapping[str, Any]
+    ) -> httpx.Response:
+        """
+        Sends a form-encoded POST request, sending it again after a failure
+        until max_retries is reached.
+        """
+        for attempt in range(self.max_retries + 1):
+            if attempt > 1:
+                await asyncio.sleep(self.retry_backoff * 2 ** (attempt - 1))
+            is_last_attempt = attempt == self.max_retries
+            try:
+                response = await self.http_client.post(url, data=data)
+            except httpx.TimeoutException as error:
+                if is_last_attempt:
+                    raise requests.Timeout(
+                        f"Solr query timed out: {error!r}"
+                    ) from error
+                continue
+            except httpx.TransportError as error:
+                if is_last_attempt:
+                    raise requests.ConnectionError(
+                        f"Solr query failed: {error!r}"
+                    ) from error
+                continue
+            if response.status_code in RETRY_STATUSES and not is_last_attempt:
+                continue
+            if response.is_error:
+                raise requests.HTTPError(
+                    f"{response.status_code} error for {url}: {response.text[:200]}",
+                    response=_to_requests_response(response),
+                )
+            return response
+        raise AssertionError("unreachable")
+
+
+def _to_requests_response(response: httpx.Response) -> requests.Response:
+    """
+    Copies an httpx response into a requests Response, so that the errors
+    of an AsyncSolrClient carry their response like those of a SolrClient.
+    """
+    requests_response = requests.Response()
+    requests_response.status_code = response.status_code
+    requests_response.reason = response.reason_phrase
+    requests_response.headers.update(response.headers)
+    requests_response.url = str(response.url)
+    requests_response._content = response.content
+    return requests_response
+
+
+# Clients by event loop and URL: the connections of a client belong to
+# the event loop on which they were opened
+_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, AsyncSolrClient]
+] = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+def get_async_solr_client(url: Optional[str] = None) -> AsyncSolrClient:
+    """
+    Returns the client of the running event loop for a Solr core, creating
+    it with the SOLR_CLIENT_* settings on first use.
+
+    :param url: The URL of the Solr core (defaults to settings.SOLR_SERVER)
+    """
+    if url is None:
+        url = settings.SOLR_SERVER
+    loop = asyncio.get_running_loop()
+    with _clients_lock:
+        loop_clients = _clients.setdefault(loop, {})
+        client = loop_clients.get(url)
+        if client is None:
+            client = AsyncSolrClient(
+                url,
+                pool_size=settings.SOLR_CLIENT_POOL_SIZE,
+                connect_timeout=settings.SOLR_CLIENT_CONNECT_TIMEOUT,
+                select_timeout=settings.SOLR_CLIENT_SELECT_TIMEOUT,
+                max_retries=settings.SOLR_CLIENT_MAX_RETRIES,
+                retry_backoff=settings.SOLR_CLIENT_RETRY_BACKOFF,
+            )
+            loop_clients[url] = client
+        return client
@@ -2,10 +2,10 @@ import os
 import signal
 from abc import ABCMeta, abstractmethod
 from multiprocessing import Pool
-from django.conf import settings
 
 import pymei
-import solr
+
+from cantusdata.helpers.solr_client import get_solr_client
 
 DEFAULT_MIN_GRAM = 2
 DEFAULT_MAX_GRAM = 10
@@ -32,8 +32,7 @@ class AbstractMEIConverter(metaclass=ABCMeta):
         self.doc = pymei.documentFromFile(str(file_name), False).getMeiDocument()
         self.page_number = getPageNumber(file_name)
 
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
-        self.image_uri = getImageURI(file_name, manuscript_id, solrconn)
+        self.image_uri = getImageURI(file_name, manuscript_id, get_solr_client())
 
     @classmethod
     def convert(cls, directory, siglum_slug, id, processes=None, **options):
@@ -118,14 +117,14 @@ def getPageNumber(ffile):
     return str(ffile).split("_")[-1].split(".")[0]
 
 
-def getImageURI(ffile, manuscript_id, solrconn):
+def getImageURI(ffile, manuscript_id, solr_client):
     """
     Extract the page number from the file name
     and get the corresponding image URI from Solr
 
     :param ffile:
     :param manuscript_id:
-    :param solrconn:
+    :param solr_client:
     :return: image URI as a string
     """
 
@@ -137,5 +136,5 @@ def getImageURI(ffile, manuscript_id, solrconn):
         )
     )
 
-    result = solrconn.query(composed_request, rows=1, fields=["image_uri"])
-    return result.results[0]["image_uri"]
+    result = solr_client.select({"q": composed_request, "rows": 1, "fl": "image_uri"})
+    return result["response"]["docs"][0]["image_uri"]
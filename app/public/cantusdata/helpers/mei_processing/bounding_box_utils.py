@@ -6,6 +6,8 @@ obtained from MEI files.
 from typing import List, Tuple, Dict
 import json
 from collections import defaultdict
+import numpy as np
+import numpy.typing as npt
 from .mei_parsing_types import Zone
 
 
@@ -65,6 +67,123 @@ def combine_bounding_boxes(bounding_boxes: List[Tuple[Zone, int]]) -> List[Zone]
     return combined_boxes
 
 
+class BoundingBoxIndex:
+    """
+    A precomputed index over a sequence of bounding boxes (e.g. the bounding
+    boxes of the neume components of a file, in order) that answers the question
+    "what are the combined bounding boxes of boxes i to j?" without iterating
+    over the boxes in the range.
+
+    Because systems follow one another in a file, the system numbers of the
+    sequence must be non-decreasing, so that each system occupies a contiguous
+    run of the sequence. The index stores, for each of the four coordinates, a
+    sparse table of range minimums (ulx, uly) or maximums (lrx, lry) over
+    power-of-two-sized windows, which gives the combined box of any range
+    within a single system in constant time.
+
+    Initializes with the coordinates of the bounding boxes (a sequence of
+    CoordinatesType or an array of shape (number of boxes, 4)) and the system
+    numbers that the bounding boxes belong to:
+        index = BoundingBoxIndex(coordinates, systems)
+    or with a list of 2-tuples, each containing (1) a bounding box and
+    (2) the system number that the bounding box belongs to (see
+    combine_bounding_boxes):
+        index = BoundingBoxIndex.from_bounding_boxes(bounding_boxes)
+        index.combine(i, j)  # == combine_bounding_boxes(bounding_boxes[i:j])
+    """
+
+    def __init__(self, coordinates: npt.ArrayLike, systems: npt.ArrayLike) -> None:
+        box_coordinates = np.asarray(coordinates, dtype=np.int64).reshape(-1, 4)
+        box_systems = np.asarray(systems, dtype=np.int64)
+        num_boxes = len(box_systems)
+        if len(box_coordinates) != num_boxes:
+            raise ValueError("Each bounding box must have a system number.")
+        if np.any(np.diff(box_systems) < 0):
+            raise ValueError("System numbers of bounding boxes must be non-decreasing.")
+        # For each box, the (exclusive) end index of the run of boxes
+        # on the same system.
+        run_ends = np.append(np.flatnonzero(np.diff(box_systems)) + 1, num_boxes)
+        self._system_run_ends: List[int] = run_ends[
+            np.searchsorted(run_ends, np.arange(num_boxes), side="right")
+        ].tolist()
+        # Sparse tables: the k-th row of each table contains, at index i,
+        # the min (or max) coordinate of boxes i to i + 2^k - 1. Rows are
+        # built with NumPy but stored as lists, which are faster to index.
+        self._ulx: List[List[int]] = []
+        self._uly: List[List[int]] = []
+        self._lrx: List[List[int]] = []
+        self._lry: List[List[int]] = []
+        for table, column, combine in (
+            (self._ulx, 0, np.minimum),
+            (self._uly, 1, np.minimum),
+            (self._lrx, 2, np.maximum),
+            (self._lry, 3, np.maximum),
+        ):
+            row = box_coordinates[:, column]
+            table.append(row.tolist())
+            window = 1
+            while 2 * window <= num_boxes:
+                row = combine(row[:-window], row[window:])
+                table.append(row.tolist())
+                window *= 2
+
+    @classmethod
+    def from_bounding_boxes(
+        cls, bounding_boxes: List[Tuple[Zone, int]]
+    ) -> "BoundingBoxIndex":
+        """
+        Build a BoundingBoxIndex from a list of 2-tuples, each containing
+        (1) a bounding box and (2) the system number that the bounding box
+        belongs to.
+
+        :param bounding_boxes: A list of bounding boxes and their system numbers
+        :return: A BoundingBoxIndex over the bounding boxes
+        """
+        return cls(
+            [box["coordinates"] for box, _ in bounding_boxes],
+            [system for _, system in bounding_boxes],
+        )
+
+    def combine_single_system(self, start: int, end: int) -> Zone:
+        """
+        Combine the boxes from index start (inclusive) to index end (exclusive),
+        all of which must be on the same system, into one bounding box with no
+        rotation (see combine_bounding_boxes_single_system).
+
+        :param start: The index of the first box to combine
+        :param end: The index after the last box to combine
+        :return: A single bounding box containing the boxes in the range
+        """
+        # Two (possibly overlapping) power-of-two windows cover the range.
+        level = (end - start).bit_length() - 1
+        second_start = end - (1 << level)
+        return {
+            "coordinates": (
+                min(self._ulx[level][start], self._ulx[level][second_start]),
+                min(self._uly[level][start], self._uly[level][second_start]),
+                max(self._lrx[level][start], self._lrx[level][second_start]),
+                max(self._lry[level][start], self._lry[level][second_start]),
+            ),
+            "rotate": 0,
+        }
+
+    def combine(self, start: int, end: int) -> List[Zone]:
+        """
+        Combine the boxes from index start (inclusive) to index end (exclusive)
+        into one bounding box per system, in system order (see combine_bounding_boxes).
+
+        :param start: The index of the first box to combine
+        :param end: The index after the last box to combine
+        :return: A list of bounding boxes, one for each system in the range.
+        """
+        combined_boxes: List[Zone] = []
+        while start < end:
+            run_end = min(self._system_run_ends[start], end)
+            combined_boxes.append(self.combine_single_system(start, run_end))
+            start = run_end
+        return combined_boxes
+
+
 def stringify_bounding_boxes(bounding_boxes: List[Zone]) -> str:
     """
     Convert a list of bounding box types to a string for indexing. The
@@ -0,0 +1,228 @@
+"""
+Defines a class, MEIParseCache, that caches the pitch sequences parsed
+from MEI files (see MEITokenizer) on disk, so that files that have already
+been parsed can be loaded without parsing them again (e.g. when the n-gram
+lengths used to index a manuscript change).
+
+Cache entries are keyed by the SHA-256 hash of the MEI file's contents and
+by MEI_PARSER_VERSION, so an entry is never used for a file whose contents
+have changed or for a file parsed by a different version of the parser.
+Entries are stored as pickles, so the cache directory must only be
+writable by the application.
+
+The total size of the cache is bounded: when it grows past its maximum
+size, the least recently used entries are evicted.
+"""
+
+from typing import Iterator, NamedTuple, Optional, Tuple
+import hashlib
+import logging
+import os
+import pickle
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .pitch_sequence import PitchSequence
+
+logger = logging.getLogger(__name__)
+
+# Increment when a change to MEITokenizer.parse_pitch_sequence or to
+# PitchSequence changes the pitch sequences that are cached, so that entries
+# cached by earlier versions are no longer used.
+MEI_PARSER_VERSION = 2
+
+CACHE_ENTRY_SUFFIX = ".pickle"
+
+
+class CacheEntry(NamedTuple):
+    """
+    The file of a cache entry.
+
+    path: The path to the file
+    size: The size of the file in bytes
+    mtime_ns: The modification time of the file in nanoseconds
+    """
+
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class MEIParseCache:
+    """
+    An on-disk cache of the pitch sequences of MEI files. Each entry is stored in a file of
+    the cache directory named after its key (see get_key). Loading an entry
+    updates the modification time of its file, which is used to find the
+    least recently used entries when the cache is full.
+
+    Errors reading or writing the cache directory are logged and otherwise
+    ignored, so that a missing, unwritable or corrupted cache never prevents
+    an MEI file from being parsed.
+    """
+
+    def __init__(self, cache_dir: str, max_size: int):
+        """
+        :param cache_dir: The directory in which to store cache entries
+        :param max_size: The maximum total size (in bytes) of the entries
+        """
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+
+    def get_key(self, mei_file: str) -> str:
+        """
+        Computes the key of the cache entry for an MEI file.
+
+        :param mei_file: The path to the MEI file
+        :return: The hash of the file's contents, followed by the parser version
+        """
+        with open(mei_file, "rb") as file:
+            content_hash = hashlib.file_digest(file, "sha256").hexdigest()
+        return f"{content_hash}-v{MEI_PARSER_VERSION}"
+
+    def contains(self, key: str) -> bool:
+        """
+        Checks whether the cache has an entry for a key.
+        """
+        return os.path.exists(self._get_entry_path(key))
+
+    def load(self, key: str) -> Optional[PitchSequence]:
+        """
+        Loads a cache entry. An entry that cannot be loaded is removed
+        from the cache.
+
+        :param key: The key of the entry
+        :return: The cached pitch sequence, or None if there is no entry
+            (or if it could not be loaded)
+        """
+        entry_path = self._get_entry_path(key)
+        try:
+            with open(entry_path, "rb") as entry_file:
+                pitch_sequence = pickle.load(entry_file)
+            if not isinstance(pitch_sequence, PitchSequence):
+                raise TypeError(f"Unexpected entry type {type(pitch_sequence)}")
+            os.utime(entry_path)
+        except FileNotFoundError:
+            return None
+        except Exception as error:
+            # Unpickling can raise almost any exception for an entry that
+            # is truncated or was written by another version of the code.
+            logger.warning("Could not load MEI parse cache entry %s: %s", key, error)
+            self._remove_entry(entry_path)
+            return None
+        return pitch_sequence
+
+    def store(self, key: str, pitch_sequence: PitchSequence) -> None:
+        """
+        Stores a cache entry, then evicts entries if the cache is full.
+        The entry is written to a temporary file that is then renamed, so
+        that processes sharing the cache never load a partial entry.
+
+        :param key: The key of the entry
+        :param pitch_sequence: The pitch sequence of the MEI file
+        """
+        temp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                dir=self.cache_dir, suffix=".tmp", delete=False
+            ) as temp_file:
+                temp_path = temp_file.name
+                pickle.dump(pitch_sequence, temp_file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._get_entry_path(key))
+        except OSError as error:
+            logger.warning("Could not store MEI parse cache entry %s: %s", key, error)
+            if temp_path is not None and os.path.exists(temp_path):
+                os.remove(temp_path)
+            return None
+        self.evict()
+
+    def evict(self) -> int:
+        """
+        Removes the least recently used entries until the total size of
+        the cache is at most max_size.
+
+        :return: The number of entries removed
+        """
+        entries = sorted(self._iter_entries(), key=lambda entry: entry.mtime_ns)
+        total_size = sum(entry.size for entry in entries)
+        num_removed = 0
+        for entry in entries:
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # Evicted by another process
+                pass
+            total_size -= entry.size
+            num_removed += 1
+        return num_removed
+
+    def purge(self) -> int:
+        """
+        Removes all entries from the cache.
+
+        :return: The number of entries removed
+        """
+        num_removed = 0
+        for entry in self._iter_entries():
+            try:
+                os.remove(entry.path)
+                num_removed += 1
+            except FileNotFoundError:
+                pass
+        return num_removed
+
+    def get_stats(self) -> Tuple[int, int]:
+        """
+        :return: The number of entries in the cache and their total size (in bytes)
+        """
+        entries = list(self._iter_entries())
+        return len(entries), sum(entry.size for entry in entries)
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + CACHE_ENTRY_SUFFIX)
+
+    def _remove_entry(self, entry_path: str) -> None:
+        try:
+            os.remove(entry_path)
+        except OSError as error:
+            logger.warning(
+                "Could not remove MEI parse cache entry %s: %s", entry_path, error
+            )
+
+    def _iter_entries(self) -> Iterator[CacheEntry]:
+        """
+        Iterates over the entries in the cache directory, with the size
+        and modification time of their files.
+        """
+        try:
+            dir_entries = list(os.scandir(self.cache_dir))
+        except FileNotFoundError:
+            return
+        for dir_entry in dir_entries:
+            if not dir_entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                continue
+            try:
+                entry_stat = dir_entry.stat()
+            except FileNotFoundError:
+                continue
+            yield CacheEntry(dir_entry.path, entry_stat.st_size, entry_stat.st_mtime_ns)
+
+
+def get_default_cache() -> Optional[MEIParseCache]:
+    """
+    Returns the cache configured by the MEI_PARSE_CACHE_DIR and
+    MEI_PARSE_CACHE_MAX_SIZE settings, or None if MEI_PARSE_CACHE_DIR
+    is not set (or if Django settings are not configured, so that MEI
+    files can be parsed outside of the application).
+    """
+    try:
+        cache_dir = getattr(settings, "MEI_PARSE_CACHE_DIR", None)
+    except ImproperlyConfigured:
+        return None
+    if not cache_dir:
+        return None
+    return MEIParseCache(str(cache_dir), settings.MEI_PARSE_CACHE_MAX_SIZE)
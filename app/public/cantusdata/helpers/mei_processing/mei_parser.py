@@ -4,6 +4,9 @@ python types for ease of subsequent processing.
 
 Also defines some additional functions useful for analyzing contents of an MEI
 file:
+    - iter_syllable_elements: Streams the syllable elements of an MEI file,
+        collecting its zones (see MEIParser.iter_syllable_elements).
+    - get_element_zone: Looks up the zone (bounding box) of an element.
     - get_interval_between_neume_components: Computes the interval (in semitones)
         between two neume components.
     - get_contour_from_interval: Computes the contour of an interval.
@@ -14,6 +17,7 @@ Defines associated types for the data structures used by the parser.
 """
 
 from typing import Tuple, Dict, List, Iterator, Optional
+from typing_extensions import TypeAlias
 from lxml import etree  # pylint: disable=no-name-in-module
 from cantusdata.helpers.neume_helpers import NEUME_GROUPS, NeumeName
 from .mei_parsing_types import (
@@ -28,6 +32,13 @@ from .mei_parsing_types import (
 from .bounding_box_utils import combine_bounding_boxes_single_system
 
 
+# The parsed neume components of a neume, the system number that the neume
+# is on, and its parsed first neume component (see
+# MEIParser._parse_syllable_neume_components)
+ParsedNeumeComponents: TypeAlias = Tuple[
+    List[NeumeComponentElementData], int, Optional[NeumeComponentElementData]
+]
+
 # Mapping from pitch names to integer pitch class where C = 0
 PITCH_CLASS = {"c": 0, "d": 2, "e": 4, "f": 5, "g": 7, "a": 9, "b": 11}
 
@@ -46,18 +57,30 @@ class MEIParser:
                 ZONE dictionaries containing the zone coordinates and rotation.
         - syllables: A list of syllables parsed from the MEI file. Each syllable contains
                 the syllable text and a list of neumes in the syllable.
+
+    By default, the whole MEI file is loaded into an lxml tree before it is
+    parsed. Passing streaming=True instead parses the file incrementally with
+    lxml's iterparse (see iter_syllable_elements), so that only the zone table
+    and the syllables currently being processed are held in memory:
+        parser = MEIParser("path/to/mei/file.mei", streaming=True)
+    Both modes produce identical zones and syllables.
     """
 
     # Namespaces used in MEI files
     MEINS = "{http://www.music-encoding.org/ns/mei}"
     XMLNS = "{http://www.w3.org/XML/1998/namespace}"
 
-    def __init__(self, mei_file: str):
+    def __init__(self, mei_file: str, streaming: bool = False):
         self.mei_file = mei_file
-        self.mei = etree.parse(self.mei_file)
-        self._remove_empty_neumes_and_syllables()
-        self.zones = self.parse_zones()
-        self.syllables = self.parse_mei()
+        self.streaming = streaming
+        if streaming:
+            self.zones: Dict[str, Zone] = {}
+            self.syllables: List[Syllable] = list(self.iter_syllables())
+        else:
+            self.mei = etree.parse(self.mei_file)
+            self._remove_empty_neumes_and_syllables()
+            self.zones = self.parse_zones()
+            self.syllables = self.parse_mei()
 
     def parse_zones(self) -> Dict[str, Zone]:
         """
@@ -71,36 +94,15 @@ class MEIParser:
         """
         zones = {}
         for zone in self.mei.iter(f"{self.MEINS}zone"):
-            zone_id = zone.get(f"{self.XMLNS}id")
-            coordinates = (
-                int(zone.get("ulx", 0)),
-                int(zone.get("uly", 0)),
-                int(zone.get("lrx", 0)),
-                int(zone.get("lry", 0)),
-            )
-            rotate = float(zone.get("rotate", 0.0))
-            zone_dict: Zone = {
-                "coordinates": coordinates,
-                "rotate": rotate,
-            }
-            zones[f"#{zone_id}"] = zone_dict
+            zone_key, zone_dict = _parse_zone_element(zone)
+            zones[zone_key] = zone_dict
         return zones
 
     def _get_element_zone(self, element: etree._Element) -> Zone:
         """
-        Get the coordinates of an element, returning
-        (-1,-1,-1,-1) if none are found.
-
-        :param element: An ElementTree element
-        :return: Tuple of coordinates of the element
+        Get the zone of an element from the zone table (see get_element_zone).
         """
-        facs = element.get("facs")
-        if facs:
-            zone = self.zones.get(
-                facs, {"coordinates": (-1, -1, -1, -1), "rotate": 0.0}
-            )
-            return zone
-        return {"coordinates": (-1, -1, -1, -1), "rotate": 0.0}
+        return get_element_zone(element, self.zones)
 
     def _parse_syllable_text(self, syl_elem: Optional[etree._Element]) -> SyllableText:
         """
@@ -165,29 +167,48 @@ class MEIParser:
             )
             if parsed_neume_component:
                 parsed_nc_elements.append(parsed_neume_component)
+        parsed_next_neume_comp: Optional[NeumeComponentElementData] = None
+        if next_neume_component is not None:
+            parsed_next_neume_comp = self._parse_neume_component_element(
+                next_neume_component
+            )
+        return self._build_neume(
+            parsed_nc_elements, neume_system, parsed_next_neume_comp
+        )
+
+    def _build_neume(
+        self,
+        parsed_nc_elements: List[NeumeComponentElementData],
+        neume_system: int,
+        parsed_next_neume_comp: Optional[NeumeComponentElementData],
+    ) -> Neume:
+        """
+        Builds a Neume dictionary from the parsed neume components of a neume
+        and the parsed first neume component of the following neume (if it exists
+        and could be parsed).
+
+        :param parsed_nc_elements: The parsed neume components of the neume
+        :param neume_system: The system number that the neume is on
+        :param parsed_next_neume_comp: The parsed first neume component of the next neume
+        :return: A neume dictionary (see Neume for structure)
+        """
         neume_name, semitone_intervals, contours, intervals = analyze_neume(
             parsed_nc_elements
         )
         # If the first neume component of the next syllable can be parsed,
         # add intervals and contour between the final neume component of
         # the current syllable and the first neume component of the next syllable.
-        if next_neume_component is not None:
-            parsed_next_neume_comp: Optional[NeumeComponentElementData] = (
-                self._parse_neume_component_element(next_neume_component)
-            )
-            if parsed_next_neume_comp:
-                last_neume_comp = parsed_nc_elements[-1]
-                semitone_intervals.append(
-                    get_semitones_between_neume_components(
-                        last_neume_comp, parsed_next_neume_comp
-                    )
-                )
-                contours.append(get_contour_from_interval(semitone_intervals[-1]))
-                intervals.append(
-                    get_melodic_interval(
-                        semitone_intervals[-1], last_neume_comp["pname"]
-                    )
+        if parsed_next_neume_comp:
+            last_neume_comp = parsed_nc_elements[-1]
+            semitone_intervals.append(
+                get_semitones_between_neume_components(
+                    last_neume_comp, parsed_next_neume_comp
                 )
+            )
+            contours.append(get_contour_from_interval(semitone_intervals[-1]))
+            intervals.append(
+                get_melodic_interval(semitone_intervals[-1], last_neume_comp["pname"])
+            )
         # Get a bounding box for the neume by combining bounding boxes of
         # its components. Note that a single neume does not span multiple
         # systems, so the combined bounding box will be a single zone.
@@ -364,6 +385,231 @@ class MEIParser:
             syllables.append(syllable_dict)
         return syllables
 
+    def iter_syllables(self) -> Iterator[Syllable]:
+        """
+        Parses the MEI file incrementally with lxml's iterparse, yielding
+        syllables in the same order and with the same content as parse_mei.
+
+        A syllable is yielded once the following syllable has closed, since
+        the interval and contour between the final neume of a syllable and the
+        first neume of the next syllable depend on both.
+
+        :return: An iterator over the syllables of the MEI file
+        """
+        pending_syllable: Optional[Tuple[SyllableText, List[ParsedNeumeComponents]]] = (
+            None
+        )
+        for syllable, system in self.iter_syllable_elements():
+            syllable_text = self._parse_syllable_text(syllable.find(f"{self.MEINS}syl"))
+            syllable_neumes, next_neume_comp = self._parse_syllable_neume_components(
+                syllable, system
+            )
+            if pending_syllable is not None:
+                yield self._build_syllable(*pending_syllable, next_neume_comp)
+            pending_syllable = (syllable_text, syllable_neumes)
+        if pending_syllable is not None:
+            yield self._build_syllable(*pending_syllable, None)
+
+    def iter_syllable_elements(self) -> Iterator[Tuple[etree._Element, int]]:
+        """
+        Parses the MEI file incrementally, yielding the 'syllable' elements
+        that parse_mei would parse, in order, and filling the zone table
+        (see iter_syllable_elements).
+
+        :return: An iterator over tuples of a 'syllable' element and the
+            system number at the start of the syllable
+        """
+        self.zones = {}
+        return iter_syllable_elements(self.mei_file, self.zones)
+
+    def _parse_syllable_neume_components(
+        self, syllable: etree._Element, system: int
+    ) -> Tuple[List[ParsedNeumeComponents], Optional[NeumeComponentElementData]]:
+        """
+        Parses the neume components of each non-empty neume in a 'syllable'
+        element, keeping track of any system breaks within the syllable.
+
+        :param syllable: A 'syllable' element from an MEI file
+        :param system: The system number at the start of the syllable
+        :return: A tuple of:
+            - A list of tuples, each containing the parsed neume components
+                of a neume, the system number that the neume is on, and the
+                parsed first neume component of the neume (None if it
+                could not be parsed).
+            - The parsed first neume component of the syllable's first neume,
+                if it could be parsed.
+        """
+        neumes: List[ParsedNeumeComponents] = []
+        for neume_or_sb_elem in syllable.iter(f"{self.MEINS}neume", f"{self.MEINS}sb"):
+            if neume_or_sb_elem.tag == f"{self.MEINS}sb":
+                system += 1
+                continue
+            nc_elems = neume_or_sb_elem.findall(f"{self.MEINS}nc")
+            if not nc_elems:
+                continue
+            parsed_ncs: List[NeumeComponentElementData] = []
+            for nc_elem in nc_elems:
+                parsed_nc = self._parse_neume_component_element(nc_elem)
+                if parsed_nc:
+                    parsed_ncs.append(parsed_nc)
+            neumes.append(
+                (parsed_ncs, system, self._parse_neume_component_element(nc_elems[0]))
+            )
+        first_neume = next(
+            neume
+            for neume in syllable.iterchildren(f"{self.MEINS}neume")
+            if neume.find(f"{self.MEINS}nc") is not None
+        )
+        first_neume_comp = self._parse_neume_component_element(
+            first_neume.find(f"{self.MEINS}nc")  # type: ignore[arg-type]
+        )
+        return neumes, first_neume_comp
+
+    def _build_syllable(
+        self,
+        syllable_text: SyllableText,
+        syllable_neumes: List[ParsedNeumeComponents],
+        next_syllable_1st_nc: Optional[NeumeComponentElementData],
+    ) -> Syllable:
+        """
+        Builds a Syllable dictionary from the parsed contents of a syllable
+        and the parsed first neume component of the next syllable (if it exists
+        and could be parsed).
+
+        :param syllable_text: The parsed text of the syllable
+        :param syllable_neumes: The parsed neume components of each neume in the
+            syllable (see _parse_syllable_neume_components)
+        :param next_syllable_1st_nc: The parsed first neume component of the next syllable
+        :return: A syllable dictionary (see Syllable for structure)
+        """
+        neumes_list: List[Neume] = []
+        for idx, (parsed_ncs, neume_system, _) in enumerate(syllable_neumes):
+            if idx + 1 < len(syllable_neumes):
+                next_nc = syllable_neumes[idx + 1][2]
+            else:
+                next_nc = next_syllable_1st_nc
+            neumes_list.append(self._build_neume(parsed_ncs, neume_system, next_nc))
+        return {"text": syllable_text, "neumes": neumes_list}
+
+
+def _parse_zone_element(zone: etree._Element) -> Tuple[str, Zone]:
+    """
+    Parses a 'zone' element into a Zone dictionary.
+
+    :param zone: A 'zone' element from an MEI file
+    :return: A tuple of the key used to reference the zone in 'facs'
+        attributes (the zone ID preceded by "#") and the Zone dictionary.
+    """
+    zone_id = zone.get(f"{MEIParser.XMLNS}id")
+    coordinates = (
+        int(zone.get("ulx", 0)),
+        int(zone.get("uly", 0)),
+        int(zone.get("lrx", 0)),
+        int(zone.get("lry", 0)),
+    )
+    rotate = float(zone.get("rotate", 0.0))
+    zone_dict: Zone = {
+        "coordinates": coordinates,
+        "rotate": rotate,
+    }
+    return f"#{zone_id}", zone_dict
+
+
+def get_element_zone(element: etree._Element, zones: Dict[str, Zone]) -> Zone:
+    """
+    Get the coordinates of an element, returning
+    (-1,-1,-1,-1) if none are found.
+
+    :param element: An ElementTree element
+    :param zones: The zones of the MEI file (see MEIParser.parse_zones)
+    :return: Tuple of coordinates of the element
+    """
+    facs = element.get("facs")
+    if facs:
+        zone = zones.get(facs, {"coordinates": (-1, -1, -1, -1), "rotate": 0.0})
+        return zone
+    return {"coordinates": (-1, -1, -1, -1), "rotate": 0.0}
+
+
+def iter_syllable_elements(
+    mei_file: str, zones: Dict[str, Zone]
+) -> Iterator[Tuple[etree._Element, int]]:
+    """
+    Parses an MEI file incrementally with lxml's iterparse, yielding
+    the 'syllable' elements that MEIParser.parse_mei would parse, in order.
+
+    Zones are added to the zone table as their 'zone' elements close (MEI
+    places the 'facsimile' element before the 'body', so all zones are known
+    before the first syllable is reached). Each syllable element is freed
+    once the next one is requested, and empty neumes and syllables (see
+    MEIParser._remove_empty_neumes_and_syllables) are skipped as they are
+    encountered.
+
+    :param mei_file: The path to the MEI file
+    :param zones: The zone table, to which the zones of the file are added
+    :return: An iterator over tuples of a 'syllable' element and the
+        system number at the start of the syllable
+    """
+    zone_tag = f"{MEIParser.MEINS}zone"
+    syllable_tag = f"{MEIParser.MEINS}syllable"
+    sb_tag = f"{MEIParser.MEINS}sb"
+    system = 1
+    # Only the first syllable and its 'syllable' and 'sb' siblings are
+    # parsed (see MEIParser._syllable_iterator), so we keep track of their
+    # parent.
+    syllable_parent: Optional[etree._Element] = None
+    for _, elem in etree.iterparse(
+        mei_file, events=("end",), tag=[zone_tag, syllable_tag, sb_tag]
+    ):
+        if elem.tag == zone_tag:
+            zone_key, zone_dict = _parse_zone_element(elem)
+            zones[zone_key] = zone_dict
+            _free_element(elem)
+        elif elem.tag == sb_tag:
+            # 'sb' elements contained by a syllable are counted when
+            # that syllable has been parsed.
+            if syllable_parent is not None and elem.getparent() is syllable_parent:
+                system += 1
+        else:
+            if not _has_nonempty_neume(elem) or (
+                syllable_parent is not None and elem.getparent() is not syllable_parent
+            ):
+                elem.clear()
+                continue
+            if syllable_parent is None:
+                syllable_parent = elem.getparent()
+            yield elem, system
+            system += sum(1 for _ in elem.iter(sb_tag))
+            _free_element(elem)
+
+
+def _has_nonempty_neume(syllable: etree._Element) -> bool:
+    """
+    Checks whether a 'syllable' element contains at least one 'neume'
+    element with neume components.
+
+    :param syllable: A 'syllable' element from an MEI file
+    :return: True if the syllable contains a non-empty neume
+    """
+    return any(
+        neume.find(f"{MEIParser.MEINS}nc") is not None
+        for neume in syllable.iterchildren(f"{MEIParser.MEINS}neume")
+    )
+
+
+def _free_element(element: etree._Element) -> None:
+    """
+    Frees an element that has been fully parsed during incremental parsing,
+    along with any preceding siblings (which have also been parsed).
+
+    :param element: An element that has been parsed
+    """
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
 
 def get_semitones_between_neume_components(
     neume_component_1: NeumeComponentElementData,
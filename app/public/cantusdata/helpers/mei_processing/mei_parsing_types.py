@@ -101,6 +101,11 @@ class Syllable(TypedDict):
     neumes: List[Neume]
 
 
+# The kind of an n-gram: an n-gram of n pitches, or an n-gram
+# of n complete neumes (see MEITokenizer.iter_ngram_documents)
+NgramKind = Literal["pitch", "neume"]
+
+
 class NgramDocument(TypedDict):
     """
     A generic type for documents containing n-grams
@@ -111,6 +116,10 @@ class NgramDocument(TypedDict):
         converted to JSON strings according to bounding_box_utils.stringify_bounding_boxes)
     pitch_names: A string containing the pitch names of the neume components in the n-gram,
         separated by underscores.
+    pitch_names_transposed: A string containing the pitch names of the neume components
+        in the n-gram relative to the first pitch name (see
+        search_utils.get_relative_pitch_names), separated by underscores. It is the
+        same for all transpositions of the n-gram.
     contour: A string containing the contours of the neume components in the n-gram, separated
         by underscores.
     semitone_interval: A string containing the semitone intervals between the neume components
@@ -120,6 +129,8 @@ class NgramDocument(TypedDict):
     neume_names: A string containing the names of the neumes in the n-gram,
         separated by underscores. This field is not required, and is only present when
         the n-gram contains complete neumes.
+    ngram_start: The index of the first pitch of the n-gram among the pitches
+        (neume components) of the MEI file, used to find adjacent n-grams.
 
     The following may be part of an NgramDocument, but are optional because
     they will be added when the document is indexed:
@@ -131,12 +142,64 @@ class NgramDocument(TypedDict):
 
     location_json: str
     pitch_names: str
+    pitch_names_transposed: NotRequired[str]
     contour: str
     semitone_intervals: str
     intervals: str
     neume_names: NotRequired[str]
+    ngram_start: NotRequired[int]
     manuscript_id: NotRequired[str]
     folio: NotRequired[str]
     id: NotRequired[str]
     type: NotRequired[Literal["omr_ngram"]]
     image_uri: NotRequired[str]
+
+
+# The scheme in which the pitches of an MEI file are indexed: as n-gram
+# documents (see MEITokenizer.iter_ngram_documents) or as a single document
+# of position-tokenized streams (see MEITokenizer.create_stream_document)
+IndexScheme = Literal["ngram", "stream"]
+
+
+class StreamDocument(TypedDict):
+    """
+    A type for documents containing all the pitches (neume components)
+    of an MEI file as streams of tokens separated by spaces. The streams of
+    pitch names, contours, semitone intervals and intervals have one token
+    per pitch, so that a token's position in the stream is the index of its
+    pitch in the file.
+
+    pitch_stream: The pitch name of each pitch.
+    contour_stream: The contour between each pitch and the following pitch
+        (MISSING_INTERVAL_TOKEN where there is no following pitch, or no
+        interval to it).
+    semitone_interval_stream: The semitone interval between each pitch and
+        the following pitch (or MISSING_INTERVAL_TOKEN).
+    interval_stream: The interval between each pitch and the following pitch
+        (or MISSING_INTERVAL_TOKEN).
+    neume_stream: The name of each neume.
+    neume_starts: The index of the first pitch of each neume.
+    pitch_boxes_json: A JSON array containing, for each pitch, the coordinates
+        of its bounding box (see CoordinatesType) followed by its system number.
+
+    The following may be part of a StreamDocument, but are optional because
+    they will be added when the document is indexed:
+        manuscript_id: The ID of the manuscript the MEI file belongs to.
+        folio: The number of the folio of the MEI file.
+        image_uri: The URI of the folio's image.
+        id: The unique ID of the document (corresponds to solr schema's id field)
+        type: The type of the document (corresponds to solr schema's type field)
+    """
+
+    pitch_stream: str
+    contour_stream: str
+    semitone_interval_stream: str
+    interval_stream: str
+    neume_stream: str
+    neume_starts: str
+    pitch_boxes_json: str
+    manuscript_id: NotRequired[str]
+    folio: NotRequired[str]
+    image_uri: NotRequired[str]
+    id: NotRequired[str]
+    type: NotRequired[Literal["omr_stream"]]
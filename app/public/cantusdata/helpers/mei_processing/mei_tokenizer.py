@@ -1,36 +1,195 @@
 """
-Defines a class MEITokenizer that extends MEIParser with functionaliy
-used to create json documents from an MEI file. These json documents
+Defines a class MEITokenizer that reads the pitches of an MEI file
+to create json documents from it. These json documents
 can then be indexed by a search engine (i.e. for this project, Solr). 
 """
 
+import json
+import time
 import uuid
-from typing import List, Tuple, Optional
-from cantusdata.helpers.neume_helpers import NeumeName
-from .mei_parser import MEIParser
+from functools import cached_property
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from typing_extensions import TypeAlias
+from .mei_parser import (
+    MEIParser,
+    PITCH_CLASS,
+    get_element_zone,
+    iter_syllable_elements,
+)
+from .mei_parse_cache import get_default_cache
 from .mei_parsing_types import (
     Neume,
-    NeumeComponent,
-    ContourType,
     NgramDocument,
+    NgramKind,
+    StreamDocument,
+    Syllable,
     Zone,
 )
-from .bounding_box_utils import combine_bounding_boxes, stringify_bounding_boxes
+from .bounding_box_utils import BoundingBoxIndex, stringify_bounding_boxes
+from .pitch_sequence import PitchSequence, PitchTokens
+
+
+# Namespace for the UUIDs of ngram documents (see get_ngram_document_id)
+OMR_NGRAM_ID_NAMESPACE = uuid.UUID("3c8c603e-1dc3-4b59-b447-75feff2cf922")
+
+# The token of the contour, semitone interval and interval streams of a
+# stream document at pitches that have no interval to the following pitch
+# (see MEITokenizer.create_stream_document). It is not a valid query term,
+# so queries never match across such pitches.
+MISSING_INTERVAL_TOKEN = "x"
+
+# The version of the fields of the ngram documents created by an
+# MEITokenizer, recorded in the fingerprints of the MEI files indexed by
+# index_manuscript_mei (see MEIFileFingerprint). Files indexed before
+# fingerprints recorded it have version 0.
+NGRAM_DOCUMENT_VERSION = 1
+
+# The first NGRAM_DOCUMENT_VERSION of ngram documents with a
+# pitch_names_transposed field
+PITCH_NAMES_TRANSPOSED_VERSION = 1
+
+# The fields of an ngram document created by an MEITokenizer, in the
+# order in which they are stored in a CompactNgramDocument
+COMPACT_NGRAM_DOCUMENT_FIELDS = (
+    "id",
+    "ngram_start",
+    "location_json",
+    "pitch_names",
+    "pitch_names_transposed",
+    "contour",
+    "semitone_intervals",
+    "intervals",
+    "neume_names",
+)
 
+# An ngram document as a tuple of the values of COMPACT_NGRAM_DOCUMENT_FIELDS
+# (None for a missing neume_names field). The "type" field, which is the same
+# for all ngram documents, is omitted.
+CompactNgramDocument: TypeAlias = Tuple[Union[str, int, None], ...]
 
-class MEITokenizer(MEIParser):
+
+class MEITokenizer:
     """
     An MEITokenizer object is initialized with an MEI file and a set of
     parameters that define how the MEI file should be tokenized. These
     parameters are:
     - min_ngram: The minimum length of n-grams to generate.
     - max_ngram: The maximum length of n-grams to generate.
+    - streaming: Whether to parse the syllables of the MEI file incrementally
+        (see MEIParser).
+    - use_cache: Whether to load the pitches of the MEI file from the parse
+        cache (see mei_parse_cache).
+    - manuscript_id, folio: The manuscript and folio that the MEI file
+        belongs to. These are only used to derive the IDs of ngram
+        documents (see get_ngram_document_id).
+
+    The pitches of the MEI file are read directly from its neume components
+    into a PitchSequence (pitch_sequence attribute), from which ngram
+    documents are created (see parse_pitch_sequence). Alternatively, all the
+    pitches of the file can be indexed as a single stream document (see
+    create_stream_document). The syllables of the file are only parsed,
+    by an MEIParser (parser attribute), if they are used.
+
+    If a parse cache is configured (see mei_parse_cache), the pitch sequence
+    of a file that has already been parsed is loaded from the cache instead,
+    and the pitch sequences of newly parsed files are added to it.
     """
 
-    def __init__(self, mei_file: str, min_ngram: int, max_ngram: int) -> None:
-        super().__init__(mei_file)
+    def __init__(
+        self,
+        mei_file: str,
+        min_ngram: int,
+        max_ngram: int,
+        streaming: bool = False,
+        manuscript_id: Optional[str] = None,
+        folio: Optional[str] = None,
+        use_cache: bool = True,
+    ) -> None:
+        self.mei_file = mei_file
+        self.streaming = streaming
         self.min_ngram = min_ngram
         self.max_ngram = max_ngram
+        self.manuscript_id = manuscript_id
+        self.folio = folio
+        cache = get_default_cache() if use_cache else None
+        if cache is None:
+            self.pitch_sequence = self.parse_pitch_sequence()
+            return
+        cache_key = cache.get_key(mei_file)
+        cached_pitch_sequence = cache.load(cache_key)
+        if cached_pitch_sequence is None:
+            self.pitch_sequence = self.parse_pitch_sequence()
+            cache.store(cache_key, self.pitch_sequence)
+        else:
+            self.pitch_sequence = cached_pitch_sequence
+
+    @cached_property
+    def parser(self) -> MEIParser:
+        """
+        The MEIParser of the MEI file, created (which parses its zones and
+        syllables) when it is first used.
+        """
+        return MEIParser(self.mei_file, streaming=self.streaming)
+
+    @property
+    def syllables(self) -> List[Syllable]:
+        return self.parser.syllables
+
+    def parse_pitch_sequence(self) -> PitchSequence:
+        """
+        Builds the PitchSequence of the MEI file from its 'nc' elements as
+        they are streamed (see iter_syllable_elements), without building the
+        neume and syllable dictionaries of MEIParser.
+
+        Neume components that have no pitch name or octave are skipped. There
+        is an interval between each pitch and the following pitch of the same
+        neume. There is an interval between the last pitch of a neume and the
+        first pitch of the next neume if the first neume component of the
+        next neume has a pitch name and octave.
+
+        :return: The PitchSequence of the neume components of the MEI file
+        """
+        pitch_classes: List[int] = []
+        octaves: List[int] = []
+        systems: List[int] = []
+        neume_starts: List[bool] = []
+        has_intervals: List[bool] = []
+        coordinates: List[int] = []
+        neume_tag = f"{MEIParser.MEINS}neume"
+        nc_tag = f"{MEIParser.MEINS}nc"
+        sb_tag = f"{MEIParser.MEINS}sb"
+        zones: Dict[str, Zone] = {}
+        # The index of the last pitch of the previous neume, if any
+        previous_neume_end: Optional[int] = None
+        for syllable, system in iter_syllable_elements(self.mei_file, zones):
+            for neume_or_sb in syllable.iter(neume_tag, sb_tag):
+                if neume_or_sb.tag == sb_tag:
+                    system += 1
+                    continue
+                neume_start = True
+                for nc_idx, nc in enumerate(neume_or_sb.iterchildren(nc_tag)):
+                    pname = nc.get("pname")
+                    octave = nc.get("oct")
+                    if not (pname and octave):
+                        if nc_idx == 0:
+                            previous_neume_end = None
+                        continue
+                    if nc_idx == 0 and previous_neume_end is not None:
+                        has_intervals[previous_neume_end] = True
+                    if not neume_start:
+                        has_intervals[-1] = True
+                    pitch_classes.append(PITCH_CLASS[pname])
+                    octaves.append(int(octave))
+                    systems.append(system)
+                    neume_starts.append(neume_start)
+                    has_intervals.append(False)
+                    coordinates.extend(get_element_zone(nc, zones)["coordinates"])
+                    neume_start = False
+                if not neume_start:
+                    previous_neume_end = len(pitch_classes) - 1
+        return PitchSequence(
+            pitch_classes, octaves, systems, neume_starts, has_intervals, coordinates
+        )
 
     @property
     def flattened_neumes(self) -> List[Neume]:
@@ -44,96 +203,18 @@ class MEITokenizer(MEIParser):
             neumes.extend(syllable["neumes"])
         return neumes
 
-    def _stringify_neume_component_data(
-        self,
-        neume_components: List[NeumeComponent],
-    ) -> Tuple[str, str, str, str]:
-        """
-        Convert pitch, contour, and interval information from a list of
-        neume components into strings.
-
-        :param neume_components: A list of neumes or neume components to convert into strings.
-        :return: A tuple containing the pitch names, contours, and intervals
-            of the neumes or neume components as strings, separated by underscores.
-        """
-        pnames: List[str] = []
-        contours: List[ContourType] = []
-        semitone_intervals: List[str] = []
-        intervals: List[str] = []
-        for idx, nc in enumerate(neume_components):
-            pnames.append(nc["pname"])
-            # The semitone_interval is None if and only if the countour is None,
-            # so we can safely do this single check.
-            # Collect one fewer contour/interval than the number of pitches so
-            # that the pitches and contours/intervals are aligned (number of intervals/
-            # contours = number of pitches - 1).
-            if idx != len(neume_components) - 1:
-                if nc["contour"] is not None:
-                    contours.append(nc["contour"])
-                    semitone_intervals.append(str(nc["semitone_interval"]))
-                if nc["interval"] is not None:
-                    intervals.append(str(nc["interval"]))
-        return (
-            "_".join(pnames),
-            "_".join(contours),
-            "_".join(semitone_intervals),
-            "_".join(intervals),
-        )
-
-    def _create_document_from_neume_components(
-        self,
-        neume_components: List[NeumeComponent],
-    ) -> NgramDocument:
+    def create_ngram_documents(self) -> List[NgramDocument]:
         """
-        Create an NgramDocument from a list of neume components and
-        their corresponding system numbers.
+        Create a list of ngram documents from the MEI file. See
+        iter_ngram_documents for details.
 
-        :param ncs_with_sys: A list of tuples, each containing a neume component
-            and the system number of that neume component.
-        :return: An NgramDocument containing the information from the neume components.
+        :return: A list of NgramDocuments.
         """
-        pitch_names, contour, semitone_intervals, intervals = (
-            self._stringify_neume_component_data(neume_components)
-        )
-        zones_with_sys: List[Tuple[Zone, int]] = [
-            (nc["bounding_box"], nc["system"]) for nc in neume_components
-        ]
-        location: str = stringify_bounding_boxes(combine_bounding_boxes(zones_with_sys))
-        return {
-            "location_json": location,
-            "pitch_names": pitch_names,
-            "contour": contour,
-            "semitone_intervals": semitone_intervals,
-            "intervals": intervals,
-            "id": str(uuid.uuid4()),
-            "type": "omr_ngram",
-        }
-
-    def _create_pitch_sequences(
-        self,
-    ) -> Tuple[List[NeumeComponent], List[Optional[NeumeName]]]:
-        """
-        Create two lists of equal length: one containing
-        the pitches (neume components) contained in the parsed file,
-        and the other containing the names of the neumes that begin
-        at each pitch (or None if no neume begins at that pitch).
-
-        :return: A tuple containing the list of pitches and the list of neume names.
-        """
-        neume_sequence = self.flattened_neumes
-        neume_names: List[Optional[NeumeName]] = []
-        ncs: List[NeumeComponent] = []
-        for neume in neume_sequence:
-            ncs.extend(neume["neume_components"])
-            flattened_neume_names = [neume["neume_name"]] + [None] * (
-                len(neume["neume_components"]) - 1
-            )
-            neume_names.extend(flattened_neume_names)
-        return ncs, neume_names
+        return list(self.iter_ngram_documents())
 
-    def create_ngram_documents(self) -> List[NgramDocument]:
+    def iter_ngram_documents(self) -> Iterator[NgramDocument]:
         """
-        Create a list of ngram documents from the MEI file,
+        Generate ngram documents from the MEI file one at a time,
         ensuring that we have ngrams that contain n pitches
         and n neumes for all n in the range min_ngram to max_ngram.
 
@@ -151,79 +232,376 @@ class MEITokenizer(MEIParser):
             - If this check fails, the function creates remaining ngrams of complete
                 neumes up to max_ngram of complete neumes.
 
-        :return: A list of NgramDocuments.
+        All the ngrams starting at a given pitch are built by a single
+        NgramBuilder: each ngram extends the previous one by one pitch, so the
+        work done at each pitch is proportional to the length of the longest
+        ngram starting there. The location of each ngram is computed from a
+        BoundingBoxIndex over all the pitches of the file, in time that depends
+        only on the number of systems the ngram spans. Ngrams of complete neumes
+        always contain more than max_ngram pitches (shorter ones are created as ngrams of pitches), so they
+        are found by continuing to extend the same builder up to the end of
+        the max_ngram-th neume.
+
+        Documents are generated lazily, so that callers can process
+        them in chunks without holding all of a file's documents in memory.
+
+        :return: An iterator over NgramDocuments.
         """
-        pitches, neume_names = self._create_pitch_sequences()
-        ngram_docs: List[NgramDocument] = []
-        num_pitches = len(pitches)
+        sequence = self.pitch_sequence
+        num_pitches = len(sequence)
+        tokens = sequence.tokens()
+        neume_names = tokens.neume_names
+        next_neume_starts = sequence.get_next_neume_start_indices().tolist()
+        bounding_box_index = BoundingBoxIndex(sequence.coordinates, sequence.system)
         # At each pitch in the file, we'll generate all the necessary
         # ngrams that start with that pitch.
         for start_idx in range(num_pitches):
-            # Start by collecting ngrams of pitches of lengths min_ngram
-            # to max_ngram.
+            neume_start = neume_names[start_idx] is not None
+            # Find the end of the longest ngram starting at start_idx: either
+            # the ngram of max_ngram pitches or, if the pitch at start_idx
+            # is the beginning of a neume, the ngram of max_ngram complete neumes.
+            last_end_idx = min(start_idx + self.max_ngram, num_pitches)
+            if neume_start:
+                neume_end_idx = start_idx
+                for _ in range(self.max_ngram):
+                    if neume_end_idx == num_pitches:
+                        break
+                    neume_end_idx = next_neume_starts[neume_end_idx]
+                last_end_idx = max(last_end_idx, neume_end_idx)
+            ngram = NgramBuilder(tokens, start_idx)
             largest_num_neumes = 0
-            for ngram_length in range(self.min_ngram, self.max_ngram + 1):
-                # Collect the pitches for an ngram of ngram_length
-                # pitches starting at start_idx, if we haven't reached the
-                # end of the pitches.
-                end_idx = start_idx + ngram_length
-                if end_idx > num_pitches:
-                    break
-                doc = self._create_document_from_neume_components(
-                    pitches[start_idx:end_idx]
-                )
+            for end_idx in range(start_idx + 1, last_end_idx + 1):
+                ngram.extend(end_idx - 1)
+                ngram_length = end_idx - start_idx
                 # If the pitch at start_idx is the beginning of a neume
                 # and the pitch following this ngram is also the beginning
                 # of a neume (or we've reached the end of the file),
                 # then our current ngram of pitches overlaps
                 # with some number of complete neumes.
-                neume_start = neume_names[start_idx] is not None
-                if neume_start:
-                    if end_idx == num_pitches or neume_names[end_idx] is not None:
-                        neume_name_list = [
-                            nn
-                            for nn in neume_names[start_idx:end_idx]
-                            if nn is not None
-                        ]
-                        doc["neume_names"] = "_".join(neume_name_list)
-                        largest_num_neumes = len(neume_name_list)
-                ngram_docs.append(doc)
-            # If the current neume component starts a neume and we
-            # haven't reached the maximum ngram length of neumes
-            # in our existing documents, generate documents containing
-            # larger ngrams of neumes until we reach the maximum ngram length.
-            if neume_start and largest_num_neumes < self.max_ngram:
-                min_wanted_ngram_length = max(largest_num_neumes + 1, self.min_ngram)
-                for wanted_ngram_length in range(
-                    min_wanted_ngram_length, self.max_ngram + 1
+                complete_neumes = neume_start and (
+                    end_idx == num_pitches or neume_names[end_idx] is not None
+                )
+                if ngram_length <= self.max_ngram:
+                    # Collect ngrams of pitches of lengths min_ngram
+                    # to max_ngram.
+                    if ngram_length >= self.min_ngram:
+                        if complete_neumes:
+                            largest_num_neumes = ngram.num_neumes
+                        yield ngram.create_document(
+                            bounding_box_index.combine(start_idx, end_idx),
+                            include_neume_names=complete_neumes,
+                            doc_id=get_ngram_document_id(
+                                self.manuscript_id,
+                                self.folio,
+                                start_idx,
+                                ngram_length,
+                                "pitch",
+                            ),
+                        )
+                # If the current neume component starts a neume and we
+                # haven't reached the maximum ngram length of neumes
+                # in our existing documents, generate documents containing
+                # larger ngrams of neumes until we reach the maximum ngram length.
+                elif (
+                    complete_neumes
+                    and ngram.num_neumes > largest_num_neumes
+                    and ngram.num_neumes >= self.min_ngram
                 ):
-                    ngram_neume_names: List[NeumeName] = []
-                    ngram_num_pitches = 0
-                    # We'll add pitches to our ngram until we have the
-                    # number of neumes we want in our ngram or we reach
-                    # the end of the file.
-                    while (len(ngram_neume_names) <= wanted_ngram_length) and (
-                        start_idx + ngram_num_pitches < len(pitches)
-                    ):
-                        if (
-                            name_at_pitch := neume_names[start_idx + ngram_num_pitches]
-                        ) is not None:
-                            # If we've reached a new neume name, but we already
-                            # have the desired number of neumes in our ngram,
-                            # we've added all the required pitches for this ngram
-                            # to ngram_num_pitches and can break the while loop.
-                            if len(ngram_neume_names) == wanted_ngram_length:
-                                break
-                            ngram_neume_names.append(name_at_pitch)
-                        ngram_num_pitches += 1
-                    # We'll only add this ngram if we've actually gotten to
-                    # the desired number of neumes (if we didn't, it means
-                    # we reached the end of the file)
-                    if len(ngram_neume_names) == wanted_ngram_length:
-                        ngram_pitches = pitches[
-                            start_idx : start_idx + ngram_num_pitches
-                        ]
-                        doc = self._create_document_from_neume_components(ngram_pitches)
-                        doc["neume_names"] = "_".join(ngram_neume_names)
-                        ngram_docs.append(doc)
-        return ngram_docs
+                    yield ngram.create_document(
+                        bounding_box_index.combine(start_idx, end_idx),
+                        include_neume_names=True,
+                        doc_id=get_ngram_document_id(
+                            self.manuscript_id,
+                            self.folio,
+                            start_idx,
+                            ngram.num_neumes,
+                            "neume",
+                        ),
+                    )
+
+    def create_stream_document(self) -> StreamDocument:
+        """
+        Create a single document containing all the pitches of the MEI
+        file as position-tokenized streams (see StreamDocument). Unlike
+        ngram documents, a stream document can match queries of any length
+        (with phrase queries on its streams); the location of a match is
+        computed from the bounding boxes of its pitches when it is found.
+
+        :return: A StreamDocument containing the pitches of the file.
+        """
+        sequence = self.pitch_sequence
+        tokens = sequence.tokens()
+        neume_starts = [
+            idx for idx, name in enumerate(tokens.neume_names) if name is not None
+        ]
+        pitch_boxes = [
+            coordinates + [system]
+            for coordinates, system in zip(
+                sequence.coordinates.tolist(), sequence.system.tolist()
+            )
+        ]
+        return {
+            "pitch_stream": " ".join(tokens.pitch_names),
+            "contour_stream": _join_stream(tokens.contours),
+            "semitone_interval_stream": _join_stream(tokens.semitone_intervals),
+            "interval_stream": _join_stream(tokens.intervals),
+            "neume_stream": " ".join(
+                str(tokens.neume_names[idx]) for idx in neume_starts
+            ),
+            "neume_starts": " ".join(str(idx) for idx in neume_starts),
+            "pitch_boxes_json": json.dumps(pitch_boxes, separators=(",", ":")),
+            "id": get_stream_document_id(self.manuscript_id, self.folio),
+            "type": "omr_stream",
+        }
+
+
+class NgramBuilder:
+    """
+    Builds the fields of an NgramDocument incrementally, one pitch (neume
+    component) at a time, so that an ngram of n + 1 pitches can be created
+    by extending the ngram of the first n pitches.
+
+    Initializes with the tokens of the pitch sequence from which the ngram
+    is taken (see PitchSequence.tokens) and the index of the first pitch
+    of the ngram in that sequence.
+    """
+
+    def __init__(self, tokens: PitchTokens, start: int) -> None:
+        self.tokens = tokens
+        self.start = start
+        self.pitch_names = ""
+        self.pitch_names_transposed = ""
+        self.contour = ""
+        self.semitone_intervals = ""
+        self.intervals = ""
+        self.neume_names = ""
+        self.num_neumes = 0
+        self._last_idx: Optional[int] = None
+        self._first_pitch_ord = 0
+
+    def extend(self, idx: int) -> None:
+        """
+        Add a pitch to the end of the ngram.
+
+        :param idx: The index of the pitch in the pitch sequence. This must be
+            the start index of the ngram or the index following that of the
+            last pitch added to the ngram.
+        """
+        tokens = self.tokens
+        last_idx = self._last_idx
+        pitch_name = tokens.pitch_names[idx]
+        if last_idx is None:
+            self.pitch_names = pitch_name
+            self.pitch_names_transposed = "0"
+            self._first_pitch_ord = ord(pitch_name)
+        else:
+            self.pitch_names = f"{self.pitch_names}_{pitch_name}"
+            # See search_utils.get_relative_pitch_names
+            relative_pitch = (ord(pitch_name) - self._first_pitch_ord) % 7
+            self.pitch_names_transposed = (
+                f"{self.pitch_names_transposed}_{relative_pitch}"
+            )
+            # The contour and intervals of a pitch are those between
+            # it and the following pitch, so they are only added once
+            # the following pitch is part of the ngram (the
+            # number of intervals/contours = number of pitches - 1).
+            # The contour and intervals are None if there is no interval
+            # between the pitches, so we can safely do this single check.
+            contour = tokens.contours[last_idx]
+            if contour is not None:
+                self.contour = _append_token(self.contour, contour)
+                self.semitone_intervals = _append_token(
+                    self.semitone_intervals,
+                    tokens.semitone_intervals[last_idx],  # type: ignore[arg-type]
+                )
+                self.intervals = _append_token(
+                    self.intervals, tokens.intervals[last_idx]  # type: ignore[arg-type]
+                )
+        neume_name = tokens.neume_names[idx]
+        if neume_name is not None:
+            self.neume_names = _append_token(self.neume_names, neume_name)
+            self.num_neumes += 1
+        self._last_idx = idx
+
+    def create_document(
+        self, location: List[Zone], include_neume_names: bool, doc_id: str
+    ) -> NgramDocument:
+        """
+        Create an NgramDocument from the current state of the ngram.
+
+        :param location: The combined bounding boxes of the ngram (one per system).
+        :param include_neume_names: Whether to include the names of the
+            neumes in the ngram (only valid if the ngram contains complete neumes).
+        :param doc_id: The ID of the document (see get_ngram_document_id).
+        :return: An NgramDocument containing the information in the ngram.
+        """
+        doc: NgramDocument = {
+            "location_json": stringify_bounding_boxes(location),
+            "pitch_names": self.pitch_names,
+            "pitch_names_transposed": self.pitch_names_transposed,
+            "contour": self.contour,
+            "semitone_intervals": self.semitone_intervals,
+            "intervals": self.intervals,
+            "ngram_start": self.start,
+            "id": doc_id,
+            "type": "omr_ngram",
+        }
+        if include_neume_names:
+            doc["neume_names"] = self.neume_names
+        return doc
+
+
+def get_ngram_document_id(
+    manuscript_id: Optional[str],
+    folio: Optional[str],
+    start: int,
+    n: int,
+    kind: NgramKind,
+) -> str:
+    """
+    Derive the ID of an ngram document from the position of the ngram,
+    so that indexing the same MEI file again produces documents with the
+    same IDs (which then replace the existing documents in Solr).
+
+    :param manuscript_id: The ID of the manuscript of the ngram
+    :param folio: The folio number of the ngram
+    :param start: The index of the first pitch of the ngram in the folio
+    :param n: The number of pitches ("pitch" ngrams) or neumes ("neume" ngrams)
+        in the ngram
+    :param kind: The kind of ngram: "pitch" for ngrams of n pitches, "neume"
+        for ngrams of n complete neumes that are longer than max_ngram pitches
+    :return: A UUID (as a string) derived from the arguments
+    """
+    return str(
+        uuid.uuid5(
+            OMR_NGRAM_ID_NAMESPACE, f"{manuscript_id}/{folio}/{start}/{n}/{kind}"
+        )
+    )
+
+
+def get_stream_document_id(manuscript_id: Optional[str], folio: Optional[str]) -> str:
+    """
+    Derive the ID of the stream document of a folio (see
+    MEITokenizer.create_stream_document), so that indexing the same MEI
+    file again replaces the existing document in Solr.
+
+    :param manuscript_id: The ID of the manuscript of the folio
+    :param folio: The folio number
+    :return: A UUID (as a string) derived from the arguments
+    """
+    return str(uuid.uuid5(OMR_NGRAM_ID_NAMESPACE, f"{manuscript_id}/{folio}/stream"))
+
+
+def compact_ngram_documents(
+    ngram_docs: Iterable[NgramDocument],
+) -> List[CompactNgramDocument]:
+    """
+    Convert ngram documents into a compact form (see CompactNgramDocument),
+    e.g. for sending them between processes.
+
+    :param ngram_docs: The ngram documents to convert
+    :return: A list of compact ngram documents
+    """
+    return [
+        tuple(doc.get(field) for field in COMPACT_NGRAM_DOCUMENT_FIELDS)  # type: ignore[misc]
+        for doc in ngram_docs
+    ]
+
+
+def expand_ngram_documents(
+    compact_docs: Iterable[CompactNgramDocument],
+) -> Iterator[NgramDocument]:
+    """
+    Convert compact ngram documents (see compact_ngram_documents) back
+    into ngram documents.
+
+    :param compact_docs: The compact ngram documents to convert
+    :return: An iterator over ngram documents
+    """
+    for compact_doc in compact_docs:
+        doc = {
+            field: value
+            for field, value in zip(COMPACT_NGRAM_DOCUMENT_FIELDS, compact_doc)
+            if value is not None
+        }
+        doc["type"] = "omr_ngram"
+        yield doc  # type: ignore[misc]
+
+
+def tokenize_mei_file(
+    mei_file: str,
+    min_ngram: int,
+    max_ngram: int,
+    manuscript_id: Optional[str] = None,
+    folio: Optional[str] = None,
+) -> Tuple[List[CompactNgramDocument], float]:
+    """
+    Create the ngram documents of an MEI file in compact form. This function
+    is intended to be run in a worker process (e.g. by index_manuscript_mei),
+    so its arguments and results are small and picklable.
+
+    :param mei_file: The path to the MEI file
+    :param min_ngram: The minimum length of n-grams to generate
+    :param max_ngram: The maximum length of n-grams to generate
+    :param manuscript_id: The manuscript that the MEI file belongs to
+    :param folio: The folio that the MEI file belongs to
+    :return: A tuple of the compact ngram documents of the file and the time
+        (in seconds) taken to parse and tokenize it
+    """
+    start_time = time.perf_counter()
+    tokenizer = MEITokenizer(
+        mei_file,
+        min_ngram=min_ngram,
+        max_ngram=max_ngram,
+        streaming=True,
+        manuscript_id=manuscript_id,
+        folio=folio,
+    )
+    compact_docs = compact_ngram_documents(tokenizer.iter_ngram_documents())
+    return compact_docs, time.perf_counter() - start_time
+
+
+def tokenize_mei_file_stream(
+    mei_file: str,
+    manuscript_id: Optional[str] = None,
+    folio: Optional[str] = None,
+) -> Tuple[List[StreamDocument], float]:
+    """
+    Create the stream document of an MEI file (see
+    MEITokenizer.create_stream_document). Like tokenize_mei_file, this
+    function is intended to be run in a worker process.
+
+    :param mei_file: The path to the MEI file
+    :param manuscript_id: The manuscript that the MEI file belongs to
+    :param folio: The folio that the MEI file belongs to
+    :return: A tuple of a list containing the stream document of the file
+        and the time (in seconds) taken to parse and tokenize it
+    """
+    start_time = time.perf_counter()
+    tokenizer = MEITokenizer(
+        mei_file,
+        min_ngram=1,
+        max_ngram=1,
+        streaming=True,
+        manuscript_id=manuscript_id,
+        folio=folio,
+    )
+    stream_docs = [tokenizer.create_stream_document()]
+    return stream_docs, time.perf_counter() - start_time
+
+
+def _join_stream(stream_tokens: List[Optional[str]]) -> str:
+    """
+    Join the tokens of a stream with spaces, replacing missing tokens
+    with MISSING_INTERVAL_TOKEN.
+    """
+    return " ".join(
+        MISSING_INTERVAL_TOKEN if token is None else token for token in stream_tokens
+    )
+
+
+def _append_token(field: str, token: str) -> str:
+    """
+    Append a token to an underscore-separated string field.
+    """
+    return f"{field}_{token}" if field else token
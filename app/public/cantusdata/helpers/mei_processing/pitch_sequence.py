@@ -0,0 +1,347 @@
+"""
+Defines a class, PitchSequence, that stores the pitches (neume components)
+of an MEI file as parallel NumPy arrays rather than as a list of
+NeumeComponent dictionaries.
+
+Also defines vectorized versions of the interval and contour functions
+in mei_parser, which compute their values for a whole sequence of pitches
+at once:
+    - get_semitone_intervals: Computes the intervals (in semitones)
+        between consecutive pitches.
+    - get_contour_codes: Computes the contours of a sequence of intervals.
+    - get_melodic_intervals: Computes the sizes (in steps) of a sequence
+        of intervals.
+    - get_neume_name_codes: Determines the neume names of the neumes
+        in a sequence of pitches.
+"""
+
+from typing import List, NamedTuple, Optional
+
+import numpy as np
+import numpy.typing as npt
+
+from cantusdata.helpers.neume_helpers import NEUME_GROUPS, NEUME_NAMES, NeumeName
+from .mei_parser import PITCH_CLASS, INTERVAL_TO_STEP_MAP
+from .mei_parsing_types import Syllable, ContourType
+
+# Mapping from integer pitch class to pitch name
+PITCH_NAMES = {pitch_class: pname for pname, pitch_class in PITCH_CLASS.items()}
+
+# Contour codes, chosen so that the code of an interval is its sign
+CONTOUR_CODES = {"d": -1, "r": 0, "u": 1}
+CONTOUR_NAMES: List[ContourType] = ["r", "u", "d"]  # indexed by contour code
+
+# Number of steps in an interval, indexed by the interval's size in
+# semitones (mod 12). The 6-semitone interval is handled separately
+# (see get_melodic_interval).
+_STEPS_BY_SEMITONES = np.array(
+    [INTERVAL_TO_STEP_MAP.get(semitones, 0) for semitones in range(12)],
+    dtype=np.int16,
+)
+
+# Neume names are looked up from the contours within the neume. The
+# contours of a neume with k intervals are encoded as a base-3 number
+# (with digits contour code + 1) offset by the number of encodings of
+# neumes with fewer intervals: (3^k - 1) / 2. Neumes with more intervals
+# than the longest contour in NEUME_GROUPS are compound neumes.
+_MAX_NEUME_GROUP_INTERVALS = max(len(contour) for contour in NEUME_GROUPS)
+_COMPOUND_CODE = NEUME_NAMES.index("compound")
+
+
+def _encode_neume_contour(contour: str) -> int:
+    code = (3 ** len(contour) - 1) // 2
+    for idx, contour_char in enumerate(contour):
+        code += (CONTOUR_CODES[contour_char] + 1) * 3**idx
+    return code
+
+
+_NEUME_NAME_CODES_BY_CONTOUR = np.full(
+    (3 ** (_MAX_NEUME_GROUP_INTERVALS + 1) - 1) // 2, _COMPOUND_CODE, dtype=np.int8
+)
+for _contour, _neume_name in NEUME_GROUPS.items():
+    _NEUME_NAME_CODES_BY_CONTOUR[_encode_neume_contour(_contour)] = NEUME_NAMES.index(
+        _neume_name
+    )
+
+
+def get_semitone_intervals(
+    pitch_classes: npt.NDArray[np.int8],
+    octaves: npt.NDArray[np.int8],
+    has_interval: npt.NDArray[np.bool_],
+) -> npt.NDArray[np.int16]:
+    """
+    Compute the interval (in semitones) between each pitch and the
+    following pitch (see get_semitones_between_neume_components).
+
+    :param pitch_classes: The integer pitch classes of the pitches (C = 0)
+    :param octaves: The octaves of the pitches
+    :param has_interval: Whether there is an interval between each pitch
+        and the following pitch
+    :return: The interval between each pitch and the following pitch, or
+        0 where there is no interval
+    """
+    midi_numbers = pitch_classes.astype(np.int16) + 12 * (octaves.astype(np.int16) + 1)
+    semitone_intervals = np.zeros(len(midi_numbers), dtype=np.int16)
+    semitone_intervals[:-1] = np.diff(midi_numbers)
+    semitone_intervals[~has_interval] = 0
+    return semitone_intervals
+
+
+def get_contour_codes(
+    semitone_intervals: npt.NDArray[np.int16],
+) -> npt.NDArray[np.int8]:
+    """
+    Compute the contour codes (see CONTOUR_CODES) of a sequence of intervals
+    (see get_contour_from_interval).
+
+    :param semitone_intervals: The sizes of the intervals in semitones
+    :return: The contour code of each interval
+    """
+    return np.sign(semitone_intervals).astype(np.int8)
+
+
+def get_melodic_intervals(
+    semitone_intervals: npt.NDArray[np.int16],
+    pitch_classes: npt.NDArray[np.int8],
+) -> npt.NDArray[np.int16]:
+    """
+    Compute the sizes of a sequence of melodic intervals in steps (see
+    get_melodic_interval).
+
+    :param semitone_intervals: The sizes of the intervals in semitones
+    :param pitch_classes: The integer pitch classes of the starting
+        pitches of the intervals
+    :return: The size of each interval in steps, positive for ascending
+        intervals and negative for descending intervals
+    """
+    interval_magnitudes = np.abs(semitone_intervals)
+    interval_directions = np.sign(semitone_intervals)
+    interval_octaves, intervals_mod_12 = np.divmod(interval_magnitudes, 12)
+    steps = _STEPS_BY_SEMITONES[intervals_mod_12]
+    # 6-semitone intervals only occur between b's and f's: b up to f and
+    # f down to b are 5ths, b down to f and f up to b are 4ths.
+    tritone_steps = np.where(
+        (pitch_classes == PITCH_CLASS["b"]) == (interval_directions > 0), 5, 4
+    )
+    steps = np.where(intervals_mod_12 == 6, tritone_steps, steps)
+    melodic_intervals = (steps + 7 * interval_octaves) * interval_directions
+    melodic_intervals[interval_magnitudes == 0] = 1
+    return melodic_intervals.astype(np.int16)
+
+
+def get_neume_name_codes(
+    contour_codes: npt.NDArray[np.int8], neume_starts: npt.NDArray[np.bool_]
+) -> npt.NDArray[np.int8]:
+    """
+    Determine the neume name of each neume in a sequence of pitches
+    from the contours within the neume (see analyze_neume).
+
+    :param contour_codes: The contour code of the interval between each pitch
+        and the following pitch
+    :param neume_starts: Whether each pitch begins a neume. The first pitch
+        must begin a neume.
+    :return: For each pitch that begins a neume, the index in NEUME_NAMES of
+        the name of the neume; -1 for every other pitch.
+    """
+    num_pitches = len(neume_starts)
+    neume_indices = np.cumsum(neume_starts) - 1
+    neume_start_indices = np.flatnonzero(neume_starts)
+    # The intervals within a neume are those between each of its pitches
+    # and the following pitch, except its last pitch.
+    within_neume = np.zeros(num_pitches, dtype=np.bool_)
+    within_neume[:-1] = ~neume_starts[1:]
+    positions = np.arange(num_pitches) - neume_start_indices[neume_indices]
+    digits = (contour_codes.astype(np.int64) + 1) * 3 ** np.minimum(
+        positions, _MAX_NEUME_GROUP_INTERVALS
+    )
+    num_neumes = len(neume_start_indices)
+    num_intervals = np.bincount(
+        neume_indices[within_neume], minlength=num_neumes
+    ).astype(np.int64)
+    contour_keys = np.bincount(
+        neume_indices[within_neume], weights=digits[within_neume], minlength=num_neumes
+    ).astype(np.int64)
+    lookup_keys = (
+        3 ** np.minimum(num_intervals, _MAX_NEUME_GROUP_INTERVALS) - 1
+    ) // 2 + contour_keys
+    neume_codes = np.full(num_neumes, _COMPOUND_CODE, dtype=np.int8)
+    in_table = num_intervals <= _MAX_NEUME_GROUP_INTERVALS
+    neume_codes[in_table] = _NEUME_NAME_CODES_BY_CONTOUR[lookup_keys[in_table]]
+    neume_name_codes = np.full(num_pitches, -1, dtype=np.int8)
+    neume_name_codes[neume_start_indices] = neume_codes
+    return neume_name_codes
+
+
+class PitchTokens(NamedTuple):
+    """
+    The tokens used to build ngram documents from a PitchSequence, as lists
+    of strings with one entry per pitch (see PitchSequence.tokens).
+
+    pitch_names: The pitch name of each pitch.
+    contours: The contour between each pitch and the following pitch.
+    semitone_intervals: The interval (in semitones) between each pitch and
+        the following pitch.
+    intervals: The interval (in steps) between each pitch and the
+        following pitch.
+    neume_names: The name of the neume beginning at each pitch.
+
+    Entries of contours, semitone_intervals and intervals are None where there
+    is no following pitch (or no interval to it); entries of neume_names are
+    None where no neume begins at the pitch.
+    """
+
+    pitch_names: List[str]
+    contours: List[Optional[str]]
+    semitone_intervals: List[Optional[str]]
+    intervals: List[Optional[str]]
+    neume_names: List[Optional[NeumeName]]
+
+
+class PitchSequence:
+    """
+    The pitches (neume components) of an MEI file, stored as parallel NumPy
+    arrays with one entry per pitch, in order:
+        - pitch_class: The integer pitch class (C = 0, see PITCH_CLASS)
+        - octave: The octave
+        - system: The system number that the pitch is on
+        - neume_start: Whether the pitch begins a neume
+        - has_interval: Whether there is an interval between the pitch and the
+            following pitch. This is False for the last pitch, and for the
+            last pitch of a neume when the first neume component of the
+            following neume could not be parsed.
+        - semitone_interval: The interval in semitones between the pitch and
+            the following pitch (0 if has_interval is False)
+        - interval: The interval in steps between the pitch and the following
+            pitch (0 if has_interval is False)
+        - contour: The contour code (see CONTOUR_CODES) of the interval
+            between the pitch and the following pitch (0 if has_interval
+            is False)
+        - neume_name: The index in NEUME_NAMES of the name of the neume that
+            begins at the pitch (-1 if neume_start is False)
+        - ulx, uly, lrx, lry: The coordinates of the pitch's bounding box
+
+    Intervals, contours and neume names are computed from the other
+    arrays for the whole sequence at once.
+
+    Initializes with the pitch classes, octaves, systems, neume starts,
+    interval flags and bounding box coordinates of the pitches. An
+    MEITokenizer reads these directly from the neume components of an MEI
+    file (see MEITokenizer.parse_pitch_sequence); a PitchSequence can also
+    be built from the syllables parsed by an MEIParser:
+        sequence = PitchSequence.from_syllables(parser.syllables)
+    """
+
+    def __init__(
+        self,
+        pitch_classes: npt.ArrayLike,
+        octaves: npt.ArrayLike,
+        systems: npt.ArrayLike,
+        neume_starts: npt.ArrayLike,
+        has_intervals: npt.ArrayLike,
+        coordinates: npt.ArrayLike,
+    ) -> None:
+        self.pitch_class = np.asarray(pitch_classes, dtype=np.int8)
+        self.octave = np.asarray(octaves, dtype=np.int8)
+        self.system = np.asarray(systems, dtype=np.int32)
+        self.neume_start = np.asarray(neume_starts, dtype=np.bool_)
+        self.has_interval = np.asarray(has_intervals, dtype=np.bool_)
+        box_coordinates = np.asarray(coordinates, dtype=np.int32).reshape(-1, 4)
+        self.ulx = box_coordinates[:, 0]
+        self.uly = box_coordinates[:, 1]
+        self.lrx = box_coordinates[:, 2]
+        self.lry = box_coordinates[:, 3]
+        if len(self.pitch_class) > 0 and not self.neume_start[0]:
+            raise ValueError("The first pitch of a sequence must begin a neume.")
+        self.semitone_interval = get_semitone_intervals(
+            self.pitch_class, self.octave, self.has_interval
+        )
+        self.contour = get_contour_codes(self.semitone_interval)
+        self.interval = get_melodic_intervals(self.semitone_interval, self.pitch_class)
+        self.interval[~self.has_interval] = 0
+        self.neume_name = get_neume_name_codes(self.contour, self.neume_start)
+
+    @classmethod
+    def from_syllables(cls, syllables: List[Syllable]) -> "PitchSequence":
+        """
+        Build a PitchSequence from the syllables parsed by an MEIParser.
+        Only the pitch, octave, bounding box and system of each neume
+        component, the boundaries of neumes, and whether an interval follows
+        each neume component are read from the syllables.
+
+        :param syllables: A list of syllables (see MEIParser.syllables)
+        :return: A PitchSequence containing the neume components of the syllables
+        """
+        pitch_classes: List[int] = []
+        octaves: List[int] = []
+        systems: List[int] = []
+        neume_starts: List[bool] = []
+        has_intervals: List[bool] = []
+        coordinates: List[int] = []
+        for syllable in syllables:
+            for neume in syllable["neumes"]:
+                for nc_idx, nc in enumerate(neume["neume_components"]):
+                    pitch_classes.append(PITCH_CLASS[nc["pname"]])
+                    octaves.append(nc["octave"])
+                    systems.append(nc["system"])
+                    neume_starts.append(nc_idx == 0)
+                    has_intervals.append(nc["contour"] is not None)
+                    coordinates.extend(nc["bounding_box"]["coordinates"])
+        return cls(
+            pitch_classes, octaves, systems, neume_starts, has_intervals, coordinates
+        )
+
+    def __len__(self) -> int:
+        return len(self.pitch_class)
+
+    @property
+    def coordinates(self) -> npt.NDArray[np.int32]:
+        """
+        The bounding box coordinates of the pitches as an array of shape
+        (number of pitches, 4), in the order of CoordinatesType.
+        """
+        return np.stack([self.ulx, self.uly, self.lrx, self.lry], axis=1)
+
+    def get_next_neume_start_indices(self) -> npt.NDArray[np.intp]:
+        """
+        For each pitch, find the index of the next pitch (after it) that
+        begins a neume.
+
+        :return: An array whose value at index i is the index of the first
+            pitch after i that begins a neume, or the total number of pitches
+            if no later pitch begins a neume.
+        """
+        neume_start_indices = np.append(np.flatnonzero(self.neume_start), len(self))
+        return neume_start_indices[
+            np.searchsorted(neume_start_indices, np.arange(len(self)), side="right")
+        ]
+
+    def tokens(self) -> PitchTokens:
+        """
+        Convert the sequence into lists of string tokens, one per pitch,
+        for building ngram documents.
+
+        :return: The tokens of the sequence (see PitchTokens)
+        """
+        has_interval = self.has_interval.tolist()
+        contours = [CONTOUR_NAMES[code] for code in self.contour.tolist()]
+        return PitchTokens(
+            pitch_names=[PITCH_NAMES[pc] for pc in self.pitch_class.tolist()],
+            contours=[
+                contour if has_int else None
+                for contour, has_int in zip(contours, has_interval)
+            ],
+            semitone_intervals=[
+                str(semitones) if has_int else None
+                for semitones, has_int in zip(
+                    self.semitone_interval.tolist(), has_interval
+                )
+            ],
+            intervals=[
+                str(steps) if has_int else None
+                for steps, has_int in zip(self.interval.tolist(), has_interval)
+            ],
+            neume_names=[
+                NEUME_NAMES[code] if code >= 0 else None
+                for code in self.neume_name.tolist()
+            ],
+        )
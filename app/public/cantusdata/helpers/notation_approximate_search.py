@@ -0,0 +1,368 @@
+"""
+Defines the approximate notation search, which finds the passages of a
+manuscript whose pitch names, contours or intervals are within a maximum
+edit distance of a query (e.g. a query with one mis-entered pitch).
+
+Candidates are generated from the omr_ngram documents of the manuscript
+by q-gram filtering: the query is split into max_distance + 1 disjoint
+pieces, so that any passage within max_distance edits (substitutions,
+insertions or deletions of terms) of the query contains at least one of
+the pieces unchanged. Each n-gram matching a piece locates a window of
+the folio in which a match could start. The sequences of the candidate
+windows are rebuilt from the 2-grams of the folio and verified together:
+the edit distance between the query and the best matching passage of
+each window is computed for all windows at once with numpy (see align).
+"""
+
+from math import ceil
+import time
+from typing import Collection, NamedTuple
+
+import numpy as np
+import numpy.typing as npt
+
+from cantusdata.helpers.notation_query_planner import (
+    NgramSource,
+    PieceQuery,
+    SolrQueryResultItem,
+    _split_tokens,
+    get_max_piece_length,
+    get_piece_query,
+    merge_boxes,
+)
+from cantusdata.helpers.search_utils import translate_interval_query_direction
+
+# The types of queries that can be run approximately
+APPROXIMATE_Q_TYPES = ("pitch_names", "contour", "intervals")
+
+# The largest max_distance accepted by ApproximateSearch
+MAX_DISTANCE = 3
+
+# The minimum number of terms of each piece of a query. Shorter pieces
+# match too many n-grams to filter candidates usefully.
+MIN_PIECE_LENGTH = 2
+
+# The default time (in seconds) after which an ApproximateSearch stops
+# verifying candidates and returns the matches found so far
+DEFAULT_TIME_BUDGET = 2.0
+
+# The maximum number of 2-gram positions fetched per request, which keeps
+# each Solr query below the default maximum number of boolean clauses
+PAIR_BATCH_SIZE = 256
+
+# The code padding the windows beyond their last term, which matches
+# no term of a query
+MISSING_TERM = -1
+
+
+class ApproximateMatch(NamedTuple):
+    """
+    A passage of a folio within the maximum edit distance of a query.
+
+    folio: The folio of the passage
+    start: The index of the first pitch of the passage in the folio
+    end: The index following the last pitch of the passage
+    distance: The edit distance between the query and the passage
+    """
+
+    folio: str
+    start: int
+    end: int
+    distance: int
+
+
+def split_disjoint(
+    q_terms: list[str], q_type: str, max_distance: int, max_ngram: int
+) -> list[tuple[int, list[str]]]:
+    """
+    Splits the terms of a query into at least max_distance + 1 disjoint
+    pieces of at most get_max_piece_length terms, as evenly as possible.
+
+    :param q_terms: The (normalized, validated and translated) terms of the query
+    :param q_type: The type of the query
+    :param max_distance: The maximum edit distance of the matches
+    :param max_ngram: The maximum length of the indexed n-grams
+    :return: The offset of each piece in the query, and its terms
+    """
+    num_pieces = max(
+        max_distance + 1, ceil(len(q_terms) / get_max_piece_length(q_type, max_ngram))
+    )
+    if len(q_terms) < num_pieces * MIN_PIECE_LENGTH:
+        raise ValueError(
+            f"Queries with a maximum distance of {max_distance} must have "
+            f"at least {num_pieces * MIN_PIECE_LENGTH} terms."
+        )
+    pieces: list[tuple[int, list[str]]] = []
+    piece_start = 0
+    for piece_idx in range(num_pieces):
+        piece_length = len(q_terms) // num_pieces + (
+            1 if piece_idx < len(q_terms) % num_pieces else 0
+        )
+        pieces.append((piece_start, q_terms[piece_start : piece_start + piece_length]))
+        piece_start += piece_length
+    return pieces
+
+
+def align(
+    q_codes: npt.NDArray[np.int64],
+    windows: npt.NDArray[np.int64],
+    window_lengths: npt.NDArray[np.int64],
+) -> tuple[npt.NDArray[np.int64], npt.NDArray[np.int64], npt.NDArray[np.int64]]:
+    """
+    Finds the passage of each window with the smallest edit distance to
+    the query, computing the edit distance matrices of all windows at once.
+
+    The distance matrices are computed one query term at a time. The cost
+    of each cell is stored with the start of its passage in a single integer
+    (cost * scale + start), so that the minimum over the cells also finds
+    the start of the passage. The insertions of window terms, which make
+    each cell depend on the previous cell of the same row, are resolved
+    with a cumulative minimum along the row.
+
+    :param q_codes: The terms of the query, as integer codes
+    :param windows: The terms of the windows, as integer codes (one window per
+        row, padded with MISSING_TERM)
+    :param window_lengths: The number of terms of each window
+    :return: The edit distance, start and end of the passage of each window,
+        preferring passages as long as the query among those at the same
+        distance
+    """
+    num_windows, width = windows.shape
+    scale = width + 1
+    cols = np.arange(width + 1, dtype=np.int64)
+    costs = np.zeros((num_windows, width + 1), dtype=np.int64)
+    starts = np.broadcast_to(cols, (num_windows, width + 1)).copy()
+    keys = np.empty((num_windows, width + 1), dtype=np.int64)
+    for q_idx, q_code in enumerate(q_codes, start=1):
+        mismatches = (windows != q_code).astype(np.int64)
+        keys[:, 0] = q_idx * scale
+        np.minimum(
+            (costs[:, :-1] + mismatches) * scale + starts[:, :-1],
+            (costs[:, 1:] + 1) * scale + starts[:, 1:],
+            out=keys[:, 1:],
+        )
+        keys = np.minimum.accumulate(keys - cols * scale, axis=1) + cols * scale
+        costs, starts = np.divmod(keys, scale)
+    lengths = cols - starts
+    end_keys = costs * (2 * scale) + np.abs(lengths - len(q_codes))
+    end_keys[cols > window_lengths[:, np.newaxis]] = np.iinfo(np.int64).max
+    end_keys[:, 0] = np.iinfo(np.int64).max
+    ends = np.argmin(end_keys, axis=1)
+    rows = np.arange(num_windows)
+    return costs[rows, ends], starts[rows, ends], ends
+
+
+class ApproximateSearch:
+    """
+    Finds the passages of a manuscript within a maximum edit distance of
+    a query (see module docstring).
+
+    Initializes with the source of the manuscript's n-gram documents, the
+    normalized and validated terms of the query, the type of the query,
+    the maximum length of the manuscript's indexed n-grams and the
+    maximum edit distance of the matches.
+    """
+
+    def __init__(
+        self,
+        source: NgramSource,
+        q_terms: list[str],
+        q_type: str,
+        max_ngram: int,
+        max_distance: int,
+    ) -> None:
+        if q_type not in APPROXIMATE_Q_TYPES:
+            raise ValueError(f"Approximate search does not support {q_type} queries.")
+        if not 0 <= max_distance <= MAX_DISTANCE:
+            raise ValueError(f"The maximum distance must be at most {MAX_DISTANCE}.")
+        self.source = source
+        self.q_type = q_type
+        self.max_distance = max_distance
+        if q_type == "intervals":
+            q_terms = translate_interval_query_direction(q_terms)
+        self.q_terms = q_terms
+        self.pieces: list[tuple[int, PieceQuery]] = [
+            (offset, get_piece_query(piece, q_type))
+            for offset, piece in split_disjoint(
+                q_terms, q_type, max_distance, max_ngram
+            )
+        ]
+        # A contour or interval term is between two pitches, so a
+        # passage of n terms spans n + 1 pitches
+        self.pitch_offset = 0 if q_type == "pitch_names" else 1
+        self._pairs: dict[tuple[str, int], SolrQueryResultItem] = {}
+
+    def find_matches(
+        self, time_budget: float = DEFAULT_TIME_BUDGET
+    ) -> tuple[list[ApproximateMatch], bool]:
+        """
+        Finds the matches of the query, verifying the candidates of the
+        rarest pieces first.
+
+        :param time_budget: The time (in seconds) after which no more
+            candidates are fetched or verified
+        :return: The matches, sorted by distance, folio and position (of
+            overlapping matches, only the closest is kept), and whether all
+            the candidates were verified within the time budget
+        """
+        deadline = time.monotonic() + time_budget
+        counts = self.source.count([piece_query for _, piece_query in self.pieces])
+        windows: set[tuple[str, int]] = set()
+        matches: list[ApproximateMatch] = []
+        for piece_idx in sorted(range(len(self.pieces)), key=counts.__getitem__):
+            if counts[piece_idx] == 0:
+                continue
+            if time.monotonic() > deadline:
+                return self._select_matches(matches), False
+            offset, piece_query = self.pieces[piece_idx]
+            new_windows = {
+                (doc["folio"], max(0, doc["ngram_start"] - offset - self.max_distance))
+                for doc in self.source.fetch(piece_query, None, counts[piece_idx])
+            } - windows
+            windows |= new_windows
+            sorted_windows = sorted(new_windows)
+            for batch_start in range(0, len(sorted_windows), PAIR_BATCH_SIZE):
+                if time.monotonic() > deadline:
+                    return self._select_matches(matches), False
+                batch = sorted_windows[batch_start : batch_start + PAIR_BATCH_SIZE]
+                self._fetch_pairs(batch)
+                matches.extend(self._verify(batch))
+        return self._select_matches(matches), True
+
+    def create_result_items(
+        self, matches: Collection[ApproximateMatch]
+    ) -> list[SolrQueryResultItem]:
+        """
+        Stitches the 2-grams of each match into a result item (in the format
+        of an omr_ngram document) for the whole match.
+        """
+        result_items: list[SolrQueryResultItem] = []
+        for match in matches:
+            pairs = [
+                self._pairs[(match.folio, position)]
+                for position in range(match.start, match.end - 1)
+            ]
+            result_items.append(
+                {
+                    "manuscript_id": pairs[0]["manuscript_id"],
+                    "folio": match.folio,
+                    "image_uri": pairs[0]["image_uri"],
+                    "pitch_names": "_".join(
+                        [_split_tokens(pair["pitch_names"])[0] for pair in pairs]
+                        + [_split_tokens(pairs[-1]["pitch_names"])[-1]]
+                    ),
+                    "contour": "_".join(
+                        pair["contour"] for pair in pairs if pair["contour"]
+                    ),
+                    "semitone_intervals": "_".join(
+                        pair["semitone_intervals"]
+                        for pair in pairs
+                        if pair["semitone_intervals"]
+                    ),
+                    "intervals": "_".join(
+                        pair["intervals"] for pair in pairs if pair["intervals"]
+                    ),
+                    "neume_names": "",
+                    "location_json": merge_boxes(
+                        box for pair in pairs for box in pair["location_json"]
+                    ),
+                    "ngram_start": match.start,
+                }
+            )
+        return result_items
+
+    @property
+    def window_width(self) -> int:
+        """
+        The number of terms of a candidate window: a match can start up to
+        max_distance terms before or after the position located by a piece,
+        and can be up to max_distance terms longer than the query.
+        """
+        return len(self.q_terms) + 3 * self.max_distance
+
+    def _fetch_pairs(self, windows: list[tuple[str, int]]) -> None:
+        """
+        Fetches the 2-grams of the windows that have not been fetched yet.
+        """
+        positions = {
+            (folio, position)
+            for folio, window_start in windows
+            for position in range(window_start, window_start + self.window_width)
+        }
+        sorted_positions = sorted(positions - self._pairs.keys())
+        for batch_start in range(0, len(sorted_positions), PAIR_BATCH_SIZE):
+            batch = sorted_positions[batch_start : batch_start + PAIR_BATCH_SIZE]
+            for pair in self.source.fetch_pitch_pairs(batch):
+                self._pairs[(pair["folio"], pair["ngram_start"])] = pair
+
+    def _get_window_terms(self, folio: str, window_start: int) -> list[str]:
+        """
+        Rebuilds the terms of a window from the fetched 2-grams, up to the
+        first missing 2-gram (e.g. at the end of the folio).
+        """
+        pairs: list[SolrQueryResultItem] = []
+        for position in range(window_start, window_start + self.window_width):
+            pair = self._pairs.get((folio, position))
+            if pair is None:
+                break
+            pairs.append(pair)
+        if self.q_type == "contour":
+            return [pair["contour"] for pair in pairs]
+        if self.q_type == "intervals":
+            return [pair["intervals"] for pair in pairs]
+        pitch_names = [_split_tokens(pair["pitch_names"])[0] for pair in pairs]
+        if pairs:
+            pitch_names.append(_split_tokens(pairs[-1]["pitch_names"])[-1])
+        return pitch_names[: self.window_width]
+
+    def _verify(self, windows: list[tuple[str, int]]) -> list[ApproximateMatch]:
+        """
+        Finds the passage of each window closest to the query, and returns
+        those within max_distance of it.
+        """
+        codes = {term: code for code, term in enumerate(sorted(set(self.q_terms)))}
+        q_codes = np.array([codes[term] for term in self.q_terms], dtype=np.int64)
+        window_codes = np.full(
+            (len(windows), self.window_width), MISSING_TERM, dtype=np.int64
+        )
+        window_lengths = np.zeros(len(windows), dtype=np.int64)
+        for window_idx, (folio, window_start) in enumerate(windows):
+            # Terms that are not in the query (including the empty contours
+            # and intervals of pitches without an interval) match no term
+            terms = self._get_window_terms(folio, window_start)
+            window_codes[window_idx, : len(terms)] = [
+                codes.get(term, len(codes)) for term in terms
+            ]
+            window_lengths[window_idx] = len(terms)
+        distances, starts, ends = align(q_codes, window_codes, window_lengths)
+        matches: list[ApproximateMatch] = []
+        for (folio, window_start), distance, start, end in zip(
+            windows, distances.tolist(), starts.tolist(), ends.tolist()
+        ):
+            # Passages need at least two pitches for their 2-grams to exist
+            if distance <= self.max_distance and end - start + self.pitch_offset > 1:
+                matches.append(
+                    ApproximateMatch(
+                        folio,
+                        window_start + start,
+                        window_start + end + self.pitch_offset,
+                        distance,
+                    )
+                )
+        return matches
+
+    def _select_matches(
+        self, matches: list[ApproximateMatch]
+    ) -> list[ApproximateMatch]:
+        """
+        Sorts matches by distance, folio and position, dropping the matches
+        that overlap a closer (or earlier) match.
+        """
+        selected: list[ApproximateMatch] = []
+        selected_pitches: set[tuple[str, int]] = set()
+        for match in sorted(set(matches), key=lambda m: (m.distance, m.folio, m.start)):
+            pitches = {(match.folio, idx) for idx in range(match.start, match.end)}
+            if pitches.isdisjoint(selected_pitches):
+                selected.append(match)
+                selected_pitches |= pitches
+        return selected
@@ -0,0 +1,362 @@
+"""
+Defines a query planner for notation searches whose queries are longer
+than the n-grams indexed in Solr.
+
+The omr_ngram documents of a manuscript (see MEITokenizer) contain n-grams
+of at most max_ngram pitches (or of at most max_ngram neumes), so a longer
+query cannot match any single document. Instead, LongQueryPlanner splits the
+query into pieces that each fit in an indexed n-gram. It finds the documents
+matching the rarest piece, then extends each of these matches, one
+neighbouring piece at a time, with the document matching that piece at the
+adjacent position of the same folio (using the ngram_start field of the
+documents). The documents of each complete chain are stitched into a single
+result.
+"""
+
+from math import ceil
+from typing import (
+    Collection,
+    Iterable,
+    NamedTuple,
+    NotRequired,
+    Optional,
+    Protocol,
+    TypedDict,
+)
+
+from cantusdata.helpers.search_utils import (
+    get_relative_pitch_names,
+    get_transpositions,
+    translate_interval_query_direction,
+)
+
+# The default maximum length of indexed n-grams (see index_manuscript_mei)
+DEFAULT_MAX_NGRAM = 5
+
+# The number of pitches shared by the n-grams matching consecutive pieces
+# of a query of each type. Consecutive pieces of pitch names share a pitch,
+# so that the intervals between all the pitches of the query are known. So
+# do consecutive pieces of contours or intervals, since a piece of k
+# intervals matches an n-gram of k + 1 pitches. Neume names cannot be split
+# within a neume, so consecutive pieces of neume names share no pitches.
+PITCH_OVERLAP = {
+    "pitch_names": 1,
+    "pitch_names_transposed": 1,
+    "contour": 1,
+    "intervals": 1,
+    "neume_names": 0,
+}
+
+
+class SolrQueryResultItem(TypedDict):
+    manuscript_id: int
+    folio: str
+    image_uri: str
+    pitch_names: str
+    contour: str
+    semitone_intervals: str
+    neume_names: str
+    intervals: str
+    location_json: list[dict[str, int]]
+    ngram_start: NotRequired[int]
+
+
+class PieceQuery(NamedTuple):
+    """
+    A query for the n-grams matching a piece of a long query.
+
+    field: The field of the omr_ngram documents to match
+    value: The value of the field that matches the piece
+    """
+
+    field: str
+    value: str
+
+    def to_solr(self) -> str:
+        return f"{self.field}:{self.value}"
+
+
+class NgramSource(Protocol):
+    """
+    Fetches the omr_ngram documents of a manuscript (e.g. from Solr).
+    """
+
+    def count(self, piece_queries: list[PieceQuery]) -> list[int]:
+        """
+        Counts the documents matching each of a list of piece queries.
+        """
+
+    def fetch(
+        self, piece_query: PieceQuery, folios: Optional[Collection[str]], rows: int
+    ) -> list[SolrQueryResultItem]:
+        """
+        Fetches at most rows documents matching a piece query, only
+        from the given folios if folios is not None.
+        """
+
+    def fetch_pitch_pairs(
+        self, positions: Collection[tuple[str, int]]
+    ) -> list[SolrQueryResultItem]:
+        """
+        Fetches the n-grams of two pitches starting at the given
+        positions (folio and ngram_start).
+        """
+
+
+def get_max_piece_length(q_type: str, max_ngram: int) -> int:
+    """
+    Returns the maximum number of terms of a query of the given type
+    that match a single indexed n-gram.
+    """
+    if q_type in ("contour", "intervals"):
+        return max_ngram - 1
+    return max_ngram
+
+
+def split_query(q_terms: list[str], q_type: str, max_ngram: int) -> list[list[str]]:
+    """
+    Splits the terms of a query into pieces of at most get_max_piece_length
+    terms, as evenly as possible. Consecutive pieces of pitch names share a
+    term (see PITCH_OVERLAP).
+
+    :param q_terms: The (normalized and validated) terms of the query
+    :param q_type: The type of the query
+    :param max_ngram: The maximum length of the indexed n-grams
+    :return: A list of pieces, each a list of terms
+    """
+    max_length = get_max_piece_length(q_type, max_ngram)
+    if len(q_terms) <= max_length:
+        return [q_terms]
+    term_overlap = 1 if q_type in ("pitch_names", "pitch_names_transposed") else 0
+    if max_length - term_overlap < 1:
+        raise ValueError(f"Cannot split a {q_type} query into {max_ngram}-grams.")
+    num_new_terms = len(q_terms) - term_overlap
+    num_pieces = ceil(num_new_terms / (max_length - term_overlap))
+    pieces: list[list[str]] = []
+    piece_start = 0
+    for piece_idx in range(num_pieces):
+        piece_length = num_new_terms // num_pieces + (
+            1 if piece_idx < num_new_terms % num_pieces else 0
+        )
+        pieces.append(q_terms[piece_start : piece_start + piece_length + term_overlap])
+        piece_start += piece_length
+    return pieces
+
+
+def get_piece_query(
+    piece: list[str], q_type: str, relative_pitch_names: bool = True
+) -> PieceQuery:
+    """
+    Creates the query for the n-grams matching a piece of a query
+    (see SearchNotationView.create_query_string).
+
+    :param piece: The terms of the piece (with the directions of interval
+        terms translated, see translate_interval_query_direction)
+    :param q_type: The type of the query
+    :param relative_pitch_names: Whether the n-grams have a
+        pitch_names_transposed field. N-grams indexed before it was added
+        are matched against each transposition of the pitch names instead.
+    """
+    # Consecutive pieces of a transposed query share a pitch, so the
+    # n-grams matching them in a chain are always in the same transposition.
+    if q_type == "pitch_names_transposed" and relative_pitch_names:
+        return PieceQuery(
+            "pitch_names_transposed", "_".join(get_relative_pitch_names(piece))
+        )
+    if q_type == "pitch_names_transposed":
+        transpositions = " OR ".join(
+            "_".join(transposition) for transposition in get_transpositions(piece)
+        )
+        return PieceQuery("pitch_names", f"({transpositions})")
+    return PieceQuery(q_type, "_".join(piece))
+
+
+def _split_tokens(field_value: str) -> list[str]:
+    return field_value.split("_") if field_value else []
+
+
+class LongQueryPlanner:
+    """
+    Finds the n-grams matching a query that is longer than the indexed
+    n-grams (see module docstring).
+
+    Initializes with the source of the manuscript's n-gram documents, the
+    normalized and validated terms of the query, the type of the query,
+    the maximum length of the manuscript's indexed n-grams and whether
+    they have a pitch_names_transposed field (see get_piece_query).
+    """
+
+    def __init__(
+        self,
+        source: NgramSource,
+        q_terms: list[str],
+        q_type: str,
+        max_ngram: int,
+        relative_pitch_names: bool = True,
+    ) -> None:
+        self.source = source
+        self.q_type = q_type
+        if q_type == "intervals":
+            q_terms = translate_interval_query_direction(q_terms)
+        self.piece_queries = [
+            get_piece_query(piece, q_type, relative_pitch_names)
+            for piece in split_query(q_terms, q_type, max_ngram)
+        ]
+        self.pitch_overlap = PITCH_OVERLAP[q_type]
+
+    def find_chains(self) -> list[list[SolrQueryResultItem]]:
+        """
+        Finds the chains of adjacent documents that match the pieces of
+        the query, in order.
+
+        :return: A list of chains (each a list of documents, one per piece),
+            sorted by folio and position
+        """
+        counts = self.source.count(self.piece_queries)
+        if min(counts) == 0:
+            return []
+        anchor = counts.index(min(counts))
+        chains = [
+            [doc]
+            for doc in self.source.fetch(
+                self.piece_queries[anchor], None, counts[anchor]
+            )
+        ]
+        first_piece = last_piece = anchor
+        last_piece_idx = len(self.piece_queries) - 1
+        while chains and (first_piece > 0 or last_piece < last_piece_idx):
+            # Extend the chains towards the rarer neighbouring piece
+            extend_left = last_piece == last_piece_idx or (
+                first_piece > 0 and counts[first_piece - 1] <= counts[last_piece + 1]
+            )
+            piece_idx = first_piece - 1 if extend_left else last_piece + 1
+            piece_docs = self.source.fetch(
+                self.piece_queries[piece_idx],
+                {chain[0]["folio"] for chain in chains},
+                counts[piece_idx],
+            )
+            if extend_left:
+                docs_by_end = {
+                    (doc["folio"], self._get_next_start(doc)): doc for doc in piece_docs
+                }
+                chains = [
+                    [docs_by_end[key]] + chain
+                    for chain in chains
+                    if (key := (chain[0]["folio"], chain[0]["ngram_start"]))
+                    in docs_by_end
+                ]
+                first_piece = piece_idx
+            else:
+                docs_by_start = {
+                    (doc["folio"], doc["ngram_start"]): doc for doc in piece_docs
+                }
+                chains = [
+                    chain + [docs_by_start[key]]
+                    for chain in chains
+                    if (key := (chain[-1]["folio"], self._get_next_start(chain[-1])))
+                    in docs_by_start
+                ]
+                last_piece = piece_idx
+        chains.sort(key=lambda chain: (chain[0]["folio"], chain[0]["ngram_start"]))
+        return chains
+
+    def stitch_chains(
+        self, chains: list[list[SolrQueryResultItem]]
+    ) -> list[SolrQueryResultItem]:
+        """
+        Stitches each chain of documents into a single document for the
+        whole query, with the bounding boxes of the chain merged.
+        """
+        junction_docs: dict[tuple[str, int], SolrQueryResultItem] = {}
+        if self.pitch_overlap == 0:
+            # The interval between consecutive pieces that share no pitches
+            # is taken from the 2-gram spanning them.
+            junction_positions = {
+                (doc["folio"], doc["ngram_start"] - 1)
+                for chain in chains
+                for doc in chain[1:]
+            }
+            if junction_positions:
+                junction_docs = {
+                    (doc["folio"], doc["ngram_start"]): doc
+                    for doc in self.source.fetch_pitch_pairs(junction_positions)
+                }
+        return [self._stitch_chain(chain, junction_docs) for chain in chains]
+
+    def _stitch_chain(
+        self,
+        chain: list[SolrQueryResultItem],
+        junction_docs: dict[tuple[str, int], SolrQueryResultItem],
+    ) -> SolrQueryResultItem:
+        pitch_names: list[str] = []
+        contour: list[str] = []
+        semitone_intervals: list[str] = []
+        intervals: list[str] = []
+        boxes: list[dict[str, int]] = []
+        for doc_idx, doc in enumerate(chain):
+            doc_pitch_names = _split_tokens(doc["pitch_names"])
+            if doc_idx > 0:
+                doc_pitch_names = doc_pitch_names[self.pitch_overlap :]
+                junction_doc = junction_docs.get((doc["folio"], doc["ngram_start"] - 1))
+                if junction_doc is not None:
+                    contour.extend(_split_tokens(junction_doc["contour"]))
+                    semitone_intervals.extend(
+                        _split_tokens(junction_doc["semitone_intervals"])
+                    )
+                    intervals.extend(_split_tokens(junction_doc["intervals"]))
+            pitch_names.extend(doc_pitch_names)
+            contour.extend(_split_tokens(doc["contour"]))
+            semitone_intervals.extend(_split_tokens(doc["semitone_intervals"]))
+            intervals.extend(_split_tokens(doc["intervals"]))
+            boxes.extend(doc["location_json"])
+        stitched_doc: SolrQueryResultItem = {
+            "manuscript_id": chain[0]["manuscript_id"],
+            "folio": chain[0]["folio"],
+            "image_uri": chain[0]["image_uri"],
+            "pitch_names": "_".join(pitch_names),
+            "contour": "_".join(contour),
+            "semitone_intervals": "_".join(semitone_intervals),
+            "intervals": "_".join(intervals),
+            "neume_names": "",
+            "location_json": merge_boxes(boxes),
+            "ngram_start": chain[0]["ngram_start"],
+        }
+        # Neume names can only be stitched when no pitches are shared
+        if self.pitch_overlap == 0 and all(doc.get("neume_names") for doc in chain):
+            stitched_doc["neume_names"] = "_".join(doc["neume_names"] for doc in chain)
+        return stitched_doc
+
+    def _get_next_start(self, doc: SolrQueryResultItem) -> int:
+        """
+        Returns the position at which an n-gram matching the piece following
+        that of a document starts.
+        """
+        num_pitches = doc["pitch_names"].count("_") + 1
+        return doc["ngram_start"] + num_pitches - self.pitch_overlap
+
+
+def merge_boxes(boxes: Iterable[dict[str, int]]) -> list[dict[str, int]]:
+    """
+    Merges bounding boxes (in the format of the location_json field) whose
+    vertical extents overlap, i.e. the boxes of n-grams on the same system,
+    into a single bounding box.
+
+    :param boxes: The bounding boxes to merge
+    :return: The merged bounding boxes, from top to bottom
+    """
+    merged_boxes: list[dict[str, int]] = []
+    for box in sorted(boxes, key=lambda box: box["uly"]):
+        if merged_boxes:
+            last_box = merged_boxes[-1]
+            if box["uly"] < last_box["uly"] + last_box["height"]:
+                ulx = min(last_box["ulx"], box["ulx"])
+                lrx = max(
+                    last_box["ulx"] + last_box["width"], box["ulx"] + box["width"]
+                )
+                lry = max(
+                    last_box["uly"] + last_box["height"], box["uly"] + box["height"]
+                )
+                last_box.update(ulx=ulx, width=lrx - ulx, height=lry - last_box["uly"])
+                continue
+        merged_boxes.append(dict(box))
+    return merged_boxes
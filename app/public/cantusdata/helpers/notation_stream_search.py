@@ -0,0 +1,194 @@
+"""
+Defines the search of stream documents (see MEITokenizer.create_stream_document),
+an alternative to the search of omr_ngram documents for manuscripts indexed
+with index_manuscript_mei's "stream" index scheme.
+
+A stream document holds all the pitches of a folio as streams of tokens,
+so Solr can find the folios matching a query of any length with a phrase
+query on one of the streams. The positions of the matches in each folio
+are then found by a StreamMatcher, which maps them back to the pitches
+(and bounding boxes) of the folio to create one result item per match,
+in the format of omr_ngram documents.
+"""
+
+import json
+from bisect import bisect_left
+
+from cantusdata.helpers.mei_processing.bounding_box_utils import (
+    BoundingBoxIndex,
+    stringify_bounding_boxes,
+)
+from cantusdata.helpers.mei_processing.mei_parsing_types import StreamDocument
+from cantusdata.helpers.mei_processing.mei_tokenizer import MISSING_INTERVAL_TOKEN
+from cantusdata.helpers.notation_query_planner import SolrQueryResultItem
+from cantusdata.helpers.search_utils import (
+    get_transpositions,
+    translate_interval_query_direction,
+)
+
+# The stream searched by each type of query
+STREAM_FIELDS = {
+    "pitch_names": "pitch_stream",
+    "pitch_names_transposed": "pitch_stream",
+    "contour": "contour_stream",
+    "intervals": "interval_stream",
+    "neume_names": "neume_stream",
+}
+
+# The fields of a stream document needed to find the matches of a query;
+# pitch_boxes_json is only needed to locate the matches that are returned.
+MATCH_FIELDS = [
+    "id",
+    "manuscript_id",
+    "folio",
+    "image_uri",
+    "pitch_stream",
+    "contour_stream",
+    "semitone_interval_stream",
+    "interval_stream",
+    "neume_stream",
+    "neume_starts",
+]
+
+
+def get_stream_phrases(q_terms: list[str], q_type: str) -> list[list[str]]:
+    """
+    Converts the terms of a query into the phrases (sequences of stream
+    tokens) that match it: one for each transposition of a transposed
+    pitch names query, otherwise one.
+
+    :param q_terms: The (normalized and validated) terms of the query
+    :param q_type: The type of the query
+    :return: A list of phrases
+    """
+    if q_type == "pitch_names_transposed":
+        return get_transpositions(q_terms)
+    if q_type == "intervals":
+        return [translate_interval_query_direction(q_terms)]
+    return [q_terms]
+
+
+def get_stream_query(q_terms: list[str], q_type: str) -> str:
+    """
+    Creates the Solr query for the stream documents that match a query.
+    """
+    phrases = " OR ".join(
+        f'"{" ".join(phrase)}"' for phrase in get_stream_phrases(q_terms, q_type)
+    )
+    return f"{STREAM_FIELDS[q_type]}:({phrases})"
+
+
+def get_box_index(pitch_boxes_json: str) -> BoundingBoxIndex:
+    """
+    Creates a BoundingBoxIndex over the pitches of a stream document
+    from its pitch_boxes_json field.
+    """
+    pitch_boxes: list[list[int]] = json.loads(pitch_boxes_json)
+    return BoundingBoxIndex(
+        [pitch_box[:4] for pitch_box in pitch_boxes],
+        [pitch_box[4] for pitch_box in pitch_boxes],
+    )
+
+
+class StreamMatcher:
+    """
+    Finds the matches of queries in a stream document, and creates a result
+    item (in the format of an omr_ngram document) for each match.
+
+    Initializes with the MATCH_FIELDS of the stream document.
+    """
+
+    def __init__(self, doc: StreamDocument) -> None:
+        self.doc = doc
+        self.pitch_names = doc["pitch_stream"].split()
+        self.contours = doc["contour_stream"].split()
+        self.semitone_intervals = doc["semitone_interval_stream"].split()
+        self.intervals = doc["interval_stream"].split()
+        self.neume_names = doc["neume_stream"].split()
+        self.neume_starts = [int(idx) for idx in doc["neume_starts"].split()]
+
+    def find_matches(self, q_terms: list[str], q_type: str) -> list[tuple[int, int]]:
+        """
+        Finds the matches of a query in the document.
+
+        :param q_terms: The (normalized and validated) terms of the query
+        :param q_type: The type of the query
+        :return: The index of the first pitch of each match and the index
+            following its last pitch, in order
+        """
+        phrases = {tuple(phrase) for phrase in get_stream_phrases(q_terms, q_type)}
+        length = len(q_terms)
+        stream = {
+            "pitch_stream": self.pitch_names,
+            "contour_stream": self.contours,
+            "interval_stream": self.intervals,
+            "neume_stream": self.neume_names,
+        }[STREAM_FIELDS[q_type]]
+        positions = [
+            idx
+            for idx in range(len(stream) - length + 1)
+            if tuple(stream[idx : idx + length]) in phrases
+        ]
+        if q_type == "neume_names":
+            neume_ends = self.neume_starts[1:] + [len(self.pitch_names)]
+            return [
+                (self.neume_starts[idx], neume_ends[idx + length - 1])
+                for idx in positions
+            ]
+        if q_type in ("contour", "intervals"):
+            # A query of n intervals matches n + 1 pitches
+            return [(idx, idx + length + 1) for idx in positions]
+        return [(idx, idx + length) for idx in positions]
+
+    def create_result_item(
+        self, start: int, end: int, box_index: BoundingBoxIndex
+    ) -> SolrQueryResultItem:
+        """
+        Creates a result item for the pitches from index start (inclusive)
+        to index end (exclusive). As in omr_ngram documents, neume names are
+        only included if the pitches are a sequence of complete neumes, and
+        intervals are omitted where there is no interval between pitches.
+
+        :param start: The index of the first pitch of the match
+        :param end: The index following the last pitch of the match
+        :param box_index: The BoundingBoxIndex of the document (see get_box_index)
+        """
+        first_neume = bisect_left(self.neume_starts, start)
+        end_neume = bisect_left(self.neume_starts, end)
+        complete_neumes = (
+            first_neume < len(self.neume_starts)
+            and self.neume_starts[first_neume] == start
+            and (
+                end == len(self.pitch_names)
+                or (
+                    end_neume < len(self.neume_starts)
+                    and self.neume_starts[end_neume] == end
+                )
+            )
+        )
+        return {
+            "manuscript_id": int(self.doc["manuscript_id"]),
+            "folio": self.doc["folio"],
+            "image_uri": self.doc["image_uri"],
+            "pitch_names": "_".join(self.pitch_names[start:end]),
+            "contour": _join_intervals(self.contours[start : end - 1]),
+            "semitone_intervals": _join_intervals(
+                self.semitone_intervals[start : end - 1]
+            ),
+            "intervals": _join_intervals(self.intervals[start : end - 1]),
+            "neume_names": (
+                "_".join(self.neume_names[first_neume:end_neume])
+                if complete_neumes
+                else ""
+            ),
+            "location_json": json.loads(
+                stringify_bounding_boxes(box_index.combine(start, end))
+            ),
+            "ngram_start": start,
+        }
+
+
+def _join_intervals(interval_tokens: list[str]) -> str:
+    return "_".join(
+        token for token in interval_tokens if token != MISSING_INTERVAL_TOKEN
+    )
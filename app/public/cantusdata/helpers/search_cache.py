@@ -0,0 +1,238 @@
+"""
+Caches the responses of search views, which only change when the Solr
+index changes.
+
+Responses are cached in memory, in each process, by an LRUCache that
+evicts the least recently used response once it is full and expires
+responses after a time-to-live. Each response is keyed on the view, its
+normalized parameters and the versions of the parts of the index it
+depends on (see SearchIndexVersion): the documents of one or more
+manuscripts, or those of the whole collection. The signal handlers and
+commands that change the index bump these versions after each commit
+(see bump_index_versions), so that a response cached before the change
+is never used again, by any process.
+
+>>> from cantusdata.helpers.search_cache import get_cache_key, search_cache
+>>> key = get_cache_key("chant-set", {"manuscript_id": "123723"}, [123723])
+>>> response = search_cache.get_or_compute(key, run_search)
+"""
+
+from collections import OrderedDict
+import threading
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterable,
+    Mapping,
+    Optional,
+    TypeVar,
+)
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import F
+from django.dispatch import receiver
+
+from cantusdata.models.search_index_version import SearchIndexVersion
+
+T = TypeVar("T")
+
+# The keys of the versions of the whole index (bumped when documents of
+# all manuscripts may have changed) and of the documents of all
+# manuscripts (bumped whenever the documents of any manuscript change)
+ALL_VERSION_KEY = "all"
+COLLECTION_VERSION_KEY = "collection"
+
+
+def get_manuscript_version_key(manuscript_id: int) -> str:
+    return f"manuscript:{manuscript_id}"
+
+
+class LRUCache:
+    """
+    A thread-safe cache of at most max_entries values, each of which
+    expires ttl seconds after it is set. A cache with max_entries or ttl
+    set to 0 caches nothing.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.timer = timer
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the value of a key (None if it is not cached or has expired),
+        and marks it as the most recently used.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expiry_time, value = entry
+            if self.timer() >= expiry_time:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Caches the value of a key, evicting the least recently used values
+        if the cache is full.
+        """
+        if self.max_entries <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], T],
+        cacheable: Callable[[T], bool] = lambda value: True,
+    ) -> T:
+        """
+        Returns the cached value of a key, or computes it and caches it if
+        it is cacheable. The cached value is shared by all callers, so it
+        must not be modified.
+        """
+        value: Optional[T] = self.get(key)
+        if value is None:
+            value = compute()
+            if cacheable(value):
+                self.set(key, value)
+        return value
+
+    async def aget_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[T]],
+        cacheable: Callable[[T], bool] = lambda value: True,
+    ) -> T:
+        """
+        The async counterpart of get_or_compute, for a coroutine function.
+        """
+        value: Optional[T] = self.get(key)
+        if value is None:
+            value = await compute()
+            if cacheable(value):
+                self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+search_cache = LRUCache(settings.SEARCH_CACHE_MAX_ENTRIES, settings.SEARCH_CACHE_TTL)
+
+
+@receiver(setting_changed)
+def reset_search_cache(setting: str, **kwargs: Any) -> None:
+    """
+    Empties the search cache and applies its settings when they are
+    overridden (e.g. by override_settings in tests), so that responses
+    cached with other settings are not used.
+    """
+    if setting in ("SEARCH_CACHE_MAX_ENTRIES", "SEARCH_CACHE_TTL"):
+        search_cache.max_entries = settings.SEARCH_CACHE_MAX_ENTRIES
+        search_cache.ttl = settings.SEARCH_CACHE_TTL
+        search_cache.clear()
+
+
+def get_index_versions(manuscript_ids: Optional[Iterable[int]]) -> tuple[int, ...]:
+    """
+    Returns the versions of the parts of the index on which a search depends.
+
+    :param manuscript_ids: The manuscripts whose documents are searched,
+        or None for a search of the whole collection
+    :return: The version of the whole index, followed by the version of
+        each manuscript (or that of the collection), in order
+    """
+    if manuscript_ids is None:
+        keys = [COLLECTION_VERSION_KEY]
+    else:
+        keys = [
+            get_manuscript_version_key(manuscript_id)
+            for manuscript_id in sorted(set(manuscript_ids))
+        ]
+    versions: dict[str, int] = dict(
+        SearchIndexVersion.objects.filter(key__in=[ALL_VERSION_KEY] + keys).values_list(
+            "key", "version"
+        )
+    )
+    return tuple(versions.get(key, 0) for key in [ALL_VERSION_KEY] + keys)
+
+
+def bump_index_versions(manuscript_ids: Optional[Iterable[int]]) -> None:
+    """
+    Bumps the versions of the parts of the index that have changed, so that
+    the search responses cached for them are no longer used. This should
+    be called after the changes are committed to Solr.
+
+    :param manuscript_ids: The manuscripts whose documents have changed,
+        or None if documents of any manuscript may have changed
+    """
+    if manuscript_ids is None:
+        keys = [ALL_VERSION_KEY]
+    else:
+        keys = [COLLECTION_VERSION_KEY] + [
+            get_manuscript_version_key(manuscript_id)
+            for manuscript_id in set(manuscript_ids)
+        ]
+    with transaction.atomic():
+        SearchIndexVersion.objects.bulk_create(
+            [SearchIndexVersion(key=key) for key in keys], ignore_conflicts=True
+        )
+        SearchIndexVersion.objects.filter(key__in=keys).update(version=F("version") + 1)
+
+
+def get_cache_key(
+    view_name: str,
+    params: Mapping[str, Any],
+    manuscript_ids: Optional[Iterable[int]],
+) -> Hashable:
+    """
+    Creates the key of a search response in the cache from the name of the
+    view, the parameters of the search (in any order, and with list values
+    for parameters that can be repeated) and the current versions of the
+    parts of the index that it depends on (see get_index_versions).
+    """
+    normalized_params = tuple(
+        sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in params.items()
+        )
+    )
+    return (view_name, normalized_params, get_index_versions(manuscript_ids))
+
+
+async def aget_cache_key(
+    view_name: str,
+    params: Mapping[str, Any],
+    manuscript_ids: Optional[Iterable[int]],
+) -> Hashable:
+    """
+    The async counterpart of get_cache_key, which looks up the versions
+    of the index in a thread.
+    """
+    return await sync_to_async(get_cache_key)(view_name, params, manuscript_ids)
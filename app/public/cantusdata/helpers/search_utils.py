@@ -73,6 +73,20 @@ def get_transpositions(sequence: list[str]) -> list[list[str]]:
     return transpositions
 
 
+def get_relative_pitch_names(sequence: list[str]) -> list[str]:
+    """
+    Given a series of pitch names (no flats or sharps - just abcdefg),
+    re-express each pitch as the number of steps (0 to 6) up from the first
+    pitch, modulo 7. All the transpositions of a melody (see get_transpositions)
+    have the same relative pitch names, so they can be found with a single
+    term lookup.
+
+    e.g. get_relative_pitch_names('cece') and get_relative_pitch_names('gbgb')
+    both return ['0', '2', '0', '2']
+    """
+    return [str((ord(pitch) - ord(sequence[0])) % 7) for pitch in sequence]
+
+
 def translate_interval_query_direction(query_terms: list[str]) -> list[str]:
     """
     Translate the terms of an interval query (alphanumeric strings; e.g. "u3", "d2", "r")
@@ -0,0 +1,154 @@
+"""
+Defines the SolrBatchWriter class, which buffers updates to the Solr index
+and sends them in size-bounded batches.
+"""
+
+from typing import Any, Iterable, List, Mapping, Protocol
+import logging
+import time
+
+import requests
+
+from .solr_client import RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    Checks whether an error raised by a SolrClient may be resolved by
+    sending the same request again: Solr could not be reached, did not
+    respond in time, or responded with one of RETRY_STATUSES (e.g. it was
+    briefly unavailable or overloaded). Other error responses (e.g. for an
+    invalid document) would fail again.
+
+    :param error: An error raised by a request to Solr
+    :return: True if the request should be sent again
+    """
+    if isinstance(error, requests.HTTPError):
+        return (
+            error.response is not None and error.response.status_code in RETRY_STATUSES
+        )
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+
+class SolrUpdateConnection(Protocol):
+    """
+    The methods of a Solr connection (e.g. a SolrClient) used to send updates.
+    """
+
+    def add_many(self, docs: Any) -> Any: ...
+
+    def delete(self, *, queries: List[str]) -> Any: ...
+
+    def commit(self) -> Any: ...
+
+
+class SolrBatchWriter:
+    """
+    Buffers documents to add to the Solr index, and queries matching documents
+    to delete from it, and sends them to Solr in batches of at most batch_size
+    documents. Batches are not tied to any grouping of the documents (e.g.
+    to the folio they come from), so that many small groups of documents
+    are sent in a few requests.
+
+    Buffered deletions are always sent before buffered documents, so
+    documents added after a deletion are never deleted by it, even if
+    both are sent to Solr in the same flush.
+
+    Nothing is committed until commit is called. A batch that fails with a
+    retryable error (see is_retryable_error) is sent again from the buffer,
+    up to max_attempts times, waiting retry_delay seconds (doubled after
+    each attempt) between attempts.
+    """
+
+    def __init__(
+        self,
+        solr_conn: SolrUpdateConnection,
+        batch_size: int = 1000,
+        max_attempts: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        """
+        :param solr_conn: The Solr connection through which to send updates
+        :param batch_size: The maximum number of documents in each request
+        :param max_attempts: The number of times to send a batch before giving up
+        :param retry_delay: The time (in seconds) to wait before sending a
+            failed batch again
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+        if max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        self.solr_conn = solr_conn
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.pending_docs: List[Mapping[str, Any]] = []
+        self.pending_delete_queries: List[str] = []
+        # The number of documents sent to Solr since the last commit
+        self.num_uncommitted = 0
+
+    def delete_query(self, query: str) -> None:
+        """
+        Buffers a query matching documents to delete from the index.
+        """
+        self.pending_delete_queries.append(query)
+
+    def add_many(self, docs: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Buffers documents to add to the index, sending full batches
+        of documents as soon as they are buffered.
+        """
+        self.pending_docs.extend(docs)
+        if len(self.pending_docs) >= self.batch_size:
+            self.flush(full_batches_only=True)
+
+    def flush(self, full_batches_only: bool = False) -> None:
+        """
+        Sends buffered deletions and documents to Solr.
+
+        :param full_batches_only: If True, documents that do not fill a batch
+            are left in the buffer
+        """
+        if self.pending_delete_queries:
+            self._send(self.solr_conn.delete, queries=self.pending_delete_queries)
+            self.pending_delete_queries = []
+        # Each batch leaves the buffer as soon as it is sent, so that a
+        # failure does not send the previous batches again
+        while len(self.pending_docs) >= (self.batch_size if full_batches_only else 1):
+            batch = self.pending_docs[: self.batch_size]
+            self._send(self.solr_conn.add_many, batch)
+            del self.pending_docs[: len(batch)]
+            self.num_uncommitted += len(batch)
+
+    def commit(self) -> None:
+        """
+        Sends all buffered updates to Solr and commits them.
+        """
+        self.flush()
+        self._send(self.solr_conn.commit)
+        self.num_uncommitted = 0
+
+    def _send(self, method: Any, *args: Any, **kwargs: Any) -> None:
+        """
+        Calls a method of the Solr connection, calling it again if it
+        raises a retryable error until max_attempts is reached.
+        """
+        delay = self.retry_delay
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                method(*args, **kwargs)
+                return None
+            except requests.RequestException as error:
+                if attempt == self.max_attempts or not is_retryable_error(error):
+                    raise
+                logger.warning(
+                    "Solr request failed (attempt %d of %d), retrying in %.1fs: %s",
+                    attempt,
+                    self.max_attempts,
+                    delay,
+                    error,
+                )
+                time.sleep(delay)
+                delay *= 2
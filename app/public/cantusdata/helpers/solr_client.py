@@ -0,0 +1,337 @@
+"""
+Defines the SolrClient class, through which views and commands send
+requests to Solr, and get_solr_client, which returns the client shared
+by all the threads of a process.
+
+A client keeps a pool of keep-alive HTTP connections to Solr, so that
+requests do not pay for a new TCP connection, retries requests that fail
+because Solr is briefly unavailable (waiting longer before each retry),
+and records the latency of each call (see SolrMetrics).
+
+For example, get_solr_client().select({"q": "type:cantusdata_folio",
+"rows": 0}) returns the JSON response of Solr, whose ["response"]["numFound"]
+value is the number of folios in the index.
+"""
+
+from collections import deque
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from typing import Any, Iterable, Mapping, Optional, TypedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Responses with these statuses are retried: Solr (or a proxy in front of
+# it) is overloaded or restarting
+RETRY_STATUSES = (429, 502, 503, 504)
+
+# The number of latencies kept for each operation to compute percentiles
+METRICS_WINDOW = 1000
+
+
+class SolrOperationMetrics(TypedDict):
+    count: int
+    errors: int
+    mean_ms: float
+    median_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class SolrMetrics:
+    """
+    Records the latency of the calls made by a SolrClient, by operation
+    ("select", "update" or "commit"). Calls that raise an error are counted
+    as errors; percentiles are computed over the last METRICS_WINDOW calls.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: dict[str, int] = {}
+        self._errors: dict[str, int] = {}
+        self._total_times: dict[str, float] = {}
+        self._max_times: dict[str, float] = {}
+        self._latencies: dict[str, deque[float]] = {}
+
+    def record(self, operation: str, elapsed_time: float, failed: bool) -> None:
+        with self._lock:
+            self._counts[operation] = self._counts.get(operation, 0) + 1
+            self._errors[operation] = self._errors.get(operation, 0) + failed
+            self._total_times[operation] = (
+                self._total_times.get(operation, 0.0) + elapsed_time
+            )
+            self._max_times[operation] = max(
+                self._max_times.get(operation, 0.0), elapsed_time
+            )
+            self._latencies.setdefault(operation, deque(maxlen=METRICS_WINDOW)).append(
+                elapsed_time
+            )
+
+    def summary(self) -> dict[str, SolrOperationMetrics]:
+        """
+        :return: The number of calls, the number of errors and the mean,
+            median, 95th percentile and maximum latency (in milliseconds)
+            of each operation
+        """
+        with self._lock:
+            summary: dict[str, SolrOperationMetrics] = {}
+            for operation, count in self._counts.items():
+                latencies = sorted(self._latencies[operation])
+                summary[operation] = {
+                    "count": count,
+                    "errors": self._errors[operation],
+                    "mean_ms": self._total_times[operation] / count * 1000,
+                    "median_ms": statistics.median(latencies) * 1000,
+                    "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                    "max_ms": self._max_times[operation] * 1000,
+                }
+            return summary
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts.clear()
+            self._errors.clear()
+            self._total_times.clear()
+            self._max_times.clear()
+            self._latencies.clear()
+
+
+class SolrClient:
+    """
+    Sends queries and updates to a Solr core over a pool of keep-alive
+    connections. A client may be shared by any number of threads.
+
+    Errors are raised as requests exceptions: an HTTPError for an error
+    response (once retries are exhausted), and a ConnectionError or Timeout
+    if Solr cannot be reached.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = 10,
+        connect_timeout: float = 5.0,
+        select_timeout: float = 10.0,
+        update_timeout: float = 300.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+    ) -> None:
+        """
+        :param url: The URL of the Solr core
+        :param pool_size: The maximum number of connections kept open
+        :param connect_timeout: The time (in seconds) to wait for a connection
+        :param select_timeout: The time (in seconds) to wait for the response
+            to a query
+        :param update_timeout: The time (in seconds) to wait for the response
+            to an update or a commit
+        :param max_retries: The number of times a failed request is sent again
+        :param retry_backoff: The backoff factor (in seconds) between retries:
+            the first retry is sent at once, and the n-th after waiting
+            retry_backoff * 2 ** (n - 1) seconds
+        """
+        self.url = url.rstrip("/")
+        self.connect_timeout = connect_timeout
+        self.select_timeout = select_timeout
+        self.update_timeout = update_timeout
+        self.metrics = SolrMetrics()
+        self.session = requests.Session()
+        # Queries are retried after any failure. Updates are only retried
+        # if they could not be sent: an update whose response was lost may
+        # have been applied, and documents with new ids would be added twice
+        query_retry = Retry(
+            total=max_retries,
+            backoff_factor=retry_backoff,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=None,
+            raise_on_status=False,
+        )
+        update_retry = Retry(
+            total=max_retries, connect=max_retries, read=0, status=0, other=0
+        )
+        query_adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=query_retry)
+        self.session.mount("http://", query_adapter)
+        self.session.mount("https://", query_adapter)
+        self.session.mount(
+            f"{self.url}/update",
+            HTTPAdapter(pool_maxsize=pool_size, max_retries=update_retry),
+        )
+
+    def select(self, params: Mapping[str, Any]) -> dict[str, Any]:
+        """
+        Sends a query to the select handler. Long lists of folios or
+        positions can exceed the maximum length of a URL, so the parameters
+        are sent in the body of the request.
+
+        :param params: The parameters of the query (a list value is sent as
+            a repeated parameter)
+        :return: The JSON response of Solr
+        """
+        return self._request(
+            "select",
+            f"{self.url}/select",
+            self.select_timeout,
+            data={**params, "wt": "json"},
+        )
+
+    def add_many(self, docs: Iterable[Mapping[str, Any]]) -> None:
+        """
+        Adds documents to the index, replacing any documents with the same
+        ids. Fields with a None value are left out.
+        """
+        self._update(
+            [
+                {field: value for field, value in doc.items() if value is not None}
+                for doc in docs
+            ]
+        )
+
+    def delete(
+        self,
+        ids: Optional[Iterable[str]] = None,
+        queries: Optional[Iterable[str]] = None,
+    ) -> None:
+        """
+        Deletes the documents with the given ids and the documents
+        matching the given queries.
+        """
+        commands: list[Any] = list(ids or [])
+        commands.extend({"query": query} for query in queries or [])
+        if commands:
+            self._update({"delete": commands})
+
+    def update(
+        self,
+        docs: Iterable[Mapping[str, Any]] = (),
+        delete_ids: Iterable[str] = (),
+        delete_queries: Iterable[str] = (),
+        commit: bool = False,
+    ) -> None:
+        """
+        Sends deletions, documents to add and a commit in a single request.
+        Solr applies them in this order, so documents are never deleted by
+        deletions sent with them. Fields with a None value are left out.
+
+        :param docs: The documents to add
+        :param delete_ids: The ids of the documents to delete
+        :param delete_queries: Queries matching documents to delete
+        :param commit: Whether to commit all updates sent to the index
+        """
+        # A JSON update request can repeat the "add" command, once for
+        # each document, which a dict cannot represent
+        commands: list[str] = []
+        deletions: list[Any] = list(delete_ids)
+        deletions.extend({"query": query} for query in delete_queries)
+        if deletions:
+            commands.append(f'"delete":{json.dumps(deletions)}')
+        commands.extend(
+            '"add":'
+            + json.dumps(
+                {
+                    "doc": {
+                        field: value
+                        for field, value in doc.items()
+                        if value is not None
+                    }
+                }
+            )
+            for doc in docs
+        )
+        if commit:
+            commands.append('"commit":{}')
+        if not commands:
+            return
+        self._request(
+            "commit" if commit else "update",
+            f"{self.url}/update",
+            self.update_timeout,
+            data=("{" + ",".join(commands) + "}").encode(),
+            headers={"Content-Type": "application/json"},
+        )
+
+    def delete_query(self, query: str) -> None:
+        """
+        Deletes the documents matching a query.
+        """
+        self.delete(queries=[query])
+
+    def commit(self) -> None:
+        """
+        Commits all updates sent to the index, and waits for them to be
+        visible to queries.
+        """
+        self._update({"commit": {}}, operation="commit")
+
+    def optimize(self) -> None:
+        """
+        Commits all updates sent to the index and merges its segments.
+        """
+        self._update({"optimize": {}}, operation="commit")
+
+    def _update(self, body: Any, operation: str = "update") -> None:
+        self._request(operation, f"{self.url}/update", self.update_timeout, json=body)
+
+    def _request(
+        self, operation: str, url: str, timeout: float, **kwargs: Any
+    ) -> dict[str, Any]:
+        """
+        Sends a POST request to Solr, recording its latency.
+        """
+        start_time = time.perf_counter()
+        failed = True
+        try:
+            response = self.session.post(
+                url, timeout=(self.connect_timeout, timeout), **kwargs
+            )
+            response.raise_for_status()
+            response_json: dict[str, Any] = response.json()
+            failed = False
+            return response_json
+        finally:
+            elapsed_time = time.perf_counter() - start_time
+            self.metrics.record(operation, elapsed_time, failed)
+            logger.debug(
+                "Solr %s %s in %.1f ms",
+                operation,
+                "failed" if failed else "completed",
+                elapsed_time * 1000,
+            )
+
+
+# Clients by process and URL: a process forked from another one (e.g. by
+# a multiprocessing pool) must not share the connections of its parent
+_clients: dict[tuple[int, str], SolrClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_solr_client(url: Optional[str] = None) -> SolrClient:
+    """
+    Returns the client of the process for a Solr core, creating it with
+    the SOLR_CLIENT_* settings on first use.
+
+    :param url: The URL of the Solr core (defaults to settings.SOLR_SERVER)
+    """
+    if url is None:
+        url = settings.SOLR_SERVER
+    key = (os.getpid(), url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = SolrClient(
+                url,
+                pool_size=settings.SOLR_CLIENT_POOL_SIZE,
+                connect_timeout=settings.SOLR_CLIENT_CONNECT_TIMEOUT,
+                select_timeout=settings.SOLR_CLIENT_SELECT_TIMEOUT,
+                update_timeout=settings.SOLR_CLIENT_UPDATE_TIMEOUT,
+                max_retries=settings.SOLR_CLIENT_MAX_RETRIES,
+                retry_backoff=settings.SOLR_CLIENT_RETRY_BACKOFF,
+            )
+            _clients[key] = client
+        return client
@@ -0,0 +1,181 @@
+"""
+Builds the Solr records of many manuscripts, folios or chants at once.
+
+Building the records of a queryset one model at a time, following the
+foreign keys of each model and counting its related objects, would send a
+few queries per record. The functions of this module select the columns of
+all the records of a queryset with one joined query (counting the chants
+and folios of manuscripts in the same query), and build the records from
+the rows, without instantiating models.
+
+>>> from cantusdata.helpers.solr_records import iter_solr_records
+>>> records = iter_solr_records(Chant.objects.filter(manuscript_id=123723))
+"""
+
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from django.db.models import Count, IntegerField, OuterRef, QuerySet, Subquery
+from django.db.models.functions import Coalesce
+from django.utils.text import slugify
+
+from cantusdata.models import Chant, Folio, Manuscript
+
+SolrRecord = Dict[str, Any]
+
+# The number of rows fetched from the database at a time
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def iter_solr_records(
+    queryset: QuerySet[Any],
+    id_range: Optional[Tuple[int, int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[SolrRecord]:
+    """
+    Builds the Solr records of the manuscripts, folios or chants of a
+    queryset, in the order of their primary keys.
+
+    :param queryset: The manuscripts, folios or chants whose records to build
+    :param id_range: The lowest and highest primary keys (inclusive) of the
+        models of the queryset whose records to build, or None for all of them
+    :param chunk_size: The number of rows fetched from the database at a time
+    :return: An iterator over the records
+    """
+    build_records = RECORD_BUILDERS.get(queryset.model)
+    if build_records is None:
+        raise ValueError(f"No Solr records for {queryset.model.__name__} models.")
+    if id_range is not None:
+        queryset = queryset.filter(pk__range=id_range)
+    return build_records(queryset.order_by("pk"), chunk_size)
+
+
+def _count_by_manuscript(queryset: QuerySet[Any]) -> Coalesce:
+    """
+    Returns an expression that counts the objects of a queryset that belong
+    to the manuscript of the outer query.
+    """
+    counts = (
+        queryset.filter(manuscript_id=OuterRef("pk"))
+        .order_by()
+        .values("manuscript_id")
+        .annotate(count=Count("pk"))
+        .values("count")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def build_manuscript_records(
+    queryset: QuerySet[Manuscript], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[SolrRecord]:
+    rows = queryset.annotate(
+        num_chants=_count_by_manuscript(Chant.objects.all()),
+        num_folios=_count_by_manuscript(Folio.objects.all()),
+    ).values(
+        "id",
+        "name",
+        "siglum",
+        "date",
+        "public",
+        "num_chants",
+        "num_folios",
+        "provenance",
+        "description",
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "cantusdata_manuscript",
+            "id": Manuscript.get_solr_id(row["id"]),
+            "item_id": row["id"],
+            "name": row["name"],
+            "siglum": row["siglum"],
+            "siglum_slug": slugify(row["siglum"]),
+            "date": row["date"],
+            "public": row["public"],
+            "chant_count": row["num_chants"],
+            "folio_count": row["num_folios"],
+            "provenance": row["provenance"],
+            "description": row["description"],
+        }
+
+
+def build_folio_records(
+    queryset: QuerySet[Folio], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[SolrRecord]:
+    rows = queryset.values("id", "number", "image_uri", "manuscript_id")
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "cantusdata_folio",
+            "id": Folio.get_solr_id(row["id"]),
+            "number": row["number"],
+            "item_id": row["id"],
+            "image_uri": row["image_uri"],
+            "manuscript_id": row["manuscript_id"],
+            "number_wo_lead_zero": row["number"].lstrip("0"),
+        }
+
+
+def build_chant_records(
+    queryset: QuerySet[Chant], chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[SolrRecord]:
+    rows = queryset.values(
+        "id",
+        "marginalia",
+        "manuscript_id",
+        "manuscript__siglum",
+        "manuscript__name",
+        "manuscript__public",
+        "folio_id",
+        "folio__number",
+        "folio__image_uri",
+        "sequence",
+        "cantus_id",
+        "feast",
+        "office",
+        "genre",
+        "lit_position",
+        "mode",
+        "differentia",
+        "differentiae_database",
+        "finalis",
+        "incipit",
+        "full_text",
+        "full_text_ms",
+        "volpiano",
+        "cdb_uri",
+    )
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {
+            "type": "cantusdata_chant",
+            "id": Chant.get_solr_id(row["id"]),
+            "item_id": row["id"],
+            "marginalia": row["marginalia"],
+            "manuscript": row["manuscript__siglum"],
+            "manuscript_id": row["manuscript_id"],
+            "manuscript_name_hidden": row["manuscript__name"],
+            "public": row["manuscript__public"],
+            "folio": row["folio__number"],
+            "folio_id": row["folio_id"],
+            "image_uri": row["folio__image_uri"],
+            "sequence": row["sequence"],
+            "cantus_id": row["cantus_id"],
+            "feast": row["feast"],
+            "office": row["office"],
+            "genre": row["genre"],
+            "position": row["lit_position"],
+            "mode": row["mode"],
+            "differentia": row["differentia"],
+            "differentiae_database": row["differentiae_database"],
+            "finalis": row["finalis"],
+            "incipit": row["incipit"],
+            "full_text": row["full_text"],
+            "full_text_ms": row["full_text_ms"],
+            "volpiano": row["volpiano"],
+            "cdb_uri": row["cdb_uri"],
+        }
+
+
+RECORD_BUILDERS: Dict[type, Callable[[QuerySet[Any], int], Iterator[SolrRecord]]] = {
+    Manuscript: build_manuscript_records,
+    Folio: build_folio_records,
+    Chant: build_chant_records,
+}
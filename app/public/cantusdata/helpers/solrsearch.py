@@ -1,6 +1,89 @@
+import re
 import urllib.parse
-from django.conf import settings
-import solr
+
+from cantusdata.helpers.solr_client import get_solr_client
+
+# Constraints on these fields are sent as filter queries (fq) rather than
+# in q. They do not change the ranking of the results, and Solr caches the
+# documents matching each filter query in its filterCache, so a constraint
+# shared by many searches (e.g. a manuscript) is only evaluated once.
+FILTER_FIELDS = ("type", "public", "manuscript_id", "siglum_slug")
+
+FIELD_NAME_RE = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+FIELD_CLAUSE_RE = re.compile(r"^([A-Za-z_][A-Za-z0-9_]*):")
+# Characters with a meaning in the Solr (Lucene) query syntax
+SPECIAL_CHARS_RE = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/\s])')
+
+
+def escape_term(value: str) -> str:
+    """
+    Escapes the characters of a term that have a meaning in the Solr
+    query syntax.
+    """
+    return SPECIAL_CHARS_RE.sub(r"\\\1", value)
+
+
+def escape_phrase(value: str) -> str:
+    """
+    Returns a value as a quoted phrase.
+    """
+    return '"{0}"'.format(value.replace("\\", "\\\\").replace('"', '\\"'))
+
+
+def split_query_terms(query: str) -> list[str]:
+    """
+    Splits a query into its top-level terms: the parts separated by
+    whitespace outside of quotes, parentheses, brackets and braces.
+    """
+    terms = []
+    term = ""
+    depth = 0
+    in_quotes = False
+    escaped = False
+    for char in query:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif in_quotes:
+            in_quotes = char != '"'
+        elif char == '"':
+            in_quotes = True
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char.isspace() and depth == 0:
+            if term:
+                terms.append(term)
+                term = ""
+            continue
+        term += char
+    if term:
+        terms.append(term)
+    return terms
+
+
+def split_filter_clauses(query: str) -> tuple[list[str], list[str]]:
+    """
+    Splits the clauses of a query on FILTER_FIELDS from its other clauses.
+    Only a query made of clauses joined by AND is split, since the clauses
+    of any other query cannot be run separately.
+
+    :return: The clauses to keep in the query, and the filter clauses
+    """
+    terms = split_query_terms(query)
+    if len(terms) % 2 == 0 or any(operator != "AND" for operator in terms[1::2]):
+        return [query], []
+    query_clauses = []
+    filter_clauses = []
+    for clause in terms[::2]:
+        field_match = FIELD_CLAUSE_RE.match(clause)
+        if field_match and field_match.group(1) in FILTER_FIELDS:
+            filter_clauses.append(clause)
+        else:
+            query_clauses.append(clause)
+    return query_clauses, filter_clauses
 
 
 class SolrSearch(object):
@@ -23,15 +106,25 @@ class SolrSearch(object):
     The private methods in this class (ones beginning in underscores) are
     helpers that do all the work.
 
+    Only the free-text part of the request is sent as q. Its clauses on
+    FILTER_FIELDS, the additional query parameters and the selected values
+    of other fields (request parameters named after the field) are each
+    sent as a filter query (see filter_queries). Request parameters that
+    are not field names are ignored.
+
+    Each method returns the JSON response of Solr. Parameters may be given
+    with underscores in place of dots (e.g. facet_field for facet.field).
+
     """
 
     def __init__(self, request, additional_query_params=None):
-        self.server = solr.Solr(settings.SOLR_SERVER)
+        self.server = get_solr_client()
         # self.query_dict = query_dict
         self.request = request
         self.additional_query_params = additional_query_params
         self.parsed_request = {}
         self.prepared_query = ""
+        self.filter_queries = []
         self.solr_params = {}
         self._parse_request()
         self._prepare_query()
@@ -46,6 +139,8 @@ class SolrSearch(object):
             "facet": "true",
             "facet_field": facet_fields,
             "facet_mincount": 1,
+            # Return facet counts as {term: count} objects
+            "json_nl": "map",
         }
         self.solr_params.update(facet_params)
         self.solr_params.update(kwargs)
@@ -66,7 +161,20 @@ class SolrSearch(object):
         return res
 
     def _do_query(self):
-        return self.server.select(self.prepared_query, **self.solr_params)
+        params = {
+            key.replace("_", "."): value for key, value in self.solr_params.items()
+        }
+        params.setdefault("fl", "*,score")
+        filter_queries = params.pop("fq", [])
+        if isinstance(filter_queries, str):
+            filter_queries = [filter_queries]
+        return self.server.select(
+            {
+                "q": self.prepared_query,
+                "fq": self.filter_queries + list(filter_queries),
+                **params,
+            }
+        )
 
     def _parse_request(self):
         qdict = self.request.GET
@@ -77,27 +185,26 @@ class SolrSearch(object):
         arr = []
         if self.additional_query_params:
             for k, v in self.additional_query_params.items():
-                arr.append("{0}:({1})".format(k, v))
+                self.filter_queries.append("{0}:{1}".format(k, escape_term(str(v))))
         if self.parsed_request:
             for k, v in self.parsed_request.items():
                 if not v:
                     continue
                 if k == "q":
                     if v[0] != "":
-                        arr.insert(0, "{0}".format(v[0]))
+                        query_clauses, filter_clauses = split_filter_clauses(v[0])
+                        arr.extend(query_clauses)
+                        self.filter_queries.extend(filter_clauses)
                 elif k in ("start", "rows"):
                     # Start and row parameters are single integers
                     self.solr_params[k] = int(v[0])
                 elif k == "sort":
                     # Treat sort as a string, not a one-element tuple
                     self.solr_params["sort"] = str(v[0])
-                else:
-                    arr.append(
+                elif FIELD_NAME_RE.match(k):
+                    self.filter_queries.append(
                         "{0}:({1})".format(
-                            k,
-                            " OR ".join(
-                                ['"{0}"'.format(s) for s in v if v is not None]
-                            ),
+                            k, " OR ".join(escape_phrase(s) for s in v if s is not None)
                         )
                     )
 
@@ -0,0 +1,213 @@
+from typing import Any, Dict, List, NamedTuple, Tuple
+from os import path, listdir
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from rest_framework.test import APIRequestFactory
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.notation_approximate_search import (
+    APPROXIMATE_Q_TYPES,
+    DEFAULT_TIME_BUDGET,
+)
+from cantusdata.management.commands.index_manuscript_mei import MEI4_DIR
+from cantusdata.views.search_notation import SearchNotationView
+
+
+class SyntheticQuery(NamedTuple):
+    """
+    A query sampled from an MEI file, with random edits applied.
+
+    q: The query, as entered by a user
+    folio: The folio from which the query was sampled
+    """
+
+    q: str
+    folio: str
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the approximate notation search on a manuscript indexed "
+        "as n-grams. Queries of each type are sampled from random positions "
+        "in the manuscript's MEI files, and each receives as many random "
+        "edits (substitutions, insertions or deletions of terms) as the "
+        "distance at which it is searched. The command reports the median "
+        "and maximum latency of the searches at each distance, the share of "
+        "queries that found the passage they were sampled from (at least one "
+        "result on its folio) and the share that completed within the time "
+        "budget."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "manuscript_id",
+            type=int,
+            help="The ID of the manuscript to search.",
+        )
+        parser.add_argument(
+            "--mei-dir",
+            type=str,
+            default=MEI4_DIR,
+            help=(
+                "The directory containing a subdirectory of MEI files for each "
+                "manuscript. Defaults to '/code/production-mei-files'."
+            ),
+        )
+        parser.add_argument(
+            "--query-types",
+            type=str,
+            nargs="+",
+            default=["pitch_names", "intervals"],
+            choices=APPROXIMATE_Q_TYPES,
+            help="The types of queries to run.",
+        )
+        parser.add_argument(
+            "--query-length",
+            type=int,
+            default=8,
+            help="The number of terms of the queries, before edits.",
+        )
+        parser.add_argument(
+            "--distances",
+            type=int,
+            nargs="+",
+            default=[0, 1, 2],
+            help="The edit distances at which queries are run.",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=20,
+            help="The number of queries of each type and distance.",
+        )
+        parser.add_argument(
+            "--time-budget-ms",
+            type=int,
+            default=int(DEFAULT_TIME_BUDGET * 1000),
+            help="The time budget of each search, in milliseconds.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="The seed of the random sampling and editing of queries.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        manuscript_id = options["manuscript_id"]
+        manuscript_mei_path = path.join(options["mei_dir"], str(manuscript_id))
+        if not path.exists(manuscript_mei_path):
+            raise FileNotFoundError(f"{manuscript_mei_path} does not exist.")
+        queries = self.sample_queries(manuscript_mei_path, options)
+        view = SearchNotationView.as_view()
+        factory = APIRequestFactory()
+        for (q_type, distance), type_queries in queries.items():
+            latencies: List[float] = []
+            num_hits = 0
+            num_complete = 0
+            for query in type_queries:
+                request = factory.get(
+                    "/notation-search/",
+                    {
+                        "q": query.q,
+                        "type": q_type,
+                        "manuscript_id": manuscript_id,
+                        "max_distance": distance,
+                        "time_budget_ms": options["time_budget_ms"],
+                    },
+                )
+                start_time = time.perf_counter()
+                response = view(request)
+                latencies.append(time.perf_counter() - start_time)
+                if response.status_code != 200:
+                    raise ValueError(f"Query '{query.q}' failed: {response.data}")
+                num_complete += response.data["complete"]
+                num_hits += any(
+                    result["boxes"] and result["boxes"][0]["f"] == query.folio
+                    for result in response.data["results"]
+                )
+            self.stdout.write(
+                f"{q_type} at distance {distance}: "
+                f"median {statistics.median(latencies) * 1000:.1f} ms, "
+                f"max {max(latencies) * 1000:.1f} ms, "
+                f"found {num_hits}/{len(type_queries)}, "
+                f"complete {num_complete}/{len(type_queries)}"
+            )
+
+    def sample_queries(
+        self, manuscript_mei_path: str, options: Dict[str, Any]
+    ) -> Dict[Tuple[str, int], List[SyntheticQuery]]:
+        """
+        Samples queries of each type from random positions in the manuscript's
+        MEI files, and applies as many random edits to each as its distance.
+
+        :return: A dictionary of queries by query type and distance
+        """
+        rng = random.Random(options["seed"])
+        length = options["query_length"]
+        streams: Dict[str, List[Tuple[str, List[str]]]] = {
+            q_type: [] for q_type in options["query_types"]
+        }
+        for mei_file in sorted(listdir(manuscript_mei_path)):
+            if not mei_file.endswith(".mei"):
+                continue
+            folio = mei_file.split("_")[-1].split(".")[0]
+            tokens = MEITokenizer(
+                path.join(manuscript_mei_path, mei_file), 1, 1
+            ).pitch_sequence.tokens()
+            for q_type in options["query_types"]:
+                match q_type:
+                    case "pitch_names":
+                        stream = tokens.pitch_names
+                    case "contour":
+                        stream = [str(c) for c in tokens.contours if c is not None]
+                    case _:
+                        stream = [
+                            get_interval_query_term(interval)
+                            for interval in tokens.intervals
+                            if interval is not None
+                        ]
+                if len(stream) >= length:
+                    streams[q_type].append((folio, stream))
+        queries: Dict[Tuple[str, int], List[SyntheticQuery]] = {}
+        for q_type, type_streams in streams.items():
+            if not type_streams:
+                continue
+            vocabulary = sorted({term for _, stream in type_streams for term in stream})
+            for distance in options["distances"]:
+                queries[(q_type, distance)] = []
+                for _ in range(options["queries"]):
+                    folio, stream = rng.choice(type_streams)
+                    start = rng.randrange(len(stream) - length + 1)
+                    q_terms = stream[start : start + length]
+                    for _ in range(distance):
+                        edit_idx = rng.randrange(len(q_terms))
+                        match rng.choice(["substitute", "insert", "delete"]):
+                            case "substitute":
+                                q_terms[edit_idx] = rng.choice(
+                                    [t for t in vocabulary if t != q_terms[edit_idx]]
+                                )
+                            case "insert":
+                                q_terms.insert(edit_idx, rng.choice(vocabulary))
+                            case _:
+                                del q_terms[edit_idx]
+                    queries[(q_type, distance)].append(
+                        SyntheticQuery(" ".join(q_terms), folio)
+                    )
+        return queries
+
+
+def get_interval_query_term(interval: str) -> str:
+    """
+    Converts an interval token of an MEI file (see PitchTokens) into the
+    term of an intervals query that matches it (the reverse of
+    translate_interval_query_direction).
+    """
+    if interval == "1":
+        return "r"
+    if interval.startswith("-"):
+        return f"d{interval[1:]}"
+    return f"u{interval}"
@@ -0,0 +1,215 @@
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, List, NamedTuple
+import asyncio
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.http import HttpRequest
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from cantusdata.views.suggestion import AsyncSuggestionView, SuggestionView
+
+# The response of the Solr stand-in to every query: the facet counts
+# of a suggestion query
+STAND_IN_RESPONSE = json.dumps(
+    {
+        "response": {"numFound": 0, "docs": []},
+        "facet_counts": {
+            "facet_fields": {"office": ["Matins", 12, "Lauds", 8, "Vespers", 5]}
+        },
+    }
+).encode()
+
+
+class SolrStandInHandler(BaseHTTPRequestHandler):
+    """
+    Responds to every request after the latency of the server, in place
+    of Solr.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "SolrStandInServer"
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers["Content-Length"]))
+        time.sleep(self.server.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STAND_IN_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STAND_IN_RESPONSE)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class SolrStandInServer(ThreadingHTTPServer):
+    # Accept as many simultaneous connections as the async views open
+    request_queue_size = 1024
+    daemon_threads = True
+
+    def __init__(self, latency: float) -> None:
+        super().__init__(("127.0.0.1", 0), SolrStandInHandler)
+        self.latency = latency
+
+
+class BenchmarkResult(NamedTuple):
+    """
+    The latencies (in seconds) of the requests of a benchmark, and the
+    time (in seconds) taken to serve all of them.
+    """
+
+    latencies: List[float]
+    elapsed_time: float
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares the throughput of a Solr-backed view served synchronously "
+        "(as under WSGI, by a fixed number of worker threads) with that of its "
+        "async variant (as under ASGI, by coroutines of a single event loop). "
+        "The suggestion view is requested --requests times, with at most "
+        "--concurrency requests in flight, against a local stand-in for Solr "
+        "that responds after --latency-ms milliseconds. The command reports "
+        "the requests per second and the median and 95th percentile latency "
+        "of each mode. Neither Solr nor the database is used."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=500,
+            help="The number of requests sent in each mode.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=100,
+            help="The number of requests in flight at once.",
+        )
+        parser.add_argument(
+            "--threads",
+            type=int,
+            default=4,
+            help=(
+                "The number of worker threads serving the sync view "
+                "(e.g. the number of gunicorn workers)."
+            ),
+        )
+        parser.add_argument(
+            "--latency-ms",
+            type=float,
+            default=50,
+            help="The time the Solr stand-in takes to respond to a query.",
+        )
+        parser.add_argument(
+            "--pool-size",
+            type=int,
+            default=100,
+            help="The maximum number of connections of each client to Solr.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["requests"] < 1 or options["concurrency"] < 1:
+            raise ValueError("--requests and --concurrency must be at least 1.")
+        if options["threads"] < 1:
+            raise ValueError("--threads must be at least 1.")
+        server = SolrStandInServer(options["latency_ms"] / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        request_factory = RequestFactory()
+        requests = [
+            request_factory.get(
+                "/suggest/",
+                {"q": f"mat{request_idx}", "field": "office", "manuscript_id": "*"},
+            )
+            for request_idx in range(options["requests"])
+        ]
+        try:
+            with override_settings(
+                SOLR_SERVER=f"http://127.0.0.1:{server.server_address[1]}/solr/core",
+                SOLR_CLIENT_POOL_SIZE=options["pool_size"],
+            ):
+                sync_result = self.run_sync(
+                    requests, min(options["threads"], options["concurrency"])
+                )
+                async_result = asyncio.run(
+                    self.run_async(requests, options["concurrency"])
+                )
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.write_result(
+            f"sync ({options['threads']} threads)", sync_result, options["requests"]
+        )
+        self.write_result(
+            f"async (1 event loop, {options['concurrency']} in flight)",
+            async_result,
+            options["requests"],
+        )
+        self.stdout.write(
+            f"async / sync throughput: "
+            f"{sync_result.elapsed_time / async_result.elapsed_time:.1f}x"
+        )
+
+    def run_sync(self, requests: List[HttpRequest], threads: int) -> BenchmarkResult:
+        """
+        Serves the requests with SuggestionView in a pool of threads.
+        """
+        view = SuggestionView.as_view()
+
+        def serve(request: HttpRequest) -> float:
+            return self.time_response(lambda: view(request))
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            latencies = list(executor.map(serve, requests))
+        return BenchmarkResult(latencies, time.perf_counter() - start_time)
+
+    async def run_async(
+        self, requests: List[HttpRequest], concurrency: int
+    ) -> BenchmarkResult:
+        """
+        Serves the requests with AsyncSuggestionView in the running event loop,
+        with at most concurrency of them in flight.
+        """
+        view = AsyncSuggestionView.as_view()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def serve(request: HttpRequest) -> float:
+            async with semaphore:
+                start_time = time.perf_counter()
+                response = await view(request)
+                self.check_response(response)
+                return time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        latencies = await asyncio.gather(*(serve(request) for request in requests))
+        return BenchmarkResult(list(latencies), time.perf_counter() - start_time)
+
+    def time_response(self, get_response: Callable[[], Any]) -> float:
+        start_time = time.perf_counter()
+        response = get_response()
+        response.render()
+        self.check_response(response)
+        return time.perf_counter() - start_time
+
+    def check_response(self, response: Any) -> None:
+        if response.status_code != 200 or b"Matins" not in response.content:
+            raise ValueError(f"Unexpected response: {response.status_code}.")
+
+    def write_result(
+        self, mode: str, result: BenchmarkResult, num_requests: int
+    ) -> None:
+        latencies = sorted(result.latencies)
+        self.stdout.write(
+            f"{mode}: {num_requests / result.elapsed_time:.1f} requests/s, "
+            f"median {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms"
+        )
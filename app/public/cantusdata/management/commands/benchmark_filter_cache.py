@@ -0,0 +1,190 @@
+from typing import Any, Dict, List, NamedTuple
+from urllib.parse import urlencode
+import random
+import statistics
+import time
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandParser
+from django.test import RequestFactory
+
+from cantusdata.helpers.solrsearch import SolrSearch
+from cantusdata.models import Chant, Manuscript
+
+# The fields searched by the queries of the synthetic mix, as the search
+# page searches them
+SEARCH_FIELDS = ["incipit_t_hidden", "full_text", "feast_t_hidden"]
+
+# The ways a query mix is sent to Solr, in order: with all its constraints
+# in q (as SolrSearch did before filter queries), and with its non-scoring
+# constraints as filter queries
+MODES = ["combined", "filters"]
+
+
+class FilterCacheStats(NamedTuple):
+    lookups: int
+    hits: int
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the reuse of Solr's filterCache by the chant search. A "
+        "mix of searches is replayed twice through SolrSearch: once with all "
+        "their constraints in q, and once with their public, manuscript, type "
+        "and facet constraints sent as filter queries. The Solr core is "
+        "reloaded before each replay, to start with empty caches, so this "
+        "command should only be run on a development or test instance of "
+        "Solr. The command reports the filterCache lookups and hit rate and "
+        "the median and 95th percentile latency of each replay. The mix is "
+        "read from a file of search query strings (e.g. 'q=...&genre=A', one "
+        "per line), or sampled from the chants in the database."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--query-file",
+            type=str,
+            help="A file of search query strings to replay, one per line.",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=500,
+            help="The number of searches sampled for the mix.",
+        )
+        parser.add_argument(
+            "--manuscript-share",
+            type=float,
+            default=0.7,
+            help="The share of sampled searches restricted to a manuscript.",
+        )
+        parser.add_argument(
+            "--genre-share",
+            type=float,
+            default=0.3,
+            help="The share of sampled searches with a selected genre.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="The seed of the random sampling of searches.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["query_file"]:
+            with open(options["query_file"], encoding="utf-8") as query_file:
+                query_strings = [line.strip() for line in query_file if line.strip()]
+        else:
+            query_strings = self.sample_query_strings(options)
+        if not query_strings:
+            raise ValueError("The query mix is empty.")
+        self.stdout.write(
+            f"{len(query_strings)} searches, {len(set(query_strings))} distinct"
+        )
+        request_factory = RequestFactory()
+        for mode in MODES:
+            self.reload_core()
+            latencies: List[float] = []
+            for query_string in query_strings:
+                search = SolrSearch(
+                    request_factory.get(f"/search/?{query_string}"), {"public": "true"}
+                )
+                if mode == "combined":
+                    self.combine_filter_queries(search)
+                start_time = time.perf_counter()
+                search.search(rows=15)
+                latencies.append(time.perf_counter() - start_time)
+            stats = self.get_filter_cache_stats()
+            hit_rate = stats.hits / stats.lookups if stats.lookups else 0.0
+            latencies.sort()
+            self.stdout.write(
+                f"{mode}: filterCache {stats.hits}/{stats.lookups} hits "
+                f"({hit_rate:.0%}), "
+                f"median {statistics.median(latencies) * 1000:.1f} ms, "
+                f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms"
+            )
+
+    def sample_query_strings(self, options: Dict[str, Any]) -> List[str]:
+        """
+        Samples searches for a word of the incipit of a random chant,
+        some of them restricted to a manuscript or a genre.
+
+        :return: The query strings of the searches
+        """
+        rng = random.Random(options["seed"])
+        words = sorted(
+            {
+                word.strip(".,;:!?()[]{}\"'").lower()
+                for incipit in Chant.objects.filter(incipit__gt="")
+                .values_list("incipit", flat=True)
+                .distinct()[:5000]
+                for word in incipit.split()
+            }
+            - {""}
+        )
+        if not words:
+            raise ValueError("No chants with an incipit in the database.")
+        manuscript_ids = list(
+            Manuscript.objects.filter(public=True).values_list("id", flat=True)
+        )
+        genres = sorted(
+            set(Chant.objects.filter(genre__gt="").values_list("genre", flat=True))
+        )
+        query_strings = []
+        for _ in range(options["queries"]):
+            clauses = [f"{rng.choice(SEARCH_FIELDS)}:({rng.choice(words)})"]
+            if manuscript_ids and rng.random() < options["manuscript_share"]:
+                clauses.append(f'manuscript_id:("{rng.choice(manuscript_ids)}")')
+            params = {"q": " AND ".join(clauses), "sort": "folio asc"}
+            if genres and rng.random() < options["genre_share"]:
+                params["genre"] = rng.choice(genres)
+            query_strings.append(urlencode(params))
+        return query_strings
+
+    def combine_filter_queries(self, search: SolrSearch) -> None:
+        """
+        Moves the filter queries of a search back into its q.
+        """
+        clauses = search.filter_queries
+        if search.prepared_query != "*:*":
+            clauses = [search.prepared_query] + clauses
+        search.prepared_query = " AND ".join(clauses) or "*:*"
+        search.filter_queries = []
+
+    def reload_core(self) -> None:
+        response = requests.get(
+            f"{settings.SOLR_ADMIN}/cores",
+            params={"action": "RELOAD", "core": self.get_core_name(), "wt": "json"},
+            timeout=120,
+        )
+        response.raise_for_status()
+
+    def get_filter_cache_stats(self) -> FilterCacheStats:
+        """
+        Returns the number of lookups and hits of the filterCache of the
+        current searcher of the Solr core.
+        """
+        response = requests.get(
+            f"{settings.SOLR_SERVER.rstrip('/')}/admin/mbeans",
+            params={
+                "cat": "CACHE",
+                "key": "filterCache",
+                "stats": "true",
+                "wt": "json",
+            },
+            timeout=30,
+        )
+        response.raise_for_status()
+        # The response lists categories and their beans in turn
+        cache_beans: Dict[str, Any] = response.json()["solr-mbeans"][1]
+        stats: Dict[str, Any] = cache_beans["filterCache"]["stats"]
+        # Stats are named e.g. "CACHE.searcher.filterCache.hits"
+        stats_by_name = {key.rsplit(".", 1)[-1]: value for key, value in stats.items()}
+        return FilterCacheStats(
+            lookups=int(stats_by_name["lookups"]), hits=int(stats_by_name["hits"])
+        )
+
+    def get_core_name(self) -> str:
+        return settings.SOLR_SERVER.rstrip("/").rsplit("/", 1)[-1]
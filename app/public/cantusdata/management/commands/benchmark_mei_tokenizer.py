@@ -0,0 +1,79 @@
+from typing import Any, List
+from os import path, listdir
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.conf import settings
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the creation of n-gram documents by the MEITokenizer class. "
+        "Each MEI file in the given directory (by default, the test MEI files) "
+        "is parsed once; the command then reports the number of n-gram documents "
+        "created and the best time taken to create them over several repetitions. "
+        "Parsing time is not included."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--mei-dir",
+            type=str,
+            default=path.join(settings.TEST_MEI_FILES_PATH, "123723"),
+            help=(
+                "The directory containing the MEI files to tokenize. "
+                "Defaults to the directory of test MEI files."
+            ),
+        )
+        parser.add_argument(
+            "--min-ngram",
+            type=int,
+            default=1,
+            help="The minimum n-gram length.",
+        )
+        parser.add_argument(
+            "--max-ngram",
+            type=int,
+            default=5,
+            help="The maximum n-gram length.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=7,
+            help="The number of times to repeat the benchmark.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        mei_files = sorted(
+            path.join(options["mei_dir"], f)
+            for f in listdir(options["mei_dir"])
+            if f.endswith(".mei")
+        )
+        if not mei_files:
+            raise FileNotFoundError(f"No MEI files found in {options['mei_dir']}.")
+        tokenizers: List[MEITokenizer] = [
+            MEITokenizer(
+                mei_file,
+                min_ngram=options["min_ngram"],
+                max_ngram=options["max_ngram"],
+            )
+            for mei_file in mei_files
+        ]
+        best_time = float("inf")
+        num_docs = 0
+        for _ in range(options["repeat"]):
+            start_time = time.perf_counter()
+            num_docs = 0
+            for tokenizer in tokenizers:
+                for _ in tokenizer.iter_ngram_documents():
+                    num_docs += 1
+            best_time = min(best_time, time.perf_counter() - start_time)
+        self.stdout.write(
+            f"{len(mei_files)} files, {num_docs} n-gram documents "
+            f"(n = {options['min_ngram']}-{options['max_ngram']}): "
+            f"{best_time * 1000:.1f} ms "
+            f"({num_docs / best_time:.0f} documents/second)"
+        )
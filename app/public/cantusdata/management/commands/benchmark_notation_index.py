@@ -0,0 +1,231 @@
+from typing import Any, Dict, List, Tuple
+from os import path, listdir
+from io import StringIO
+import random
+import statistics
+import time
+
+import requests
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandParser
+from django.conf import settings
+from rest_framework.test import APIRequestFactory
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.notation_query_planner import DEFAULT_MAX_NGRAM
+from cantusdata.helpers.solr_client import get_solr_client
+from cantusdata.management.commands.index_manuscript_mei import MEI4_DIR
+from cantusdata.views.search_notation import SearchNotationView
+
+# The index schemes compared, in order. The n-gram scheme is benchmarked
+# last, so that the manuscript is left indexed in the default scheme.
+INDEX_SCHEMES = ["stream", "ngram"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the two schemes in which index_manuscript_mei can index "
+        "the MEI files of a manuscript: n-gram documents and stream documents. "
+        "The manuscript is indexed in each scheme in turn, and the command "
+        "reports the number of documents, the size they add to the Solr index, "
+        "and the median latency of notation searches for queries of several "
+        "types and lengths sampled from the manuscript's MEI files. The index "
+        "is optimized before each size is measured, so this command should "
+        "only be run on a development or test instance of Solr. The "
+        "manuscript is left indexed as n-grams with the given --max-ngram."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "manuscript_id",
+            type=int,
+            help="The ID of the manuscript whose MEI files are indexed.",
+        )
+        parser.add_argument(
+            "--mei-dir",
+            type=str,
+            default=MEI4_DIR,
+            help=(
+                "The directory containing a subdirectory of MEI files for each "
+                "manuscript. Defaults to '/code/production-mei-files'."
+            ),
+        )
+        parser.add_argument(
+            "--max-ngram",
+            type=int,
+            default=DEFAULT_MAX_NGRAM,
+            help="The maximum n-gram length of the n-gram scheme.",
+        )
+        parser.add_argument(
+            "--query-types",
+            type=str,
+            nargs="+",
+            default=["pitch_names", "contour", "neume_names"],
+            help="The types of queries to run.",
+        )
+        parser.add_argument(
+            "--query-lengths",
+            type=int,
+            nargs="+",
+            default=[3, 6, 12],
+            help="The numbers of terms of the queries to run.",
+        )
+        parser.add_argument(
+            "--queries",
+            type=int,
+            default=10,
+            help="The number of queries of each type and length.",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=3,
+            help="The number of times each query is run.",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="The seed of the random sampling of queries.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if options["repeat"] < 1:
+            raise ValueError("--repeat must be at least 1.")
+        manuscript_id = options["manuscript_id"]
+        manuscript_mei_path = path.join(options["mei_dir"], str(manuscript_id))
+        if not path.exists(manuscript_mei_path):
+            raise FileNotFoundError(f"{manuscript_mei_path} does not exist.")
+        queries = self.sample_queries(manuscript_mei_path, options)
+        solr_conn = get_solr_client()
+        index_args = [
+            str(manuscript_id),
+            "--mei-dir",
+            options["mei_dir"],
+            "--max-ngram",
+            str(options["max_ngram"]),
+        ]
+        for index_scheme in INDEX_SCHEMES:
+            call_command("index_manuscript_mei", *index_args, "--flush-index")
+            solr_conn.optimize()
+            base_size = self.get_index_size()
+            start_time = time.perf_counter()
+            call_command(
+                "index_manuscript_mei",
+                *index_args,
+                "--index-scheme",
+                index_scheme,
+                stdout=StringIO(),
+            )
+            index_time = time.perf_counter() - start_time
+            solr_conn.optimize()
+            index_size = self.get_index_size() - base_size
+            num_docs = solr_conn.select(
+                {
+                    "q": f"type:omr_{index_scheme} AND manuscript_id:{manuscript_id}",
+                    "rows": 0,
+                }
+            )["response"]["numFound"]
+            self.stdout.write(
+                f"{index_scheme}: {num_docs} documents, "
+                f"{index_size / 1024 / 1024:.2f} MiB, indexed in {index_time:.1f}s"
+            )
+            for (q_type, length), type_queries in queries.items():
+                latencies, num_found = self.time_queries(
+                    manuscript_id, q_type, type_queries, options["repeat"]
+                )
+                self.stdout.write(
+                    f"  {q_type} x {length}: "
+                    f"median {statistics.median(latencies) * 1000:.1f} ms, "
+                    f"max {max(latencies) * 1000:.1f} ms "
+                    f"({num_found} results)"
+                )
+
+    def sample_queries(
+        self, manuscript_mei_path: str, options: Dict[str, Any]
+    ) -> Dict[Tuple[str, int], List[str]]:
+        """
+        Samples queries of each type and length from random positions
+        in the manuscript's MEI files, so that every query has results.
+
+        :return: A dictionary of queries by query type and length
+        """
+        rng = random.Random(options["seed"])
+        mei_files = sorted(
+            path.join(manuscript_mei_path, f)
+            for f in listdir(manuscript_mei_path)
+            if f.endswith(".mei")
+        )
+        if not mei_files:
+            raise FileNotFoundError(f"No MEI files found in {manuscript_mei_path}.")
+        streams: Dict[str, List[List[str]]] = {
+            q_type: [] for q_type in options["query_types"]
+        }
+        for mei_file in mei_files:
+            tokens = MEITokenizer(mei_file, 1, 1).pitch_sequence.tokens()
+            for q_type in options["query_types"]:
+                match q_type:
+                    case "pitch_names":
+                        stream = tokens.pitch_names
+                    case "contour":
+                        stream = [str(c) for c in tokens.contours if c is not None]
+                    case "neume_names":
+                        stream = [str(name) for name in tokens.neume_names if name]
+                    case _:
+                        raise ValueError(f"Unsupported query type: {q_type}.")
+                streams[q_type].append(stream)
+        queries: Dict[Tuple[str, int], List[str]] = {}
+        for q_type, type_streams in streams.items():
+            for length in options["query_lengths"]:
+                long_streams = [s for s in type_streams if len(s) >= length]
+                if not long_streams:
+                    continue
+                queries[(q_type, length)] = []
+                for _ in range(options["queries"]):
+                    stream = rng.choice(long_streams)
+                    start = rng.randrange(len(stream) - length + 1)
+                    queries[(q_type, length)].append(
+                        " ".join(stream[start : start + length])
+                    )
+        return queries
+
+    def time_queries(
+        self, manuscript_id: int, q_type: str, queries: List[str], repeat: int
+    ) -> Tuple[List[float], int]:
+        """
+        Runs each query through SearchNotationView, repeat times.
+
+        :return: The best latency (in seconds) of each query, and the
+            total number of results of the queries
+        """
+        view = SearchNotationView.as_view()
+        factory = APIRequestFactory()
+        latencies: List[float] = []
+        num_found = 0
+        for q in queries:
+            request = factory.get(
+                "/notation-search/",
+                {"q": q, "type": q_type, "manuscript_id": manuscript_id},
+            )
+            best_time = float("inf")
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                response = view(request)
+                best_time = min(best_time, time.perf_counter() - start_time)
+            latencies.append(best_time)
+            num_found += response.data["numFound"]
+        return latencies, num_found
+
+    def get_index_size(self) -> int:
+        """
+        Returns the size (in bytes) of the index of the Solr core.
+        """
+        core_name = settings.SOLR_SERVER.rstrip("/").rsplit("/", 1)[-1]
+        response = requests.get(
+            f"{settings.SOLR_ADMIN}/cores",
+            params={"action": "STATUS", "core": core_name, "wt": "json"},
+            timeout=30,
+        )
+        response.raise_for_status()
+        index_size: int = response.json()["status"][core_name]["index"]["sizeInBytes"]
+        return index_size
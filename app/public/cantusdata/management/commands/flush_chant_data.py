@@ -1,6 +1,5 @@
 from django.core.management.base import BaseCommand
-from django.conf import settings
-import solr
+from cantusdata.helpers.solr_client import get_solr_client
 
 
 class Command(BaseCommand):
@@ -8,7 +7,7 @@ class Command(BaseCommand):
 
     def handle(self, *args, **kwargs):
         self.stdout.write("Flushing chant data from Solr...")
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
+        solrconn = get_solr_client()
         # Kill chants
         solrconn.delete_query("type:cantusdata_chant")
         solrconn.commit()
@@ -1,17 +1,55 @@
-from typing import Any, Dict
-from os import path, listdir
+from typing import Any, Dict, List, Iterator, NamedTuple, Tuple, Union
+from os import path, listdir, stat
+from itertools import islice
+from concurrent.futures import Future, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import hashlib
 import re
+import time
 
 from django.core.management.base import BaseCommand, CommandParser
-from django.conf import settings
-from solr.core import SolrConnection  # type: ignore[import-untyped]
+from django.db import connections
 
-from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.mei_processing.mei_tokenizer import (
+    NGRAM_DOCUMENT_VERSION,
+    MEITokenizer,
+    tokenize_mei_file,
+    tokenize_mei_file_stream,
+    expand_ngram_documents,
+)
+from cantusdata.helpers.mei_processing.mei_parsing_types import (
+    IndexScheme,
+    NgramDocument,
+    StreamDocument,
+)
+from cantusdata.helpers.notation_query_planner import DEFAULT_MAX_NGRAM
+from cantusdata.helpers.search_cache import bump_index_versions
+from cantusdata.helpers.solr_batch_writer import SolrBatchWriter
+from cantusdata.helpers.solr_client import SolrClient, get_solr_client
 from cantusdata.models.folio import Folio
+from cantusdata.models.mei_file_fingerprint import MEIFileFingerprint
 
 MEI4_DIR = path.join("/code", "production-mei-files")
 FOLIO_NUMBER_REGEX = re.compile(r"[a-zA-Z]?\d+[a-z]?")
 
+# The documents indexed for a folio: n-gram documents or, in the "stream"
+# index scheme, a single stream document
+NotationDocument = Union[NgramDocument, StreamDocument]
+
+
+class FolioToIndex(NamedTuple):
+    """
+    A folio whose MEI file is to be indexed.
+
+    folio_number: The folio number
+    mei_file_path: The path to the folio's MEI file
+    fingerprint: The fingerprint of the MEI file, saved once its documents
+        are committed
+    """
+
+    folio_number: str
+    mei_file_path: str
+    fingerprint: MEIFileFingerprint
+
 
 class Command(BaseCommand):
     help = (
@@ -23,7 +61,18 @@ class Command(BaseCommand):
         "lowercase single letter. The command currently has a workaround for folios "
         "that have MEI files but are NOT in CantusDB. See #891 for details "
         "about how to handle this case -- the command will alert the user "
-        "when it encounters this case."
+        "when it encounters this case. N-gram document IDs are derived from "
+        "the manuscript, folio and position of each n-gram, so indexing a "
+        "folio again replaces its existing documents. With --incremental, "
+        "only MEI files that are new or have changed since they were last "
+        "indexed are indexed again, and documents of folios whose MEI file "
+        "no longer exists are deleted. With --workers, MEI files are parsed "
+        "and tokenized in parallel worker processes. Documents of all folios "
+        "are sent to Solr in batches of --chunk-size documents and committed "
+        "once at the end of the run, or whenever --commit-every documents "
+        "have been sent since the last commit. With --index-scheme stream, "
+        "each folio is indexed as a single document of position-tokenized "
+        "streams instead of n-gram documents."
     )
 
     def add_arguments(self, parser: CommandParser) -> None:
@@ -55,9 +104,77 @@ class Command(BaseCommand):
         parser.add_argument(
             "--max-ngram",
             type=int,
-            default=5,
+            default=DEFAULT_MAX_NGRAM,
             help="The maximum n-gram length to index from the MEI files.",
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help=(
+                "The number of n-gram documents sent to Solr in each request. "
+                "Documents are generated and sent in chunks of this size so that "
+                "memory use does not grow with the length of a folio. A request "
+                "may contain documents from several folios."
+            ),
+        )
+        parser.add_argument(
+            "--commit-every",
+            type=int,
+            default=None,
+            help=(
+                "Commit the index once at least this many documents have been "
+                "sent to Solr since the last commit (checked after each folio). "
+                "By default, the index is committed once, after all folios have "
+                "been indexed."
+            ),
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=3,
+            help=(
+                "The number of times a request to Solr is sent before the "
+                "command fails. Failed requests are sent again from documents "
+                "that have already been generated, without tokenizing the "
+                "folio again."
+            ),
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help=(
+                "The number of worker processes in which to tokenize MEI files. "
+                "With the default of 1, files are tokenized in the command's "
+                "own process."
+            ),
+        )
+        parser.add_argument(
+            "--index-scheme",
+            type=str,
+            choices=["ngram", "stream"],
+            default="ngram",
+            help=(
+                "The scheme in which to index the pitches of each folio: as "
+                "n-gram documents of --min-ngram to --max-ngram pitches "
+                "(the default), or as a single document of position-tokenized "
+                "streams that can be searched for queries of any length. "
+                "Indexing a folio in one scheme deletes its documents of the "
+                "other scheme. Neume exemplars are only found in manuscripts "
+                "indexed as n-grams."
+            ),
+        )
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help=(
+                "If this flag is set, the command will only index MEI files that "
+                "are new or have changed (in size, modification time and content) "
+                "since they were last indexed with the same n-gram lengths and "
+                "index scheme."
+            ),
+        )
         parser.add_argument(
             "--flush-index",
             action="store_true",
@@ -68,11 +185,15 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args: Any, **options: Any) -> None:
-        solr_conn = SolrConnection(settings.SOLR_SERVER)
+        solr_conn = get_solr_client()
         manuscript_id = options["manuscript_id"][0]
         if options.get("flush_index"):
             self.flush_manuscript_ngrams_from_index(solr_conn, manuscript_id)
             return None
+        if options["workers"] < 1:
+            raise ValueError("--workers must be at least 1.")
+        if options["commit_every"] is not None and options["commit_every"] < 1:
+            raise ValueError("--commit-every must be at least 1.")
         folio_map: Dict[str, str] = dict(
             Folio.objects.filter(manuscript_id=manuscript_id).values_list(  # type: ignore[arg-type]
                 "number", "image_uri"
@@ -88,6 +209,14 @@ class Command(BaseCommand):
         ]
         if len(manuscript_mei_files) == 0:
             raise FileNotFoundError(f"No MEI files found in {manuscript_mei_path}.")
+        fingerprints: Dict[str, MEIFileFingerprint] = {
+            fingerprint.folio_number: fingerprint
+            for fingerprint in MEIFileFingerprint.objects.filter(
+                manuscript_id=manuscript_id
+            )
+        }
+        folios_to_index: List[FolioToIndex] = []
+        unchanged_folios: List[str] = []
         for mei_file in manuscript_mei_files:
             folio_number: str = mei_file.split("_")[-1].split(".")[0]
             if not FOLIO_NUMBER_REGEX.match(folio_number):
@@ -95,6 +224,21 @@ class Command(BaseCommand):
                     f"Folio number {folio_number} in MEI file {mei_file}"
                     "does not exist in the database."
                 )
+            mei_file_path = path.join(manuscript_mei_path, mei_file)
+            fingerprint = fingerprints.pop(folio_number, None)
+            if fingerprint is None:
+                fingerprint = MEIFileFingerprint(
+                    manuscript_id=manuscript_id, folio_number=folio_number
+                )
+            elif options["incremental"] and self.is_unchanged(
+                fingerprint,
+                mei_file_path,
+                options["min_ngram"],
+                options["max_ngram"],
+                options["index_scheme"],
+            ):
+                unchanged_folios.append(folio_number)
+                continue
             if not folio_number in folio_map or folio_map[folio_number] == "":
                 self.stdout.write(
                     self.style.WARNING(
@@ -104,25 +248,323 @@ class Command(BaseCommand):
                     )
                 )
                 Folio.objects.create(manuscript_id=manuscript_id, number=folio_number)
+            self.update_fingerprint(
+                fingerprint,
+                mei_file_path,
+                options["min_ngram"],
+                options["max_ngram"],
+                options["index_scheme"],
+            )
+            folios_to_index.append(
+                FolioToIndex(folio_number, mei_file_path, fingerprint)
+            )
+        start_time = time.perf_counter()
+        num_docs = 0
+        solr_writer = SolrBatchWriter(
+            solr_conn,
+            batch_size=options["chunk_size"],
+            max_attempts=options["max_attempts"],
+        )
+        # Folios whose documents have been sent to Solr but not yet committed
+        uncommitted_folios: List[FolioToIndex] = []
+        if options["workers"] > 1:
+            tokenized_folios = self.tokenize_folios_in_pool(
+                folios_to_index, manuscript_id, options
+            )
+        else:
+            tokenized_folios = self.tokenize_folios(
+                folios_to_index, manuscript_id, options
+            )
+        for folio, folio_docs, tokenize_time in tokenized_folios:
+            num_docs += self.index_folio(
+                solr_writer,
+                manuscript_id,
+                folio,
+                folio_docs,
+                tokenize_time,
+                folio_map.get(folio.folio_number, ""),
+                options["chunk_size"],
+            )
+            uncommitted_folios.append(folio)
+            if (
+                options["commit_every"] is not None
+                and solr_writer.num_uncommitted >= options["commit_every"]
+            ):
+                self.commit_folios(solr_writer, manuscript_id, uncommitted_folios)
+        removed_fingerprints: List[MEIFileFingerprint] = []
+        if options["incremental"]:
+            # Any remaining fingerprints belong to folios whose MEI file
+            # has been removed since they were indexed.
+            for folio_number, fingerprint in fingerprints.items():
+                solr_writer.delete_query(
+                    self.get_folio_notation_query(manuscript_id, folio_number)
+                )
+                removed_fingerprints.append(fingerprint)
+        if uncommitted_folios or removed_fingerprints:
+            self.commit_folios(solr_writer, manuscript_id, uncommitted_folios)
+        for fingerprint in removed_fingerprints:
+            fingerprint.delete()
+        elapsed_time = time.perf_counter() - start_time
+        self.stdout.write(
+            f"Indexed {len(folios_to_index)} folio(s) "
+            f"({num_docs} documents in {elapsed_time:.2f}s, "
+            f"{num_docs / elapsed_time if elapsed_time else 0:.0f} documents/second), "
+            f"skipped {len(unchanged_folios)} unchanged folio(s), "
+            f"removed {len(removed_fingerprints)} folio(s) without an MEI file."
+        )
+        return None
+
+    def tokenize_folios(
+        self, folios: List[FolioToIndex], manuscript_id: int, options: Dict[str, Any]
+    ) -> Iterator[Tuple[FolioToIndex, Iterator[NotationDocument], float]]:
+        """
+        Tokenizes folios one at a time in the command's process. The n-gram
+        documents of each folio are generated lazily as they are indexed, so
+        the time taken to parse the folio's MEI file is the only tokenization
+        time that is known in advance.
+
+        Yields tuples of a folio, an iterator over its n-gram documents (or
+        its stream document), and the time (in seconds) taken to parse its
+        MEI file.
+        """
+        for folio in folios:
+            start_time = time.perf_counter()
             tokenizer = MEITokenizer(
-                path.join(manuscript_mei_path, mei_file),
+                folio.mei_file_path,
                 min_ngram=options["min_ngram"],
                 max_ngram=options["max_ngram"],
+                streaming=True,
+                manuscript_id=str(manuscript_id),
+                folio=folio.folio_number,
             )
-            ngram_docs = tokenizer.create_ngram_documents()
-            for doc in ngram_docs:
-                doc["manuscript_id"] = manuscript_id
-                doc["folio"] = folio_number
-                doc["image_uri"] = folio_map.get(folio_number, "")
-            solr_conn.add_many(ngram_docs)
-            solr_conn.commit()
-        return None
+            parse_time = time.perf_counter() - start_time
+            folio_docs: Iterator[NotationDocument]
+            if options["index_scheme"] == "stream":
+                folio_docs = iter([tokenizer.create_stream_document()])
+            else:
+                folio_docs = tokenizer.iter_ngram_documents()
+            yield folio, folio_docs, parse_time
+
+    def tokenize_folios_in_pool(
+        self, folios: List[FolioToIndex], manuscript_id: int, options: Dict[str, Any]
+    ) -> Iterator[Tuple[FolioToIndex, Iterator[NotationDocument], float]]:
+        """
+        Tokenizes folios in a pool of worker processes, which send the
+        n-gram documents of each folio back in compact form (see
+        tokenize_mei_file), or its stream document (see
+        tokenize_mei_file_stream). At most twice as many folios as there are
+        workers are submitted to the pool at a time, so that only a bounded
+        number of tokenized folios wait in memory to be indexed.
+
+        Yields tuples of a folio, an iterator over its documents, and the
+        time (in seconds) taken to tokenize it, in the order in which the
+        folios finish tokenizing.
+        """
+        max_pending = 2 * options["workers"]
+        folios_iter = iter(folios)
+        # Worker processes must not share the command's database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=options["workers"]) as executor:
+            pending: Dict[Future[Any], FolioToIndex] = {}
+            while True:
+                while len(pending) < max_pending and (folio := next(folios_iter, None)):
+                    future: Future[Any]
+                    if options["index_scheme"] == "stream":
+                        future = executor.submit(
+                            tokenize_mei_file_stream,
+                            folio.mei_file_path,
+                            str(manuscript_id),
+                            folio.folio_number,
+                        )
+                    else:
+                        future = executor.submit(
+                            tokenize_mei_file,
+                            folio.mei_file_path,
+                            options["min_ngram"],
+                            options["max_ngram"],
+                            str(manuscript_id),
+                            folio.folio_number,
+                        )
+                    pending[future] = folio
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    folio = pending.pop(future)
+                    folio_docs, tokenize_time = future.result()
+                    if options["index_scheme"] == "stream":
+                        yield folio, iter(folio_docs), tokenize_time
+                    else:
+                        yield folio, expand_ngram_documents(folio_docs), tokenize_time
+
+    def index_folio(
+        self,
+        solr_writer: SolrBatchWriter,
+        manuscript_id: int,
+        folio: FolioToIndex,
+        folio_docs: Iterator[NotationDocument],
+        tokenize_time: float,
+        image_uri: str,
+        chunk_size: int,
+    ) -> int:
+        """
+        Replaces the documents of a folio in the Solr index, passing the
+        documents to the batch writer in chunks. The folio's documents are
+        not committed (see commit_folios). Reports the time spent tokenizing
+        (including any time spent generating documents from folio_docs)
+        and indexing the folio.
+
+        Returns the number of documents indexed.
+        """
+        index_start_time = time.perf_counter()
+        # Remove the folio's existing documents, which may include
+        # n-grams that are no longer in the MEI file, or documents
+        # of the other index scheme.
+        solr_writer.delete_query(
+            self.get_folio_notation_query(manuscript_id, folio.folio_number)
+        )
+        num_docs = 0
+        generate_time = 0.0
+        while True:
+            chunk_start_time = time.perf_counter()
+            docs_chunk = list(islice(folio_docs, chunk_size))
+            generate_time += time.perf_counter() - chunk_start_time
+            if not docs_chunk:
+                break
+            self.add_folio_fields(
+                docs_chunk, manuscript_id, folio.folio_number, image_uri
+            )
+            solr_writer.add_many(docs_chunk)
+            num_docs += len(docs_chunk)
+        index_time = time.perf_counter() - index_start_time - generate_time
+        self.stdout.write(
+            f"Folio {folio.folio_number}: {num_docs} documents "
+            f"(tokenized in {tokenize_time + generate_time:.2f}s, "
+            f"indexed in {index_time:.2f}s)"
+        )
+        return num_docs
+
+    def commit_folios(
+        self,
+        solr_writer: SolrBatchWriter,
+        manuscript_id: int,
+        folios: List[FolioToIndex],
+    ) -> None:
+        """
+        Commits all updates sent through the batch writer, then saves the
+        fingerprints of the given folios and clears the list. A fingerprint
+        is only saved once its folio's documents are committed, so a folio
+        whose documents are lost in a failed run is indexed again by the
+        next incremental run. The cached search responses of the manuscript
+        are invalidated (see search_cache.bump_index_versions).
+        """
+        solr_writer.commit()
+        bump_index_versions([manuscript_id])
+        for folio in folios:
+            folio.fingerprint.save()
+        folios.clear()
+
+    def is_unchanged(
+        self,
+        fingerprint: MEIFileFingerprint,
+        mei_file_path: str,
+        min_ngram: int,
+        max_ngram: int,
+        index_scheme: IndexScheme,
+    ) -> bool:
+        """
+        Checks whether an MEI file is unchanged since it was last indexed
+        with the given n-gram lengths and index scheme, and with the current
+        version of the n-gram documents. The content hash of the file is only
+        computed if its size or modification time have changed; if the
+        content is unchanged, the fingerprint is updated with the file's new
+        size and modification time.
+        """
+        if (
+            fingerprint.file_name != path.basename(mei_file_path)
+            or fingerprint.min_ngram != min_ngram
+            or fingerprint.max_ngram != max_ngram
+            or fingerprint.index_scheme != index_scheme
+            or fingerprint.document_version != NGRAM_DOCUMENT_VERSION
+        ):
+            return False
+        file_stat = stat(mei_file_path)
+        if (
+            fingerprint.size == file_stat.st_size
+            and fingerprint.mtime_ns == file_stat.st_mtime_ns
+        ):
+            return True
+        if fingerprint.content_hash != self.hash_file(mei_file_path):
+            return False
+        fingerprint.size = file_stat.st_size
+        fingerprint.mtime_ns = file_stat.st_mtime_ns
+        fingerprint.save()
+        return True
+
+    def update_fingerprint(
+        self,
+        fingerprint: MEIFileFingerprint,
+        mei_file_path: str,
+        min_ngram: int,
+        max_ngram: int,
+        index_scheme: IndexScheme,
+    ) -> None:
+        """
+        Sets the fields of a fingerprint to the current state of an
+        MEI file (the fingerprint is saved once the file has been indexed).
+        """
+        file_stat = stat(mei_file_path)
+        fingerprint.file_name = path.basename(mei_file_path)
+        fingerprint.size = file_stat.st_size
+        fingerprint.mtime_ns = file_stat.st_mtime_ns
+        fingerprint.content_hash = self.hash_file(mei_file_path)
+        fingerprint.min_ngram = min_ngram
+        fingerprint.max_ngram = max_ngram
+        fingerprint.index_scheme = index_scheme
+        fingerprint.document_version = NGRAM_DOCUMENT_VERSION
+
+    def hash_file(self, file_path: str) -> str:
+        """
+        Computes the SHA-256 hash of a file's contents.
+        """
+        with open(file_path, "rb") as file:
+            return hashlib.file_digest(file, "sha256").hexdigest()
+
+    def get_folio_notation_query(self, manuscript_id: int, folio_number: str) -> str:
+        """
+        Returns a Solr query matching the n-gram and stream documents of a folio.
+        """
+        return (
+            f"type:(omr_ngram OR omr_stream) AND manuscript_id:{manuscript_id} "
+            f'AND folio:"{folio_number}"'
+        )
+
+    def add_folio_fields(
+        self,
+        folio_docs: List[NotationDocument],
+        manuscript_id: int,
+        folio_number: str,
+        image_uri: str,
+    ) -> None:
+        """
+        Adds the manuscript, folio, and image fields to a list of n-gram
+        or stream documents before they are indexed.
+        """
+        for doc in folio_docs:
+            doc["manuscript_id"] = str(manuscript_id)
+            doc["folio"] = folio_number
+            doc["image_uri"] = image_uri
 
     def flush_manuscript_ngrams_from_index(
-        self, solr_conn: SolrConnection, manuscript_id: int
+        self, solr_conn: SolrClient, manuscript_id: int
     ) -> None:
         """
-        Deletes all n-gram documents for a given manuscript from the Solr index.
+        Deletes all n-gram and stream documents for a given manuscript from the
+        Solr index, along with the fingerprints of the manuscript's indexed MEI files.
         """
-        solr_conn.delete_query(f"type:omr_ngram AND manuscript_id:{manuscript_id}")
+        solr_conn.delete_query(
+            f"type:(omr_ngram OR omr_stream) AND manuscript_id:{manuscript_id}"
+        )
         solr_conn.commit()
+        bump_index_versions([manuscript_id])
+        MEIFileFingerprint.objects.filter(manuscript_id=manuscript_id).delete()
@@ -0,0 +1,108 @@
+from typing import Any, List, Optional
+from os import path, listdir
+import time
+
+from django.core.management.base import BaseCommand, CommandParser
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.mei_processing.mei_parse_cache import (
+    MEIParseCache,
+    get_default_cache,
+)
+from cantusdata.management.commands.index_manuscript_mei import MEI4_DIR
+
+
+class Command(BaseCommand):
+    help = (
+        "Manages the cache of parsed MEI files configured by the "
+        "MEI_PARSE_CACHE_DIR setting. The 'warm' action parses the MEI files "
+        "of the given manuscripts (by default, of all manuscripts in --mei-dir) "
+        "that are not yet in the cache and adds them to it. The 'purge' action "
+        "removes all entries from the cache. The 'stats' action reports the "
+        "number of entries in the cache and their total size."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "action",
+            type=str,
+            choices=["warm", "purge", "stats"],
+            help="The action to perform on the cache.",
+        )
+        parser.add_argument(
+            "--manuscript-ids",
+            type=int,
+            nargs="+",
+            default=None,
+            help=(
+                "The IDs of the manuscripts whose MEI files should be added "
+                "to the cache by the 'warm' action. Defaults to all manuscripts "
+                "with a subdirectory in --mei-dir."
+            ),
+        )
+        parser.add_argument(
+            "--mei-dir",
+            type=str,
+            default=MEI4_DIR,
+            help=(
+                "The directory containing a subdirectory of MEI files for each "
+                "manuscript. Defaults to '/code/production-mei-files'."
+            ),
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        cache = get_default_cache()
+        if cache is None:
+            raise ValueError("The MEI parse cache is disabled (MEI_PARSE_CACHE_DIR).")
+        match options["action"]:
+            case "warm":
+                self.warm(cache, options["mei_dir"], options["manuscript_ids"])
+            case "purge":
+                num_removed = cache.purge()
+                self.stdout.write(f"Removed {num_removed} entries from the cache.")
+            case "stats":
+                num_entries, size = cache.get_stats()
+                self.stdout.write(
+                    f"{num_entries} entries ({size / 1024 / 1024:.1f} MiB "
+                    f"of {cache.max_size / 1024 / 1024:.1f} MiB) "
+                    f"in {cache.cache_dir}."
+                )
+
+    def warm(
+        self, cache: MEIParseCache, mei_dir: str, manuscript_ids: Optional[List[int]]
+    ) -> None:
+        """
+        Parses the MEI files of the given manuscripts that are not yet in
+        the cache, which adds them to it (see MEITokenizer).
+        """
+        if not path.exists(mei_dir):
+            raise FileNotFoundError("--mei-dir path does not exist.")
+        if manuscript_ids is None:
+            manuscript_dirs = sorted(
+                d for d in listdir(mei_dir) if path.isdir(path.join(mei_dir, d))
+            )
+        else:
+            manuscript_dirs = [str(manuscript_id) for manuscript_id in manuscript_ids]
+        start_time = time.perf_counter()
+        num_files = 0
+        num_parsed = 0
+        for manuscript_dir in manuscript_dirs:
+            manuscript_mei_path = path.join(mei_dir, manuscript_dir)
+            if not path.exists(manuscript_mei_path):
+                raise FileNotFoundError(f"{manuscript_mei_path} does not exist.")
+            for mei_file in sorted(listdir(manuscript_mei_path)):
+                if not mei_file.endswith(".mei"):
+                    continue
+                mei_file_path = path.join(manuscript_mei_path, mei_file)
+                num_files += 1
+                if not cache.contains(cache.get_key(mei_file_path)):
+                    # The n-gram lengths do not affect the cached pitches
+                    MEITokenizer(mei_file_path, min_ngram=1, max_ngram=1)
+                    num_parsed += 1
+        elapsed_time = time.perf_counter() - start_time
+        num_entries, size = cache.get_stats()
+        self.stdout.write(
+            f"Parsed {num_parsed} of {num_files} MEI file(s) in {elapsed_time:.2f}s. "
+            f"The cache has {num_entries} entries "
+            f"({size / 1024 / 1024:.1f} MiB)."
+        )
@@ -0,0 +1,69 @@
+from typing import Any, List, Tuple, Type
+
+from django.core.management.base import BaseCommand, CommandParser
+from django.db.models import Model, QuerySet
+
+from cantusdata.helpers.search_cache import bump_index_versions
+from cantusdata.helpers.solr_batch_writer import SolrBatchWriter
+from cantusdata.helpers.solr_client import get_solr_client
+from cantusdata.helpers.solr_records import iter_solr_records
+from cantusdata.helpers.solrsearch import escape_term
+from cantusdata.models import Chant, Folio, Manuscript
+
+
+class Command(BaseCommand):
+    help = (
+        "Rewrites the Solr records of manuscripts, folios and chants with "
+        "stable ids (e.g. 'chant-123', see Chant.get_solr_id), replacing the "
+        "records indexed with random ids by earlier versions. The records are "
+        "added again from the database, the records with any other id are "
+        "then deleted, and both changes are committed at once, so that no "
+        "record is missing from searches during the migration. Run this once "
+        "before saving models with this version: until then, an updated "
+        "record does not replace its previous record."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of records sent to Solr in each request.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number of records to migrate.",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        solr_client = get_solr_client()
+        solr_writer = SolrBatchWriter(solr_client, batch_size=options["batch_size"])
+        migrated_models: List[Tuple[Type[Model], str, QuerySet[Any]]] = [
+            (Manuscript, "cantusdata_manuscript", Manuscript.objects.all()),
+            (Folio, "cantusdata_folio", Folio.objects.all()),
+            (Chant, "cantusdata_chant", Chant.objects.all()),
+        ]
+        for model, solr_type, queryset in migrated_models:
+            # The records whose id does not start with the prefix of stable ids
+            id_prefix = model.get_solr_id("")  # type: ignore[attr-defined]
+            legacy_query = f"type:{solr_type} AND -id:{escape_term(id_prefix)}*"
+            num_legacy = solr_client.select({"q": legacy_query, "rows": 0})["response"][
+                "numFound"
+            ]
+            self.stdout.write(f"{solr_type}: {num_legacy} records without stable ids")
+            if options["dry_run"] or num_legacy == 0:
+                continue
+            num_added = 0
+            for record in iter_solr_records(queryset):
+                solr_writer.add_many([record])
+                num_added += 1
+            solr_writer.delete_query(legacy_query)
+            solr_writer.flush()
+            self.stdout.write(f"{solr_type}: {num_added} records added")
+        if options["dry_run"]:
+            return
+        self.stdout.write("Committing changes...")
+        solr_writer.commit()
+        bump_index_versions(None)
+        self.stdout.write("Done!")
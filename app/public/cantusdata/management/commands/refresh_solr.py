@@ -1,9 +1,18 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Set
+import itertools
+import time
+
 from django.core.management.base import BaseCommand
 from cantusdata.models.chant import Chant
 from cantusdata.models.manuscript import Manuscript
 from cantusdata.models.folio import Folio
-from cantusdata import settings
-import solr
+from cantusdata.helpers.search_cache import bump_index_versions
+from cantusdata.helpers.solr_client import SolrClient, get_solr_client
+from cantusdata.helpers.solr_records import iter_solr_records
+
+# The minimum time (in seconds) between reports of the progress of a refresh
+PROGRESS_INTERVAL = 5
 
 
 class Command(BaseCommand):
@@ -16,7 +25,9 @@ class Command(BaseCommand):
     help = f"""Refreshes solr index associated with a specific manuscript for a specific type.
         \n\t Usage: ./manage.py refresh_solr --record_type {"|".join(list(TYPE_MAPPING.keys()))} [--manuscript_ids manuscript_id ...]
         \n\t Specify manuscript ID(s) to only refresh selected items in that/those manuscript(s)
-        \n\t Use --all_types to refresh all {len(TYPE_MAPPING)} types."""
+        \n\t Use --all_types to refresh all {len(TYPE_MAPPING)} types.
+        \n\t Records are streamed from the database and sent to Solr by --workers
+        concurrent requests of --batch-size records."""
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -42,9 +53,23 @@ class Command(BaseCommand):
             default=False,
             help=f"Refresh all types: {list(self.TYPE_MAPPING.keys())}",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="The number of records sent to Solr in each request.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="The number of requests sent to Solr at once.",
+        )
 
     def handle(self, *args, **options):
-        solr_conn = solr.SolrConnection(settings.SOLR_SERVER)
+        if options["batch_size"] < 1 or options["workers"] < 1:
+            raise ValueError("--batch-size and --workers must be at least 1.")
+        solr_conn = get_solr_client()
         # Parse arguments
         manuscript_ids = options["manuscript_ids"]
         types = []
@@ -88,17 +113,75 @@ class Command(BaseCommand):
                 else:
                     objects = model.objects.filter(manuscript__id__in=manuscript_ids)
 
-            solr_records = []
-            nb_obj = len(objects)
-            for index, object in enumerate(objects):
-                solr_records.append(object.create_solr_record())
-
-                # Adding by blocks prevents out of memory errors
-                if (index > 0 and index % 500 == 0) or (index == nb_obj - 1):
-                    self.stdout.write(f"{index + 1} / {nb_obj}")
-                    solr_conn.add_many(solr_records)
-                    solr_records = []
+            self.post_records(
+                solr_conn,
+                iter_solr_records(objects, chunk_size=options["batch_size"]),
+                objects.count(),
+                options["batch_size"],
+                options["workers"],
+            )
 
         self.stdout.write("Committing changes...")
         solr_conn.commit()
+        if manuscript_ids == "all_manuscripts":
+            bump_index_versions(None)
+        else:
+            bump_index_versions(int(manuscript_id) for manuscript_id in manuscript_ids)
         self.stdout.write("Done!")
+
+    def post_records(
+        self,
+        solr_conn: SolrClient,
+        records: Iterator[Dict[str, Any]],
+        num_records: int,
+        batch_size: int,
+        workers: int,
+    ) -> None:
+        """
+        Sends records to Solr in batches, as they are built. The batches are
+        sent by a pool of worker threads, while the next batches are built
+        from the database. At most two batches per worker are built ahead
+        of the requests, which bounds the records held in memory.
+
+        :param records: The records to send, built as they are iterated over
+        :param num_records: The number of records, to report the progress
+        """
+        start_time = time.perf_counter()
+        last_report_time = start_time
+        num_sent = 0
+        in_flight: Set["Future[int]"] = set()
+
+        def send_batch(batch: List[Dict[str, Any]]) -> int:
+            solr_conn.add_many(batch)
+            return len(batch)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                batch = list(itertools.islice(records, batch_size))
+                if batch:
+                    in_flight.add(executor.submit(send_batch, batch))
+                if len(in_flight) < 2 * workers and batch:
+                    continue
+                if not in_flight:
+                    break
+                # Raise the error of a failed request, if any
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                num_sent += sum(future.result() for future in done)
+                if time.perf_counter() - last_report_time >= PROGRESS_INTERVAL:
+                    last_report_time = time.perf_counter()
+                    self.write_progress(
+                        num_sent, num_records, last_report_time - start_time
+                    )
+        self.write_progress(num_sent, num_records, time.perf_counter() - start_time)
+
+    def write_progress(
+        self, num_sent: int, num_records: int, elapsed_time: float
+    ) -> None:
+        rate = num_sent / elapsed_time if elapsed_time > 0 else 0.0
+        if rate > 0:
+            eta = f"{max(num_records - num_sent, 0) / rate:.0f} s"
+        else:
+            eta = "unknown"
+        self.stdout.write(
+            f"{num_sent} / {num_records} ({rate:.0f} records/s, ETA {eta})"
+        )
@@ -0,0 +1,63 @@
+# Generated by Django 5.0.7 on 2026-10-18 20:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cantusdata", "0004_alter_neumeexemplar_options_neumeexemplar_order"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MEIFileFingerprint",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("folio_number", models.CharField(max_length=50)),
+                ("file_name", models.CharField(max_length=255)),
+                (
+                    "size",
+                    models.BigIntegerField(help_text="The size of the file in bytes."),
+                ),
+                (
+                    "mtime_ns",
+                    models.BigIntegerField(
+                        help_text="The modification time of the file in nanoseconds."
+                    ),
+                ),
+                (
+                    "content_hash",
+                    models.CharField(
+                        help_text="The SHA-256 hash of the file's contents.",
+                        max_length=64,
+                    ),
+                ),
+                ("min_ngram", models.IntegerField()),
+                ("max_ngram", models.IntegerField()),
+                (
+                    "manuscript",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="cantusdata.manuscript",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="meifilefingerprint",
+            constraint=models.UniqueConstraint(
+                fields=("manuscript", "folio_number"),
+                name="unique_mei_file_fingerprint_per_folio",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cantusdata", "0005_mei_file_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="meifilefingerprint",
+            name="index_scheme",
+            field=models.CharField(
+                choices=[("ngram", "N-gram documents"), ("stream", "Stream document")],
+                default="ngram",
+                help_text="The scheme in which the file's pitches were indexed.",
+                max_length=10,
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.7 on 2026-10-18 21:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cantusdata", "0006_meifilefingerprint_index_scheme"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SearchIndexVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=50, unique=True)),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.0.7 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cantusdata", "0007_search_index_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SolrSyncChange",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "model_name",
+                    models.CharField(
+                        help_text="The name of the model of the changed object.",
+                        max_length=20,
+                    ),
+                ),
+                ("object_id", models.IntegerField()),
+                (
+                    "operation",
+                    models.CharField(
+                        choices=[("update", "Update"), ("delete", "Delete")],
+                        max_length=10,
+                    ),
+                ),
+                ("manuscript_id", models.IntegerField(blank=True, null=True)),
+                ("created", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.7 on 2026-10-18 22:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("cantusdata", "0008_solr_sync_change"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="meifilefingerprint",
+            name="document_version",
+            field=models.IntegerField(
+                default=0,
+                help_text="The version of the fields of the file's n-gram documents.",
+            ),
+        ),
+    ]
@@ -2,5 +2,16 @@ from cantusdata.models.chant import Chant
 from cantusdata.models.manuscript import Manuscript
 from cantusdata.models.folio import Folio
 from cantusdata.models.neume_exemplar import NeumeExemplar
+from cantusdata.models.mei_file_fingerprint import MEIFileFingerprint
+from cantusdata.models.search_index_version import SearchIndexVersion
+from cantusdata.models.solr_sync_change import SolrSyncChange
 
-__all__ = ["Chant", "Manuscript", "Folio", "NeumeExemplar"]
+__all__ = [
+    "Chant",
+    "Manuscript",
+    "Folio",
+    "NeumeExemplar",
+    "MEIFileFingerprint",
+    "SearchIndexVersion",
+    "SolrSyncChange",
+]
@@ -37,46 +37,18 @@ class Chant(models.Model):
     def __str__(self):
         return "{0} - {1}".format(self.cantus_id, self.incipit)
 
-    def create_solr_record(self):
-        """Return a dict representing a new Solr record for this object"""
-        import uuid
-
-        return {
-            "type": "cantusdata_chant",
-            "id": str(uuid.uuid4()),
-            "item_id": self.id,
-            "marginalia": self.marginalia,
-            "manuscript": self.manuscript.siglum,
-            "manuscript_id": self.manuscript.id,
-            "manuscript_name_hidden": self.manuscript.name,
-            "public": self.manuscript.public,
-            "folio": self.folio.number,
-            "folio_id": self.folio.id,
-            "image_uri": self.folio.image_uri,
-            "sequence": self.sequence,
-            "cantus_id": self.cantus_id,
-            "feast": self.feast,
-            "office": self.office,
-            "genre": self.genre,
-            "position": self.lit_position,
-            "mode": self.mode,
-            "differentia": self.differentia,
-            "differentiae_database": self.differentiae_database,
-            "finalis": self.finalis,
-            "incipit": self.incipit,
-            "full_text": self.full_text,
-            "full_text_ms": self.full_text_ms,
-            "volpiano": self.volpiano,
-            "cdb_uri": self.cdb_uri,
-        }
+    @staticmethod
+    def get_solr_id(pk):
+        """
+        Return the id of the Solr record of the chant with the given primary
+        key. The id is stable, so that an updated record replaces the
+        previous one.
+        """
+        return "chant-{0}".format(pk)
 
     def fetch_solr_records(self, solrconn):
         """Query Solr for this object, returning a list of results"""
         return solrconn.query(self._get_solr_query())
 
-    def delete_from_solr(self, solrconn):
-        """Delete the Solr entry for this chant if it exists"""
-        solrconn.delete_query(self._get_solr_query())
-
     def _get_solr_query(self):
         return "(type:cantusdata_chant AND item_id:{0})".format(self.id)
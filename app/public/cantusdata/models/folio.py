@@ -20,28 +20,19 @@ class Folio(models.Model):
     def chant_count(self):
         return self.chant_set.count()
 
-    def create_solr_record(self):
-        """Return a dict representing a new Solr record for this object"""
-        import uuid
-
-        return {
-            "type": "cantusdata_folio",
-            "id": str(uuid.uuid4()),
-            "number": self.number,
-            "item_id": self.id,
-            "image_uri": self.image_uri,
-            "manuscript_id": self.manuscript.id,
-            "number_wo_lead_zero": self.number.lstrip("0"),
-        }
+    @staticmethod
+    def get_solr_id(pk):
+        """
+        Return the id of the Solr record of the folio with the given primary
+        key. The id is stable, so that an updated record replaces the
+        previous one.
+        """
+        return "folio-{0}".format(pk)
 
     def fetch_solr_records(self, solrconn):
         """Query Solr for this object, returning a list of results"""
         return solrconn.query(self._get_solr_query())
 
-    def delete_from_solr(self, solrconn):
-        """Delete the Solr entry for this folio if it exists"""
-        solrconn.delete_query(self._get_solr_query())
-
     def _get_solr_query(self):
         return "(type:cantusdata_folio AND item_id:{0})".format(self.id)
 
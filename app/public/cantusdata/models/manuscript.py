@@ -86,32 +86,18 @@ class Manuscript(models.Model):
     def neume_exemplars(self) -> QuerySet[NeumeExemplar]:
         return NeumeExemplar.objects.filter(folio__manuscript=self)
 
-    def create_solr_record(self):
-        """Return a dict representing a new Solr record for this object"""
-        import uuid
-
-        return {
-            "type": "cantusdata_manuscript",
-            "id": str(uuid.uuid4()),
-            "item_id": self.id,
-            "name": self.name,
-            "siglum": self.siglum,
-            "siglum_slug": self.siglum_slug,
-            "date": self.date,
-            "public": self.public,
-            "chant_count": self.chant_count,
-            "folio_count": self.folio_count,
-            "provenance": self.provenance,
-            "description": self.description,
-        }
+    @staticmethod
+    def get_solr_id(pk):
+        """
+        Return the id of the Solr record of the manuscript with the given primary
+        key. The id is stable, so that an updated record replaces the
+        previous one.
+        """
+        return "manuscript-{0}".format(pk)
 
     def fetch_solr_records(self, solrconn):
         """Query Solr for this object, returning a list of results"""
         return solrconn.query(self._get_solr_query())
 
-    def delete_from_solr(self, solrconn):
-        """Delete the Solr entry for this manuscript if it exists"""
-        solrconn.delete_query(self._get_solr_query())
-
     def _get_solr_query(self):
         return "(type:cantusdata_manuscript AND item_id:{0})".format(self.id)
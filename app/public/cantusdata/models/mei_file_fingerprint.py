@@ -0,0 +1,50 @@
+from django.db import models
+
+
+class MEIFileFingerprint(models.Model):
+    """
+    Records the state of a folio's MEI file when its n-grams were last
+    indexed in Solr by the index_manuscript_mei command, so that the
+    command can skip files that have not changed since.
+
+    A file is unchanged if its size and modification time are the same as
+    when it was indexed or, failing that, if its content hash is the same.
+    Files indexed with different n-gram lengths, in a different index
+    scheme (see IndexScheme) or by an earlier version of the n-gram
+    documents (see NGRAM_DOCUMENT_VERSION) are always indexed again.
+    """
+
+    class Meta:
+        app_label = "cantusdata"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["manuscript", "folio_number"],
+                name="unique_mei_file_fingerprint_per_folio",
+            )
+        ]
+
+    manuscript = models.ForeignKey("Manuscript", on_delete=models.CASCADE)
+    folio_number = models.CharField(max_length=50)
+    file_name = models.CharField(max_length=255)
+    size = models.BigIntegerField(help_text="The size of the file in bytes.")
+    mtime_ns = models.BigIntegerField(
+        help_text="The modification time of the file in nanoseconds."
+    )
+    content_hash = models.CharField(
+        max_length=64, help_text="The SHA-256 hash of the file's contents."
+    )
+    min_ngram = models.IntegerField()
+    max_ngram = models.IntegerField()
+    index_scheme = models.CharField(
+        max_length=10,
+        choices=[("ngram", "N-gram documents"), ("stream", "Stream document")],
+        default="ngram",
+        help_text="The scheme in which the file's pitches were indexed.",
+    )
+    document_version = models.IntegerField(
+        default=0,
+        help_text="The version of the fields of the file's n-gram documents.",
+    )
+
+    def __str__(self) -> str:
+        return f"{self.folio_number} - {self.manuscript}"
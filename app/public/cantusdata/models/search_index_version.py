@@ -0,0 +1,22 @@
+from django.db import models
+
+
+class SearchIndexVersion(models.Model):
+    """
+    A version of a part of the Solr index, incremented whenever that part
+    of the index changes, so that search responses cached for an earlier
+    version are no longer used (see cantusdata.helpers.search_cache).
+
+    The key identifies the part of the index: the documents of a manuscript
+    ("manuscript:<id>"), the documents of all manuscripts ("collection"),
+    or the whole index ("all").
+    """
+
+    class Meta:
+        app_label = "cantusdata"
+
+    key = models.CharField(max_length=50, unique=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.version}"
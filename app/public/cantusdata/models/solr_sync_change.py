@@ -0,0 +1,32 @@
+from django.db import models
+
+
+class SolrSyncChange(models.Model):
+    """
+    A change to a manuscript, folio or chant whose Solr record has not been
+    synchronized yet, queued when Solr synchronization is deferred to the
+    Celery worker (see cantusdata.signals.solr_sync).
+
+    The manuscript is that of the changed object, whose cached search
+    responses are invalidated once the change is applied. It is recorded
+    with the change, since a deleted object can no longer be looked up.
+    """
+
+    class Meta:
+        app_label = "cantusdata"
+        ordering = ["id"]
+
+    class Operation(models.TextChoices):
+        UPDATE = "update", "Update"
+        DELETE = "delete", "Delete"
+
+    model_name = models.CharField(
+        max_length=20, help_text="The name of the model of the changed object."
+    )
+    object_id = models.IntegerField()
+    operation = models.CharField(max_length=10, choices=Operation.choices)
+    manuscript_id = models.IntegerField(blank=True, null=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.operation} {self.model_name} {self.object_id}"
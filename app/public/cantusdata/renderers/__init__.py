@@ -1,5 +1,6 @@
+from django.http import HttpResponse
 from rest_framework.settings import api_settings
-from rest_framework.renderers import TemplateHTMLRenderer
+from rest_framework.renderers import JSONRenderer, TemplateHTMLRenderer
 
 
 class MyHTMLRenderer(TemplateHTMLRenderer):
@@ -13,3 +14,13 @@ class MyHTMLRenderer(TemplateHTMLRenderer):
 templated_view_renderers = (MyHTMLRenderer,) + tuple(
     api_settings.DEFAULT_RENDERER_CLASSES
 )
+
+
+def render_json_response(data, status=200):
+    """
+    Renders data as the JSONRenderer of an APIView does, for async views
+    (which Django REST framework does not support).
+    """
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, content_type="application/json"
+    )
@@ -154,6 +154,28 @@ SOLR_SERVER = "http://solr:8983/solr/cantus_ultimus_1"
 SOLR_ADMIN = "http://solr:8983/solr/admin"
 SOLR_TEST_SERVER = "http://solr:8983/solr/cantus-test"
 
+# Requests to Solr are sent by a client shared by each process (see
+# cantusdata.helpers.solr_client). Timeouts and backoff are in seconds.
+SOLR_CLIENT_POOL_SIZE = int(os.environ.get("SOLR_CLIENT_POOL_SIZE", "10"))
+SOLR_CLIENT_CONNECT_TIMEOUT = float(os.environ.get("SOLR_CLIENT_CONNECT_TIMEOUT", "5"))
+SOLR_CLIENT_SELECT_TIMEOUT = float(os.environ.get("SOLR_CLIENT_SELECT_TIMEOUT", "10"))
+SOLR_CLIENT_UPDATE_TIMEOUT = float(os.environ.get("SOLR_CLIENT_UPDATE_TIMEOUT", "300"))
+SOLR_CLIENT_MAX_RETRIES = int(os.environ.get("SOLR_CLIENT_MAX_RETRIES", "3"))
+SOLR_CLIENT_RETRY_BACKOFF = float(os.environ.get("SOLR_CLIENT_RETRY_BACKOFF", "0.5"))
+
+# Route the read-only Solr endpoints (chant and folio sets, suggestions and
+# notation search) to their async views, which wait for Solr without
+# blocking a thread. Only enable this when the app is served over ASGI
+# (cantusdata.asgi): under WSGI, each async view runs in its own event loop.
+ASYNC_SOLR_VIEWS = os.environ.get("ASYNC_SOLR_VIEWS") == "True"
+
+# Defer the synchronization of Solr with saved and deleted models to the
+# Celery worker (see cantusdata.signals.solr_sync): changes are queued in
+# the database, and applied together SOLR_SYNC_DEBOUNCE seconds after the
+# first change of a burst of edits.
+SOLR_SYNC_DEFERRED = os.environ.get("SOLR_SYNC_DEFERRED") == "True"
+SOLR_SYNC_DEBOUNCE = float(os.environ.get("SOLR_SYNC_DEBOUNCE", "5"))
+
 LOGGING_CONFIG = None
 
 # AUTHENTICATION
@@ -177,3 +199,15 @@ CELERY_APP = "cantusdata"
 CELERY_TASK_TRACK_STARTED = True
 
 TEST_MEI_FILES_PATH = "cantusdata/test/core/helpers/mei_processing/test_mei_files"
+
+# The pitches of parsed MEI files are cached in this directory (see
+# cantusdata.helpers.mei_processing.mei_parse_cache). Set the environment
+# variable to an empty string to disable the cache.
+MEI_PARSE_CACHE_DIR = os.environ.get("MEI_PARSE_CACHE_DIR", "/code/mei-parse-cache")
+MEI_PARSE_CACHE_MAX_SIZE = 1024 * 1024 * 1024  # 1 GiB
+
+# Responses of search views are cached in the memory of each process for
+# up to SEARCH_CACHE_TTL seconds (see cantusdata.helpers.search_cache).
+# Set either variable to 0 to disable the cache.
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "1000"))
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", "3600"))
@@ -7,15 +7,36 @@ and Solr records, and exposes control for doing intensive DB manipulations
 >>> with solr_synchronizer.get_session():
 ...     # Create/update/destroy a bunch of Django models
 ...     # And Solr will be updated all at once
+
+When settings.SOLR_SYNC_DEFERRED is set, sessions only queue the changes
+in the database (see SolrSyncChange), and the Celery worker applies them
+in bulk, after a debounce interval (see apply_solr_changes), so that
+saving a model does not wait for Solr.
 """
 
 import contextlib
-import solr
+import datetime
+import itertools
 
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete
 from django.conf import settings
+from django.utils import timezone
+
+from ..models import Manuscript, Chant, Folio, SolrSyncChange
+from ..helpers.search_cache import bump_index_versions
+from ..helpers.solr_client import get_solr_client
+from ..helpers.solr_records import iter_solr_records
 
-from ..models import Manuscript, Chant, Folio
+# The Solr type of the records of each synchronized model
+SOLR_TYPES = {
+    Manuscript: "cantusdata_manuscript",
+    Folio: "cantusdata_folio",
+    Chant: "cantusdata_chant",
+}
+
+# The maximum number of records added by each update request
+UPDATE_BATCH_SIZE = 1000
 
 
 class SolrSynchronizer(object):
@@ -52,7 +73,10 @@ class SolrSynchronizer(object):
                 yield self._session
                 return
 
-        self._session = SynchronizationSession(self.solr_server_url)
+        if settings.SOLR_SYNC_DEFERRED:
+            self._session = DeferredSynchronizationSession(self.solr_server_url)
+        else:
+            self._session = SynchronizationSession(self.solr_server_url)
 
         try:
             yield self._session
@@ -84,8 +108,16 @@ class SolrSynchronizer(object):
     def chant_deleted(self, sender, instance, using, **kwargs):
         with self.get_session() as sess:
             sess.schedule_deletion(instance)
-            sess.schedule_update(instance.folio)
-            sess.schedule_update(instance.manuscript)
+
+            # When the chant is deleted along with its folio or manuscript,
+            # the parent is already gone and its own record gets deleted
+            parents = (
+                Folio.objects.filter(pk=instance.folio_id).first(),
+                Manuscript.objects.filter(pk=instance.manuscript_id).first(),
+            )
+            for parent in parents:
+                if parent is not None:
+                    sess.schedule_update(parent)
 
     # The handler for this is attached in CantusdataConfig.ready
     # so that it gets run when the config is changed for tests
@@ -98,31 +130,91 @@ class SolrSynchronizer(object):
 
 
 class SynchronizationSession(object):
+    """
+    Collects the changes to the Solr records of models, and sends them
+    when executed: the deletions are sent with the records to add in as
+    few update requests as possible (see SolrClient.update), the last of
+    which commits them. Records have stable ids (see e.g.
+    Chant.get_solr_id), so an updated record replaces the previous one.
+    """
+
     def __init__(self, solr_server_url):
         self.solr_server_url = solr_server_url
 
+        # The ids of the Solr records to delete. Ids are recorded when a
+        # deletion is scheduled, since the primary key of a deleted model
+        # is cleared once it is deleted.
         self._deletions = set()
+        self._deleted_manuscript_ids = set()
+        self._flusher = None
         self._additions = set()
 
         self._executing_flag = False
 
     def execute(self):
         additions = set(self._additions)
-        deletions = set(self._deletions)
         self._executing_flag = True
-        conn = solr.SolrConnection(self.solr_server_url)
+        conn = get_solr_client(self.solr_server_url)
 
-        for deleted in deletions:
-            deleted.delete_from_solr(conn)
-
-        conn.add_many([added.create_solr_record() for added in additions])
-        conn.commit()
+        if self._flusher is not None:
+            delete_ids = []
+            delete_queries = [self._flusher.get_delete_query()]
+        else:
+            delete_ids = sorted(self._deletions)
+            delete_queries = []
+        batches = _iter_batches(self._iter_records(additions), UPDATE_BATCH_SIZE)
+        batch = next(batches, [])
+        is_first_batch = True
+        while True:
+            # Deletions are sent with the first batch, and the commit
+            # with the last
+            next_batch = next(batches, None)
+            conn.update(
+                docs=batch,
+                delete_ids=delete_ids if is_first_batch else (),
+                delete_queries=delete_queries if is_first_batch else (),
+                commit=next_batch is None,
+            )
+            if next_batch is None:
+                break
+            batch = next_batch
+            is_first_batch = False
+        self._bump_index_versions(additions)
         self._executing_flag = False
 
-    def schedule_update(self, model, is_new=False):
-        if not is_new:
-            self._deletions.add(model)
+    def _iter_records(self, additions):
+        """
+        Build the records of the added models from the database, a model
+        type at a time (see iter_solr_records). The records of all models
+        are built after a full refresh.
+        """
+        for model_type in SOLR_TYPES:
+            if self._flusher is not None:
+                queryset = model_type.objects.all()
+            else:
+                ids = [model.id for model in additions if type(model) is model_type]
+                if not ids:
+                    continue
+                queryset = model_type.objects.filter(id__in=ids)
+            yield from iter_solr_records(queryset)
+
+    def _bump_index_versions(self, additions):
+        """Invalidate the cached search responses of the changed manuscripts"""
+        if self._flusher is not None:
+            bump_index_versions(None)
+            return
+        manuscript_ids = set(self._deleted_manuscript_ids)
+        for model in additions:
+            if isinstance(model, Manuscript):
+                manuscript_ids.add(model.id)
+            else:
+                manuscript_ids.add(model.manuscript_id)
+        manuscript_ids.discard(None)
+        if manuscript_ids:
+            bump_index_versions(manuscript_ids)
 
+    def schedule_update(self, model, is_new=False):
+        # The new record replaces the previous one, if any
         self._additions.add(model)
 
     def schedule_deletion(self, model):
@@ -133,22 +225,157 @@ class SynchronizationSession(object):
         except KeyError:
             pass
 
-        self._deletions.add(model)
+        self._deletions.add(model.get_solr_id(model.id))
+        if isinstance(model, Manuscript):
+            self._deleted_manuscript_ids.add(model.id)
+        else:
+            self._deleted_manuscript_ids.add(model.manuscript_id)
 
     def schedule_full_refresh(self):
         self._deletions.clear()
-        self._deletions.add(DbFlusher())
+        self._flusher = DbFlusher()
 
+        # The records of all models are built when the session is executed
         self._additions.clear()
-        self._additions.update(Manuscript.objects.all())
-        self._additions.update(Folio.objects.all())
-        self._additions.update(Chant.objects.all())
+
+
+class DeferredSynchronizationSession(object):
+    """
+    Collects the changes to the Solr records of models like a
+    SynchronizationSession, but queues them in the database when executed,
+    to be applied by the Celery worker (see apply_solr_changes). A full
+    refresh is still applied when the session is executed.
+    """
+
+    def __init__(self, solr_server_url):
+        self.solr_server_url = solr_server_url
+
+        # The last operation on each changed model, by model name and id
+        self._changes = {}
+        self._full_refresh = False
+
+        self._executing_flag = False
+
+    def execute(self):
+        self._executing_flag = True
+        if self._full_refresh:
+            session = SynchronizationSession(self.solr_server_url)
+            session.schedule_full_refresh()
+            session.execute()
+        elif self._changes:
+            queued_at = timezone.now()
+            SolrSyncChange.objects.bulk_create(
+                SolrSyncChange(
+                    model_name=model_name,
+                    object_id=object_id,
+                    operation=operation,
+                    manuscript_id=manuscript_id,
+                )
+                for (model_name, object_id), (
+                    operation,
+                    manuscript_id,
+                ) in self._changes.items()
+            )
+            # The worker can only see the changes once they are committed
+            transaction.on_commit(lambda: schedule_solr_sync(queued_at))
+        self._executing_flag = False
+
+    def schedule_update(self, model, is_new=False):
+        self._schedule(model, SolrSyncChange.Operation.UPDATE)
+
+    def schedule_deletion(self, model):
+        self._schedule(model, SolrSyncChange.Operation.DELETE)
+
+    def schedule_full_refresh(self):
+        self._changes.clear()
+        self._full_refresh = True
+
+    def _schedule(self, model, operation):
+        manuscript_id = (
+            model.id if isinstance(model, Manuscript) else model.manuscript_id
+        )
+        self._changes[(model._meta.model_name, model.id)] = (operation, manuscript_id)
+
+
+def schedule_solr_sync(queued_at):
+    """
+    Schedule the Celery worker to apply the queued changes after the
+    debounce interval, unless changes queued shortly before are still
+    waiting for it: the changes of a burst of edits are then applied
+    together. Changes queued before the interval are assumed to have been
+    missed by the worker (e.g. if applying them failed), and are applied
+    with the new ones.
+
+    :param queued_at: The time at which the new changes were queued
+    """
+    from ..tasks import solr_sync_task
+
+    debounce = datetime.timedelta(seconds=settings.SOLR_SYNC_DEBOUNCE)
+    if SolrSyncChange.objects.filter(
+        created__lt=queued_at, created__gte=queued_at - debounce
+    ).exists():
+        return
+    solr_sync_task.apply_async(countdown=settings.SOLR_SYNC_DEBOUNCE)
+
+
+def apply_solr_changes(solr_server_url=None):
+    """
+    Apply the queued changes to Solr with a single commit. Changes to the
+    same model are collapsed to the last one. The changes are locked until
+    they are applied, so that concurrent calls apply them in order.
+
+    :return: The number of changes applied
+    """
+    if solr_server_url is None:
+        solr_server_url = settings.SOLR_SERVER
+    models_by_name = {model._meta.model_name: model for model in SOLR_TYPES}
+    with transaction.atomic():
+        changes = list(SolrSyncChange.objects.select_for_update())
+        if not changes:
+            return 0
+        last_changes = {
+            (change.model_name, change.object_id): change for change in changes
+        }
+        session = SynchronizationSession(solr_server_url)
+        updated_ids = {model: [] for model in SOLR_TYPES}
+        for change in last_changes.values():
+            model = models_by_name[change.model_name]
+            if change.operation == SolrSyncChange.Operation.DELETE:
+                # The deleted model can no longer be looked up: rebuild the
+                # fields which its deletion needs
+                if model is Manuscript:
+                    session.schedule_deletion(Manuscript(id=change.object_id))
+                else:
+                    session.schedule_deletion(
+                        model(id=change.object_id, manuscript_id=change.manuscript_id)
+                    )
+            else:
+                updated_ids[model].append(change.object_id)
+        for model, ids in updated_ids.items():
+            # Models deleted since they were updated are no longer found.
+            # Their records are built from the database when the session
+            # is executed, so only their manuscript is loaded.
+            updated_models = model.objects.filter(id__in=ids)
+            if model is not Manuscript:
+                updated_models = updated_models.only("id", "manuscript_id")
+            for updated in updated_models:
+                session.schedule_update(updated)
+        session.execute()
+        SolrSyncChange.objects.filter(id__in=[change.id for change in changes]).delete()
+    return len(changes)
+
+
+def _iter_batches(items, batch_size):
+    """Split an iterable into lists of at most batch_size items"""
+    iterator = iter(items)
+    while batch := list(itertools.islice(iterator, batch_size)):
+        yield batch
 
 
 class DbFlusher(object):
-    def delete_from_solr(self, conn):
-        conn.delete_query(
-            "type:cantusdata_chant OR type:cantusdata_folio OR type:cantusdata_manuscript"
+    def get_delete_query(self):
+        return " OR ".join(
+            "type:{0}".format(solr_type) for solr_type in SOLR_TYPES.values()
         )
 
 
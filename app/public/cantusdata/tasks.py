@@ -1,4 +1,7 @@
 from cantusdata.celery import app
+from cantusdata.models import SolrSyncChange
+from cantusdata.signals.solr_sync import apply_solr_changes
+from django.conf import settings
 from django.core.management import call_command
 from celery.signals import task_received
 from django_celery_results.models import TaskResult
@@ -26,6 +29,14 @@ def map_folio_task(self, *args, **kwargs):
     )
 
 
+@app.task(name="sync-solr")
+def solr_sync_task():
+    apply_solr_changes()
+    # Changes committed while the others were applied wait for another run
+    if SolrSyncChange.objects.exists():
+        solr_sync_task.apply_async(countdown=settings.SOLR_SYNC_DEBOUNCE)
+
+
 @task_received.connect
 def task_received_handler(sender=None, headers=None, body=None, **kwargs):
     request = kwargs["request"]
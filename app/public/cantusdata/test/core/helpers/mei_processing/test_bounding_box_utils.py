@@ -3,6 +3,7 @@ from typing import List, Tuple
 from cantusdata.helpers.mei_processing.bounding_box_utils import (
     combine_bounding_boxes,
     combine_bounding_boxes_single_system,
+    BoundingBoxIndex,
     stringify_bounding_boxes,
 )
 from cantusdata.helpers.mei_processing.mei_parsing_types import Zone
@@ -56,6 +57,28 @@ class TestBoundingBoxUtils(TestCase):
                 combined_boxes_multi_sys, expected_combined_boxes_multi_sys
             )
 
+    def test_bounding_box_index(self) -> None:
+        bounding_boxes: List[Tuple[Zone, int]] = [
+            ({"coordinates": (0, 0, 1, 1), "rotate": 0.0}, 1),
+            ({"coordinates": (8, 8, 9, 10), "rotate": 0.0}, 1),
+            ({"coordinates": (1, 1, 2, 2), "rotate": 0.0}, 1),
+            ({"coordinates": (4, 3, 5, 6), "rotate": 0.0}, 2),
+            ({"coordinates": (2, 1, 3, 2), "rotate": 0.0}, 2),
+            ({"coordinates": (3, 3, 4, 4), "rotate": 0.0}, 4),
+            ({"coordinates": (5, 0, 7, 3), "rotate": 0.0}, 4),
+        ]
+        index = BoundingBoxIndex.from_bounding_boxes(bounding_boxes)
+        with self.subTest("Test all ranges against combine_bounding_boxes"):
+            for start in range(len(bounding_boxes)):
+                for end in range(start + 1, len(bounding_boxes) + 1):
+                    self.assertEqual(
+                        index.combine(start, end),
+                        combine_bounding_boxes(bounding_boxes[start:end]),
+                    )
+        with self.subTest("Test decreasing system numbers"):
+            with self.assertRaises(ValueError):
+                BoundingBoxIndex.from_bounding_boxes(list(reversed(bounding_boxes)))
+
     def test_stringify_bounding_boxes(self) -> None:
         bounding_boxes: List[Zone] = [
             {"coordinates": (0, 0, 1, 1), "rotate": 0},
@@ -0,0 +1,117 @@
+import os
+import pickle
+import shutil
+import tempfile
+from os import path
+
+import numpy as np
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.mei_processing.mei_parse_cache import MEIParseCache
+from cantusdata.helpers.mei_processing.pitch_sequence import PitchSequence
+
+TEST_MEI_FILE = path.join(
+    settings.TEST_MEI_FILES_PATH,
+    "123723",
+    "cdn-hsmu-m2149l4_001r.mei",
+)
+
+
+class MEIParseCacheTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir)
+
+    def test_tokenizer_uses_cache(self) -> None:
+        """
+        The pitch sequence of a file parsed by an MEITokenizer is added to
+        the cache, and later tokenizers load it from the cache.
+        """
+        uncached_sequence = MEITokenizer(
+            TEST_MEI_FILE, min_ngram=1, max_ngram=1
+        ).pitch_sequence
+        self.assertEqual(os.listdir(self.cache_dir), [])
+        with override_settings(MEI_PARSE_CACHE_DIR=self.cache_dir):
+            MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=1)
+            self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+            cached_sequence = MEITokenizer(
+                TEST_MEI_FILE, min_ngram=1, max_ngram=1
+            ).pitch_sequence
+            np.testing.assert_array_equal(
+                cached_sequence.coordinates, uncached_sequence.coordinates
+            )
+            self.assertEqual(cached_sequence.tokens(), uncached_sequence.tokens())
+            with self.subTest("Test the sequence is loaded from the cache"):
+                cache = MEIParseCache(self.cache_dir, max_size=1024 * 1024)
+                empty_sequence = PitchSequence([], [], [], [], [], [])
+                cache.store(cache.get_key(TEST_MEI_FILE), empty_sequence)
+                tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=1)
+                self.assertEqual(len(tokenizer.pitch_sequence), 0)
+                with self.subTest("Test use_cache=False"):
+                    tokenizer = MEITokenizer(
+                        TEST_MEI_FILE, min_ngram=1, max_ngram=1, use_cache=False
+                    )
+                    self.assertEqual(
+                        len(tokenizer.pitch_sequence), len(uncached_sequence)
+                    )
+
+    def test_load_invalid_entry(self) -> None:
+        """
+        Entries that cannot be loaded are logged and removed from the cache.
+        """
+        cache = MEIParseCache(self.cache_dir, max_size=1024 * 1024)
+        invalid_entries = {
+            "truncated": pickle.dumps(
+                PitchSequence([0], [3], [1], [True], [False], [0, 0, 0, 0])
+            )[:-10],
+            "not_a_pickle": b"not a pickle",
+            "wrong_type": pickle.dumps({"pitch_class": [0]}),
+        }
+        for key, entry_bytes in invalid_entries.items():
+            with self.subTest(key=key):
+                entry_path = path.join(self.cache_dir, f"{key}.pickle")
+                with open(entry_path, "wb") as entry_file:
+                    entry_file.write(entry_bytes)
+                with self.assertLogs(
+                    "cantusdata.helpers.mei_processing.mei_parse_cache", "WARNING"
+                ):
+                    self.assertIsNone(cache.load(key))
+                self.assertFalse(cache.contains(key))
+
+    def test_get_key(self) -> None:
+        """
+        Files with the same contents have the same key, and files with
+        different contents have different keys.
+        """
+        cache = MEIParseCache(self.cache_dir, max_size=1024 * 1024)
+        copied_file = path.join(self.cache_dir, "copy.mei")
+        shutil.copy(TEST_MEI_FILE, copied_file)
+        self.assertEqual(cache.get_key(copied_file), cache.get_key(TEST_MEI_FILE))
+        with open(copied_file, "a", encoding="utf-8") as mei_file:
+            mei_file.write("\n")
+        self.assertNotEqual(cache.get_key(copied_file), cache.get_key(TEST_MEI_FILE))
+
+    def test_evict(self) -> None:
+        """
+        When the cache is full, the least recently used entries are evicted.
+        """
+        entry = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=1).pitch_sequence
+        unbounded_cache = MEIParseCache(self.cache_dir, max_size=1024 * 1024 * 1024)
+        unbounded_cache.store("a", entry)
+        _, entry_size = unbounded_cache.get_stats()
+        cache = MEIParseCache(self.cache_dir, max_size=2 * entry_size)
+        cache.store("b", entry)
+        # Make "a" the most recently used entry
+        os.utime(path.join(self.cache_dir, "b.pickle"), ns=(0, 0))
+        self.assertIsNotNone(cache.load("a"))
+        cache.store("c", entry)
+        self.assertTrue(cache.contains("a"))
+        self.assertFalse(cache.contains("b"))
+        self.assertTrue(cache.contains("c"))
+        self.assertEqual(cache.get_stats(), (2, 2 * entry_size))
+        self.assertEqual(cache.purge(), 2)
+        self.assertEqual(cache.get_stats(), (0, 0))
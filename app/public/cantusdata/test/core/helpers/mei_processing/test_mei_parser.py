@@ -1,5 +1,5 @@
 from unittest import TestCase
-from os import path
+from os import path, listdir
 from cantusdata.settings import BASE_DIR
 from cantusdata.helpers.mei_processing.mei_parser import (
     MEIParser,
@@ -186,6 +186,28 @@ class MEIParserTestCase(TestCase):
             }
             self.assertEqual(syllables[-1], expected_last_syllable)
 
+    def test_mei_parser_streaming(self) -> None:
+        mei_files_dir = path.join(
+            BASE_DIR,
+            "cantusdata",
+            "test",
+            "core",
+            "helpers",
+            "mei_processing",
+            "test_mei_files",
+            "123723",
+        )
+        for mei_file in sorted(listdir(mei_files_dir)):
+            with self.subTest(mei_file=mei_file):
+                mei_path = path.join(mei_files_dir, mei_file)
+                parser = MEIParser(mei_path)
+                streaming_parser = MEIParser(mei_path, streaming=True)
+                self.assertEqual(streaming_parser.zones, parser.zones)
+                self.assertEqual(streaming_parser.syllables, parser.syllables)
+                self.assertEqual(
+                    list(streaming_parser.iter_syllables()), parser.syllables
+                )
+
     def test_get_contour_from_interval(self) -> None:
         self.assertEqual(get_contour_from_interval(0), "r")
         self.assertEqual(get_contour_from_interval(1), "u")
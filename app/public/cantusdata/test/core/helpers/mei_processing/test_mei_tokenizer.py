@@ -1,11 +1,20 @@
 from unittest import TestCase
-from os import path
+from os import path, listdir
+from tempfile import TemporaryDirectory
 import json
 from typing import List, cast
+import numpy as np
 from django.conf import settings
-from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.mei_processing.mei_parser import MEIParser
+from cantusdata.helpers.mei_processing.pitch_sequence import PitchSequence
+from cantusdata.helpers.mei_processing.mei_tokenizer import (
+    MEITokenizer,
+    get_ngram_document_id,
+    get_stream_document_id,
+)
 from cantusdata.helpers.mei_processing.mei_parsing_types import NgramDocument
 from cantusdata.helpers.neume_helpers import NEUME_GROUPS, NeumeName
+from cantusdata.helpers.search_utils import get_relative_pitch_names
 
 TEST_MEI_FILE = path.join(
     settings.TEST_MEI_FILES_PATH,
@@ -13,6 +22,38 @@ TEST_MEI_FILE = path.join(
     "cdn-hsmu-m2149l4_001r.mei",
 )
 
+# An MEI file with neume components that have no pitch name (at the start
+# and in the middle of a neume), an empty neume, and system breaks between
+# and within syllables
+INCOMPLETE_MEI = """<?xml version="1.0" encoding="UTF-8"?>
+<mei xmlns="http://www.music-encoding.org/ns/mei">
+  <music>
+    <facsimile>
+      <surface>
+        <zone xml:id="z1" ulx="1" uly="2" lrx="3" lry="4"/>
+      </surface>
+    </facsimile>
+    <body><mdiv><score><section><staff><layer>
+      <syllable>
+        <syl>a</syl>
+        <neume><nc facs="#z1" pname="c" oct="3"/><nc pname="d" oct="3"/></neume>
+        <neume><nc oct="3"/><nc pname="e" oct="3"/></neume>
+        <sb/>
+        <neume><nc pname="f" oct="3"/><nc oct="3"/><nc pname="g" oct="3"/></neume>
+      </syllable>
+      <sb/>
+      <syllable>
+        <neume/>
+        <neume><nc pname="a" oct="3"/></neume>
+      </syllable>
+      <syllable>
+        <neume><nc pname="b" oct="2"/><nc pname="c" oct="3"/></neume>
+      </syllable>
+    </layer></staff></section></score></mdiv></body>
+  </music>
+</mei>
+"""
+
 # Switch NEUME_GROUPS keys and values
 NEUME_NAME_CONTOUR_MAPPER = {v: k for k, v in NEUME_GROUPS.items()}
 
@@ -67,11 +108,16 @@ def prepare_tokenizer_results(
     with expected results by:
     - removing the unique ID from generated ngram documents
     - removing the "type" field from generated ngram documents
+    - removing the start position of the ngram from generated ngram documents
+    - removing the transposition-normalized pitch names from generated ngram
+      documents (see test_pitch_names_transposed)
     """
     ngram_docs = tokenizer.create_ngram_documents()
     for doc in ngram_docs:
         doc.pop("id")
         doc.pop("type")
+        doc.pop("ngram_start")
+        doc.pop("pitch_names_transposed")
     return ngram_docs
 
 
@@ -251,3 +297,164 @@ class MEITokenizerTestCase(TestCase):
                 pitch_4gram,
                 ngram_docs_3_5,
             )
+
+    def test_parse_pitch_sequence(self) -> None:
+        """
+        The PitchSequence read from the neume components of an MEI file is
+        the same as the one built from the syllables parsed by an MEIParser.
+        """
+        mei_files_dir = path.join(settings.TEST_MEI_FILES_PATH, "123723")
+        mei_paths = [
+            path.join(mei_files_dir, mei_file)
+            for mei_file in sorted(listdir(mei_files_dir))
+        ]
+        temp_dir = TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        incomplete_mei_path = path.join(temp_dir.name, "incomplete.mei")
+        with open(incomplete_mei_path, "w", encoding="utf-8") as mei_file:
+            mei_file.write(INCOMPLETE_MEI)
+        mei_paths.append(incomplete_mei_path)
+        for mei_path in mei_paths:
+            with self.subTest(mei_file=path.basename(mei_path)):
+                sequence = MEITokenizer(
+                    mei_path, min_ngram=1, max_ngram=1
+                ).pitch_sequence
+                expected_sequence = PitchSequence.from_syllables(
+                    MEIParser(mei_path).syllables
+                )
+                for attribute in (
+                    "pitch_class",
+                    "octave",
+                    "system",
+                    "neume_start",
+                    "has_interval",
+                    "semitone_interval",
+                    "interval",
+                    "contour",
+                    "neume_name",
+                    "coordinates",
+                ):
+                    np.testing.assert_array_equal(
+                        getattr(sequence, attribute),
+                        getattr(expected_sequence, attribute),
+                        err_msg=attribute,
+                    )
+
+    def test_lazy_parser(self) -> None:
+        """
+        The syllables of the MEI file are only parsed by an MEIParser
+        when they are used.
+        """
+        tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        self.assertNotIn("parser", tokenizer.__dict__)
+        parser = MEIParser(TEST_MEI_FILE)
+        self.assertEqual(tokenizer.syllables, parser.syllables)
+        self.assertEqual(tokenizer.parser.zones, parser.zones)
+
+    def test_iter_ngram_documents(self) -> None:
+        tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        ngram_docs_iter = tokenizer.iter_ngram_documents()
+        with self.subTest("Documents are generated lazily"):
+            self.assertNotIsInstance(ngram_docs_iter, list)
+        with self.subTest("Same documents as create_ngram_documents"):
+            iterated_docs = list(ngram_docs_iter)
+            created_docs = tokenizer.create_ngram_documents()
+            self.assertEqual(iterated_docs, created_docs)
+
+    def test_ngram_document_ids(self) -> None:
+        tokenizer = MEITokenizer(
+            TEST_MEI_FILE, min_ngram=1, max_ngram=5, manuscript_id="1", folio="001r"
+        )
+        doc_ids = [doc["id"] for doc in tokenizer.create_ngram_documents()]
+        with self.subTest("IDs are unique"):
+            self.assertEqual(len(doc_ids), len(set(doc_ids)))
+        with self.subTest("IDs are the same when the file is tokenized again"):
+            retokenizer = MEITokenizer(
+                TEST_MEI_FILE,
+                min_ngram=1,
+                max_ngram=5,
+                manuscript_id="1",
+                folio="001r",
+                streaming=True,
+            )
+            self.assertEqual(
+                [doc["id"] for doc in retokenizer.create_ngram_documents()], doc_ids
+            )
+        with self.subTest("IDs depend on the manuscript and folio"):
+            other_folio_tokenizer = MEITokenizer(
+                TEST_MEI_FILE, min_ngram=1, max_ngram=5, manuscript_id="1", folio="001v"
+            )
+            self.assertTrue(
+                set(doc_ids).isdisjoint(
+                    doc["id"] for doc in other_folio_tokenizer.create_ngram_documents()
+                )
+            )
+        with self.subTest("IDs of ngrams of pitches and of neumes"):
+            self.assertEqual(
+                doc_ids[0], get_ngram_document_id("1", "001r", 0, 1, "pitch")
+            )
+            self.assertNotEqual(
+                get_ngram_document_id("1", "001r", 0, 2, "pitch"),
+                get_ngram_document_id("1", "001r", 0, 2, "neume"),
+            )
+
+    def test_ngram_start(self) -> None:
+        """
+        The ngram_start field of each ngram document is the index of the
+        first pitch of the ngram in the file.
+        """
+        tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        pitch_names = tokenizer.pitch_sequence.tokens().pitch_names
+        for doc in tokenizer.iter_ngram_documents():
+            doc_pitch_names = doc["pitch_names"].split("_")
+            start = doc["ngram_start"]
+            self.assertEqual(
+                pitch_names[start : start + len(doc_pitch_names)], doc_pitch_names
+            )
+
+    def test_pitch_names_transposed(self) -> None:
+        """
+        The pitch_names_transposed field of each ngram document contains its
+        pitch names relative to the first pitch name.
+        """
+        tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        for doc in tokenizer.iter_ngram_documents():
+            self.assertEqual(
+                doc["pitch_names_transposed"],
+                "_".join(get_relative_pitch_names(doc["pitch_names"].split("_"))),
+            )
+
+    def test_create_stream_document(self) -> None:
+        tokenizer = MEITokenizer(
+            TEST_MEI_FILE, min_ngram=1, max_ngram=1, manuscript_id="1", folio="001r"
+        )
+        stream_doc = tokenizer.create_stream_document()
+        num_pitches = len(tokenizer.pitch_sequence)
+        with self.subTest("Streams have one token per pitch"):
+            for stream in (
+                stream_doc["pitch_stream"],
+                stream_doc["contour_stream"],
+                stream_doc["semitone_interval_stream"],
+                stream_doc["interval_stream"],
+            ):
+                self.assertEqual(len(stream.split()), num_pitches)
+            self.assertEqual(
+                len(json.loads(stream_doc["pitch_boxes_json"])), num_pitches
+            )
+        with self.subTest("Neume stream has one token per neume"):
+            self.assertEqual(
+                len(stream_doc["neume_stream"].split()),
+                len(tokenizer.flattened_neumes),
+            )
+            self.assertEqual(
+                len(stream_doc["neume_starts"].split()),
+                len(tokenizer.flattened_neumes),
+            )
+        with self.subTest("Stream tokens match those of the pitch sequence"):
+            tokens = tokenizer.pitch_sequence.tokens()
+            self.assertEqual(stream_doc["pitch_stream"].split(), tokens.pitch_names)
+            # The last pitch has no following interval
+            self.assertEqual(stream_doc["contour_stream"].split()[-1], "x")
+        with self.subTest("Document ID"):
+            self.assertEqual(stream_doc["id"], get_stream_document_id("1", "001r"))
+            self.assertNotEqual(stream_doc["id"], get_stream_document_id("1", "001v"))
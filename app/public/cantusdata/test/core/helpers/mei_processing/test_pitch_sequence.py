@@ -0,0 +1,107 @@
+from unittest import TestCase
+from os import path
+import numpy as np
+from django.conf import settings
+from cantusdata.helpers.mei_processing.mei_parser import (
+    MEIParser,
+    PITCH_CLASS,
+    get_melodic_interval,
+)
+from cantusdata.helpers.mei_processing.pitch_sequence import (
+    PitchSequence,
+    get_melodic_intervals,
+    get_neume_name_codes,
+    CONTOUR_CODES,
+)
+from cantusdata.helpers.neume_helpers import NEUME_GROUPS, NEUME_NAMES
+
+TEST_MEI_FILE = path.join(
+    settings.TEST_MEI_FILES_PATH,
+    "123723",
+    "cdn-hsmu-m2149l4_001r.mei",
+)
+
+
+class PitchSequenceTestCase(TestCase):
+    def test_from_syllables(self) -> None:
+        """
+        A PitchSequence built from the syllables of a parsed MEI file contains
+        the same information as the neume components of those syllables.
+        """
+        syllables = MEIParser(TEST_MEI_FILE).syllables
+        sequence = PitchSequence.from_syllables(syllables)
+        neume_components = [
+            (nc, neume["neume_name"] if nc_idx == 0 else None, neume["system"])
+            for syllable in syllables
+            for neume in syllable["neumes"]
+            for nc_idx, nc in enumerate(neume["neume_components"])
+        ]
+        self.assertEqual(len(sequence), len(neume_components))
+        tokens = sequence.tokens()
+        for idx, (nc, neume_name, system) in enumerate(neume_components):
+            with self.subTest(idx=idx):
+                self.assertEqual(tokens.pitch_names[idx], nc["pname"])
+                self.assertEqual(sequence.octave[idx], nc["octave"])
+                self.assertEqual(sequence.system[idx], system)
+                self.assertEqual(
+                    tuple(sequence.coordinates[idx].tolist()),
+                    nc["bounding_box"]["coordinates"],
+                )
+                self.assertEqual(tokens.neume_names[idx], neume_name)
+                self.assertEqual(tokens.contours[idx], nc["contour"])
+                if nc["semitone_interval"] is None:
+                    self.assertIsNone(tokens.semitone_intervals[idx])
+                    self.assertIsNone(tokens.intervals[idx])
+                else:
+                    self.assertEqual(
+                        tokens.semitone_intervals[idx], str(nc["semitone_interval"])
+                    )
+                    self.assertEqual(tokens.intervals[idx], str(nc["interval"]))
+
+    def test_get_melodic_intervals(self) -> None:
+        """
+        The vectorized get_melodic_intervals agrees with get_melodic_interval
+        for every starting pitch and every interval up to two octaves.
+        """
+        # 6-semitone intervals only occur from b's and f's
+        pitch_names_and_intervals = [
+            (pname, interval)
+            for pname in PITCH_CLASS
+            for interval in range(-24, 25)
+            if interval % 12 != 6 or pname in ("b", "f")
+        ]
+        melodic_intervals = get_melodic_intervals(
+            np.array([interval for _, interval in pitch_names_and_intervals]),
+            np.array([PITCH_CLASS[pname] for pname, _ in pitch_names_and_intervals]),
+        )
+        for (pname, interval), melodic_interval in zip(
+            pitch_names_and_intervals, melodic_intervals.tolist()
+        ):
+            with self.subTest(pname=pname, interval=interval):
+                self.assertEqual(
+                    melodic_interval, get_melodic_interval(interval, pname)
+                )
+
+    def test_get_neume_name_codes(self) -> None:
+        """
+        Each contour in NEUME_GROUPS is mapped to its neume name, and
+        neumes with other contours are compound neumes.
+        """
+        contours = list(NEUME_GROUPS) + ["uuu", "rdu", "ddddd", "uuuuuu"]
+        expected_names = list(NEUME_GROUPS.values()) + ["compound"] * 4
+        contour_codes = []
+        neume_starts = []
+        for contour in contours:
+            # Each neume is followed by an interval to the next neume
+            contour_codes.extend([CONTOUR_CODES[c] for c in contour] + [1])
+            neume_starts.extend([True] + [False] * len(contour))
+        neume_name_codes = get_neume_name_codes(
+            np.array(contour_codes, dtype=np.int8), np.array(neume_starts)
+        )
+        self.assertEqual(
+            [NEUME_NAMES[code] for code in neume_name_codes.tolist() if code >= 0],
+            expected_names,
+        )
+        self.assertTrue(
+            np.all((neume_name_codes >= 0) == np.array(neume_starts)),
+        )
@@ -0,0 +1,153 @@
+from unittest import TestCase
+from os import path
+import json
+
+import numpy as np
+from django.conf import settings
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.notation_approximate_search import (
+    ApproximateMatch,
+    ApproximateSearch,
+    align,
+    split_disjoint,
+)
+from cantusdata.helpers.notation_query_planner import SolrQueryResultItem
+from cantusdata.test.core.helpers.test_notation_query_planner import (
+    InMemoryNgramSource,
+)
+
+TEST_MEI_FILE = path.join(
+    settings.TEST_MEI_FILES_PATH,
+    "123723",
+    "cdn-hsmu-m2149l4_001r.mei",
+)
+
+
+def edit_distance(a: list[str], b: list[str]) -> int:
+    previous_row = list(range(len(b) + 1))
+    for i, a_term in enumerate(a, start=1):
+        row = [i]
+        for j, b_term in enumerate(b, start=1):
+            row.append(
+                min(
+                    previous_row[j - 1] + (a_term != b_term),
+                    previous_row[j] + 1,
+                    row[j - 1] + 1,
+                )
+            )
+        previous_row = row
+    return previous_row[-1]
+
+
+class NotationApproximateSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        self.tokens = tokenizer.pitch_sequence.tokens()
+        docs: list[SolrQueryResultItem] = []
+        for ngram_doc in tokenizer.iter_ngram_documents():
+            docs.append(
+                {
+                    "manuscript_id": 1,
+                    "folio": "001r",
+                    "image_uri": "",
+                    "pitch_names": ngram_doc["pitch_names"],
+                    "contour": ngram_doc["contour"],
+                    "semitone_intervals": ngram_doc["semitone_intervals"],
+                    "intervals": ngram_doc["intervals"],
+                    "neume_names": ngram_doc.get("neume_names", ""),
+                    "location_json": json.loads(ngram_doc["location_json"]),
+                    "ngram_start": ngram_doc["ngram_start"],
+                }
+            )
+        self.source = InMemoryNgramSource(docs)
+
+    def test_split_disjoint(self) -> None:
+        q_terms = list("abcdefg")
+        with self.subTest("Split into max_distance + 1 pieces"):
+            self.assertEqual(
+                split_disjoint(q_terms, "pitch_names", 2, 5),
+                [(0, list("abc")), (3, list("de")), (5, list("fg"))],
+            )
+        with self.subTest("Split into pieces that fit in the n-grams"):
+            self.assertEqual(
+                split_disjoint(q_terms, "pitch_names", 0, 3),
+                [(0, list("abc")), (3, list("de")), (5, list("fg"))],
+            )
+        with self.subTest("Query too short for the maximum distance"):
+            with self.assertRaises(ValueError):
+                split_disjoint(q_terms, "pitch_names", 3, 5)
+
+    def test_align(self) -> None:
+        # Query "b c d e" in windows with an exact match, a substitution,
+        # an insertion and a deletion (padded with -1)
+        q_codes = np.array([1, 2, 3, 4])
+        windows = np.array(
+            [
+                [0, 1, 2, 3, 4, 0],
+                [1, 2, 5, 4, 0, 0],
+                [1, 2, 6, 3, 4, 0],
+                [0, 1, 3, 4, -1, -1],
+            ]
+        )
+        distances, starts, ends = align(q_codes, windows, np.array([6, 6, 6, 4]))
+        self.assertEqual(distances.tolist(), [0, 1, 1, 1])
+        self.assertEqual(starts.tolist(), [1, 0, 0, 1])
+        self.assertEqual(ends.tolist(), [5, 4, 5, 4])
+
+    def assert_matches(
+        self, q_terms: list[str], q_type: str, max_distance: int, expected_start: int
+    ) -> list[ApproximateMatch]:
+        """
+        Asserts that an ApproximateSearch finds a match starting at the
+        expected position, and that the pitch names of all its matches
+        are within max_distance of the query.
+        """
+        search = ApproximateSearch(self.source, q_terms, q_type, 5, max_distance)
+        matches, complete = search.find_matches()
+        self.assertTrue(complete)
+        self.assertIn(expected_start, [match.start for match in matches])
+        self.assertEqual(
+            [match.distance for match in matches],
+            sorted(match.distance for match in matches),
+        )
+        result_items = search.create_result_items(matches)
+        for match, item in zip(matches, result_items):
+            self.assertEqual(item["ngram_start"], match.start)
+            self.assertEqual(
+                item["pitch_names"],
+                "_".join(self.tokens.pitch_names[match.start : match.end]),
+            )
+            if q_type == "pitch_names":
+                self.assertLessEqual(
+                    edit_distance(q_terms, item["pitch_names"].split("_")),
+                    match.distance,
+                )
+        return matches
+
+    def test_pitch_names_query(self) -> None:
+        pitch_names = self.tokens.pitch_names
+        q_terms = pitch_names[20:32]
+        with self.subTest("Distance 0"):
+            matches = self.assert_matches(q_terms, "pitch_names", 0, 20)
+            expected_starts = [
+                i
+                for i in range(len(pitch_names) - len(q_terms) + 1)
+                if pitch_names[i : i + len(q_terms)] == q_terms
+            ]
+            self.assertEqual([match.start for match in matches], expected_starts)
+        with self.subTest("Substitution"):
+            substituted = q_terms[:5] + ["a" if q_terms[5] != "a" else "b"]
+            self.assert_matches(substituted + q_terms[6:], "pitch_names", 1, 20)
+        with self.subTest("Insertion and deletion"):
+            edited = q_terms[:3] + ["g"] + q_terms[3:8] + q_terms[9:]
+            matches = self.assert_matches(edited, "pitch_names", 2, 20)
+            match = next(match for match in matches if match.start == 20)
+            self.assertEqual(match.end, 32)
+
+    def test_contour_query(self) -> None:
+        contours = [str(contour) for contour in self.tokens.contours[20:31]]
+        edited = contours[:4] + ["r" if contours[4] != "r" else "u"] + contours[5:]
+        matches = self.assert_matches(edited, "contour", 1, 20)
+        match = next(match for match in matches if match.start == 20)
+        self.assertEqual(match.end, 32)
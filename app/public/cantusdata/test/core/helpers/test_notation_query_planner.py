@@ -0,0 +1,277 @@
+from unittest import TestCase
+from os import path
+from typing import Collection, Optional
+import json
+
+from django.conf import settings
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.notation_query_planner import (
+    LongQueryPlanner,
+    PieceQuery,
+    SolrQueryResultItem,
+    merge_boxes,
+    split_query,
+)
+from cantusdata.helpers.search_utils import get_relative_pitch_names
+
+TEST_MEI_FILE = path.join(
+    settings.TEST_MEI_FILES_PATH,
+    "123723",
+    "cdn-hsmu-m2149l4_001r.mei",
+)
+
+
+class InMemoryNgramSource:
+    """
+    An NgramSource that fetches documents from a list, counting the
+    number of requests made to it.
+    """
+
+    def __init__(self, docs: list[SolrQueryResultItem]) -> None:
+        self.docs = docs
+        self.num_requests = 0
+
+    def count(self, piece_queries: list[PieceQuery]) -> list[int]:
+        self.num_requests += 1
+        return [len(self._match(piece_query, None)) for piece_query in piece_queries]
+
+    def fetch(
+        self, piece_query: PieceQuery, folios: Optional[Collection[str]], rows: int
+    ) -> list[SolrQueryResultItem]:
+        self.num_requests += 1
+        return self._match(piece_query, folios)[:rows]
+
+    def fetch_pitch_pairs(
+        self, positions: Collection[tuple[str, int]]
+    ) -> list[SolrQueryResultItem]:
+        self.num_requests += 1
+        return [
+            doc
+            for doc in self.docs
+            if doc["pitch_names"].count("_") == 1
+            and (doc["folio"], doc["ngram_start"]) in positions
+        ]
+
+    def _match(
+        self, piece_query: PieceQuery, folios: Optional[Collection[str]]
+    ) -> list[SolrQueryResultItem]:
+        return [
+            doc
+            for doc in self.docs
+            if self._get_field(doc, piece_query.field)
+            in piece_query.value.strip("()").split(" OR ")
+            and (folios is None or doc["folio"] in folios)
+        ]
+
+    def _get_field(self, doc: SolrQueryResultItem, field: str) -> Optional[str]:
+        # pitch_names_transposed is indexed but not stored, so it is
+        # derived from the pitch names of the document
+        if field == "pitch_names_transposed":
+            return "_".join(get_relative_pitch_names(doc["pitch_names"].split("_")))
+        value = doc.get(field)
+        return str(value) if value is not None else None
+
+
+class NotationQueryPlannerTestCase(TestCase):
+    def setUp(self) -> None:
+        tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        self.tokens = tokenizer.pitch_sequence.tokens()
+        docs: list[SolrQueryResultItem] = []
+        for ngram_doc in tokenizer.iter_ngram_documents():
+            docs.append(
+                {
+                    "manuscript_id": 1,
+                    "folio": "001r",
+                    "image_uri": "",
+                    "pitch_names": ngram_doc["pitch_names"],
+                    "contour": ngram_doc["contour"],
+                    "semitone_intervals": ngram_doc["semitone_intervals"],
+                    "intervals": ngram_doc["intervals"],
+                    "neume_names": ngram_doc.get("neume_names", ""),
+                    "location_json": json.loads(ngram_doc["location_json"]),
+                    "ngram_start": ngram_doc["ngram_start"],
+                }
+            )
+        self.source = InMemoryNgramSource(docs)
+
+    def assert_chains(
+        self,
+        q_terms: list[str],
+        q_type: str,
+        expected_starts: list[int],
+        expected_ends: list[int],
+    ) -> None:
+        """
+        Asserts that a LongQueryPlanner finds the expected matches of a query
+        and stitches each into a document with the pitch names, contour
+        and intervals of the pitches from its start to its end.
+        """
+        planner = LongQueryPlanner(self.source, q_terms, q_type, max_ngram=5)
+        self.assertGreater(len(planner.piece_queries), 1)
+        chains = planner.find_chains()
+        stitched_docs = planner.stitch_chains(chains)
+        self.assertEqual([doc["ngram_start"] for doc in stitched_docs], expected_starts)
+        for doc, start, end in zip(stitched_docs, expected_starts, expected_ends):
+            self.assertEqual(
+                doc["pitch_names"], "_".join(self.tokens.pitch_names[start:end])
+            )
+            self.assertEqual(
+                doc["contour"],
+                "_".join(map(str, self.tokens.contours[start : end - 1])),
+            )
+            self.assertEqual(
+                doc["intervals"],
+                "_".join(map(str, self.tokens.intervals[start : end - 1])),
+            )
+
+    def test_split_query(self) -> None:
+        with self.subTest("Short query"):
+            self.assertEqual(split_query(["a", "b"], "pitch_names", 5), [["a", "b"]])
+        with self.subTest("Pitch names share a term"):
+            self.assertEqual(
+                split_query(list("abcdefg"), "pitch_names", 4),
+                [["a", "b", "c", "d"], ["d", "e", "f", "g"]],
+            )
+        with self.subTest("Contours are balanced"):
+            self.assertEqual(
+                split_query(list("uudduuddu"), "contour", 5),
+                [["u", "u", "d"], ["d", "u", "u"], ["d", "d", "u"]],
+            )
+        with self.subTest("Unsplittable query"):
+            with self.assertRaises(ValueError):
+                split_query(list("abc"), "pitch_names", 1)
+
+    def test_merge_boxes(self) -> None:
+        boxes = [
+            {"ulx": 100, "uly": 110, "width": 50, "height": 50},
+            {"ulx": 10, "uly": 100, "width": 50, "height": 50},
+            {"ulx": 10, "uly": 300, "width": 50, "height": 50},
+        ]
+        self.assertEqual(
+            merge_boxes(boxes),
+            [
+                {"ulx": 10, "uly": 100, "width": 140, "height": 60},
+                {"ulx": 10, "uly": 300, "width": 50, "height": 50},
+            ],
+        )
+
+    def test_pitch_names_query(self) -> None:
+        pitch_names = self.tokens.pitch_names
+        q_terms = pitch_names[20:32]
+        expected_starts = [
+            i
+            for i in range(len(pitch_names) - len(q_terms) + 1)
+            if pitch_names[i : i + len(q_terms)] == q_terms
+        ]
+        self.assert_chains(
+            q_terms,
+            "pitch_names",
+            expected_starts,
+            [start + len(q_terms) for start in expected_starts],
+        )
+
+    def test_pitch_names_transposed_query(self) -> None:
+        pitch_names = self.tokens.pitch_names
+        q_terms = pitch_names[20:32]
+        relative_q_terms = get_relative_pitch_names(q_terms)
+        expected_starts = [
+            i
+            for i in range(len(pitch_names) - len(q_terms) + 1)
+            if get_relative_pitch_names(pitch_names[i : i + len(q_terms)])
+            == relative_q_terms
+        ]
+        self.assert_chains(
+            q_terms,
+            "pitch_names_transposed",
+            expected_starts,
+            [start + len(q_terms) for start in expected_starts],
+        )
+        with self.subTest("Test n-grams without pitch_names_transposed"):
+            planner = LongQueryPlanner(
+                self.source,
+                q_terms,
+                "pitch_names_transposed",
+                max_ngram=5,
+                relative_pitch_names=False,
+            )
+            self.assertEqual(planner.piece_queries[0].field, "pitch_names")
+            chains = planner.find_chains()
+            self.assertEqual(
+                [chain[0]["ngram_start"] for chain in chains], expected_starts
+            )
+
+    def test_contour_query(self) -> None:
+        contours = self.tokens.contours
+        q_terms = [str(contour) for contour in contours[10:17]]
+        expected_starts = [
+            i
+            for i in range(len(contours) - len(q_terms) + 1)
+            if contours[i : i + len(q_terms)] == q_terms
+        ]
+        # Common contours have many matches
+        self.assertGreater(len(expected_starts), 1)
+        self.assert_chains(
+            q_terms,
+            "contour",
+            expected_starts,
+            [start + len(q_terms) + 1 for start in expected_starts],
+        )
+
+    def test_intervals_query(self) -> None:
+        intervals = self.tokens.intervals
+        # Intervals of the test file are never None before its last pitch
+        solr_terms = [str(interval) for interval in intervals[30:38]]
+        q_terms = [
+            (
+                "r"
+                if term == "1"
+                else term.replace("-", "d") if "-" in term else f"u{term}"
+            )
+            for term in solr_terms
+        ]
+        expected_starts = [
+            i
+            for i in range(len(intervals) - len(q_terms) + 1)
+            if intervals[i : i + len(q_terms)] == solr_terms
+        ]
+        self.assert_chains(
+            q_terms,
+            "intervals",
+            expected_starts,
+            [start + len(q_terms) + 1 for start in expected_starts],
+        )
+
+    def test_neume_names_query(self) -> None:
+        neume_starts = [
+            i for i, name in enumerate(self.tokens.neume_names) if name is not None
+        ]
+        neume_names = [self.tokens.neume_names[i] for i in neume_starts]
+        q_terms = [str(name) for name in neume_names[5:12]]
+        expected_idxs = [
+            i
+            for i in range(len(neume_names) - len(q_terms) + 1)
+            if neume_names[i : i + len(q_terms)] == q_terms
+        ]
+        neume_ends = neume_starts[1:] + [len(self.tokens.pitch_names)]
+        self.assert_chains(
+            q_terms,
+            "neume_names",
+            [neume_starts[i] for i in expected_idxs],
+            [neume_ends[i + len(q_terms) - 1] for i in expected_idxs],
+        )
+        # The intervals between pieces are fetched in a single request
+        planner = LongQueryPlanner(self.source, q_terms, "neume_names", max_ngram=5)
+        chains = planner.find_chains()
+        self.source.num_requests = 0
+        stitched_docs = planner.stitch_chains(chains)
+        self.assertEqual(self.source.num_requests, 1)
+        self.assertEqual(stitched_docs[0]["neume_names"], "_".join(q_terms))
+
+    def test_no_matches(self) -> None:
+        planner = LongQueryPlanner(
+            self.source, list("abababababab"), "pitch_names", max_ngram=5
+        )
+        self.assertEqual(planner.find_chains(), [])
+        # Only the pieces are counted when one of them has no matches
+        self.assertEqual(self.source.num_requests, 1)
@@ -0,0 +1,104 @@
+from unittest import TestCase
+from os import path
+import json
+
+from django.conf import settings
+
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
+from cantusdata.helpers.notation_stream_search import (
+    StreamMatcher,
+    get_box_index,
+    get_stream_query,
+)
+
+TEST_MEI_FILE = path.join(
+    settings.TEST_MEI_FILES_PATH,
+    "123723",
+    "cdn-hsmu-m2149l4_001r.mei",
+)
+
+
+class NotationStreamSearchTestCase(TestCase):
+    def setUp(self) -> None:
+        self.tokenizer = MEITokenizer(TEST_MEI_FILE, min_ngram=1, max_ngram=5)
+        stream_doc = self.tokenizer.create_stream_document()
+        stream_doc["manuscript_id"] = "123723"
+        stream_doc["folio"] = "001r"
+        stream_doc["image_uri"] = "test_001r.jpg"
+        self.matcher = StreamMatcher(stream_doc)
+        self.box_index = get_box_index(stream_doc["pitch_boxes_json"])
+
+    def test_get_stream_query(self) -> None:
+        with self.subTest("Test contour query"):
+            self.assertEqual(
+                get_stream_query(["u", "d", "r"], "contour"),
+                'contour_stream:("u d r")',
+            )
+        with self.subTest("Test intervals query"):
+            self.assertEqual(
+                get_stream_query(["u2", "d3", "r"], "intervals"),
+                'interval_stream:("2 -3 1")',
+            )
+        with self.subTest("Test pitch_names_transposed query"):
+            self.assertEqual(
+                get_stream_query(["a", "b"], "pitch_names_transposed"),
+                'pitch_stream:("a b" OR "b c" OR "c d" OR "d e" OR "e f" '
+                'OR "f g" OR "g a")',
+            )
+
+    def test_result_items_match_ngram_documents(self) -> None:
+        """
+        The result item created for the pitches of each n-gram document
+        has the same fields as the n-gram document.
+        """
+        for ngram_doc in self.tokenizer.iter_ngram_documents():
+            start = ngram_doc["ngram_start"]
+            end = start + len(ngram_doc["pitch_names"].split("_"))
+            result_item = self.matcher.create_result_item(start, end, self.box_index)
+            self.assertEqual(
+                result_item,
+                {
+                    "manuscript_id": 123723,
+                    "folio": "001r",
+                    "image_uri": "test_001r.jpg",
+                    "pitch_names": ngram_doc["pitch_names"],
+                    "contour": ngram_doc["contour"],
+                    "semitone_intervals": ngram_doc["semitone_intervals"],
+                    "intervals": ngram_doc["intervals"],
+                    "neume_names": ngram_doc.get("neume_names", ""),
+                    "location_json": json.loads(ngram_doc["location_json"]),
+                    "ngram_start": start,
+                },
+            )
+
+    def test_find_matches(self) -> None:
+        """
+        The matches of the pitch names, contour and neume names of each n-gram
+        document include the pitches of the n-gram document.
+        """
+        for ngram_doc in self.tokenizer.iter_ngram_documents():
+            start = ngram_doc["ngram_start"]
+            pitch_names = ngram_doc["pitch_names"].split("_")
+            end = start + len(pitch_names)
+            self.assertIn(
+                (start, end), self.matcher.find_matches(pitch_names, "pitch_names")
+            )
+            if ngram_doc["contour"]:
+                self.assertIn(
+                    (start, end),
+                    self.matcher.find_matches(
+                        ngram_doc["contour"].split("_"), "contour"
+                    ),
+                )
+            if "neume_names" in ngram_doc:
+                self.assertIn(
+                    (start, end),
+                    self.matcher.find_matches(
+                        ngram_doc["neume_names"].split("_"), "neume_names"
+                    ),
+                )
+        with self.subTest("Test long query"):
+            pitch_names = self.matcher.pitch_names[20:50]
+            self.assertIn(
+                (20, 50), self.matcher.find_matches(pitch_names, "pitch_names")
+            )
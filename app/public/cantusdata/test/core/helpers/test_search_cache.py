@@ -0,0 +1,119 @@
+from unittest import TestCase
+
+from django.test import TestCase as DjangoTestCase, override_settings
+
+from cantusdata.helpers.search_cache import (
+    LRUCache,
+    bump_index_versions,
+    get_cache_key,
+    search_cache,
+)
+
+
+class FakeTimer:
+    def __init__(self) -> None:
+        self.time = 0.0
+
+    def __call__(self) -> float:
+        return self.time
+
+
+class LRUCacheTestCase(TestCase):
+    def test_eviction(self) -> None:
+        cache = LRUCache(max_entries=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        # Using "a" makes "b" the least recently used entry
+        self.assertEqual(cache.get("a"), 1)
+        cache.set("c", 3)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_expiry(self) -> None:
+        timer = FakeTimer()
+        cache = LRUCache(max_entries=2, ttl=10, timer=timer)
+        cache.set("a", 1)
+        timer.time = 9.5
+        self.assertEqual(cache.get("a"), 1)
+        timer.time = 10
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_get_or_compute(self) -> None:
+        cache = LRUCache(max_entries=2, ttl=60)
+        calls: list[str] = []
+
+        def compute(value: dict[str, bool]) -> dict[str, bool]:
+            calls.append("compute")
+            return value
+
+        with self.subTest("Computed once"):
+            for _ in range(2):
+                self.assertEqual(
+                    cache.get_or_compute("a", lambda: compute({"complete": True})),
+                    {"complete": True},
+                )
+            self.assertEqual(len(calls), 1)
+        with self.subTest("Values that are not cacheable are computed again"):
+            calls.clear()
+            for _ in range(2):
+                cache.get_or_compute(
+                    "b",
+                    lambda: compute({"complete": False}),
+                    lambda value: value["complete"],
+                )
+            self.assertEqual(len(calls), 2)
+        with self.subTest("Disabled cache"):
+            calls.clear()
+            disabled_cache = LRUCache(max_entries=0, ttl=60)
+            for _ in range(2):
+                disabled_cache.get_or_compute("a", lambda: compute({}))
+            self.assertEqual(len(calls), 2)
+
+    def test_override_settings(self) -> None:
+        # The search cache is disabled by the test settings, and emptied
+        # when its settings are overridden or restored
+        with override_settings(SEARCH_CACHE_MAX_ENTRIES=2, SEARCH_CACHE_TTL=60):
+            self.assertEqual(len(search_cache), 0)
+            search_cache.set("a", 1)
+            self.assertEqual(search_cache.get("a"), 1)
+        self.assertEqual(len(search_cache), 0)
+        search_cache.set("a", 1)
+        self.assertIsNone(search_cache.get("a"))
+
+
+class SearchCacheKeyTestCase(DjangoTestCase):
+    def test_get_cache_key(self) -> None:
+        key = get_cache_key("search", {"q": ["a"], "type": "chant"}, [1])
+        with self.subTest("Parameters in any order"):
+            self.assertEqual(
+                get_cache_key("search", {"type": "chant", "q": ["a"]}, [1]), key
+            )
+        with self.subTest("Different parameters or view"):
+            self.assertNotEqual(
+                get_cache_key("search", {"q": ["b"], "type": "chant"}, [1]), key
+            )
+            self.assertNotEqual(
+                get_cache_key("chant-set", {"q": ["a"], "type": "chant"}, [1]), key
+            )
+
+    def test_bump_index_versions(self) -> None:
+        params = {"q": "a"}
+        manuscript_1_key = get_cache_key("search", params, [1])
+        manuscript_2_key = get_cache_key("search", params, [2])
+        collection_key = get_cache_key("search", params, None)
+        bump_index_versions([1])
+        with self.subTest("Searches of a changed manuscript"):
+            self.assertNotEqual(get_cache_key("search", params, [1]), manuscript_1_key)
+            self.assertNotEqual(get_cache_key("search", params, None), collection_key)
+        with self.subTest("Searches of other manuscripts"):
+            self.assertEqual(get_cache_key("search", params, [2]), manuscript_2_key)
+        manuscript_1_key = get_cache_key("search", params, [1])
+        collection_key = get_cache_key("search", params, None)
+        bump_index_versions(None)
+        with self.subTest("Full refresh"):
+            self.assertNotEqual(get_cache_key("search", params, [1]), manuscript_1_key)
+            self.assertNotEqual(get_cache_key("search", params, [2]), manuscript_2_key)
+            self.assertNotEqual(get_cache_key("search", params, None), collection_key)
@@ -3,6 +3,7 @@ from unittest import TestCase
 from cantusdata.helpers.search_utils import (
     validate_query,
     get_transpositions,
+    get_relative_pitch_names,
     translate_interval_query_direction,
 )
 
@@ -62,6 +63,19 @@ class SearchUtilsTestCase(TestCase):
             ]
             self.assertEqual(transpositions, expected_transpositions)
 
+    def test_get_relative_pitch_names(self) -> None:
+        self.assertEqual(
+            get_relative_pitch_names(["c", "e", "c", "e"]), ["0", "2", "0", "2"]
+        )
+        self.assertEqual(
+            get_relative_pitch_names(["f", "g", "a", "e"]), ["0", "1", "2", "6"]
+        )
+        # All transpositions of a sequence have the same relative pitch names
+        for transposition in get_transpositions(["f", "g", "a", "e"]):
+            self.assertEqual(
+                get_relative_pitch_names(transposition), ["0", "1", "2", "6"]
+            )
+
     def test_translate_interval_query_direction(self) -> None:
         query_elems = ["u2", "d3", "r", "d14", "u12"]
         expected_translated_query = ["2", "-3", "1", "-14", "12"]
@@ -0,0 +1,134 @@
+from typing import Any, Dict, List, Optional, Tuple
+from unittest import TestCase
+
+import requests
+
+from cantusdata.helpers.solr_batch_writer import SolrBatchWriter
+
+
+def get_http_error(status_code: int) -> requests.HTTPError:
+    response = requests.Response()
+    response.status_code = status_code
+    return requests.HTTPError(f"{status_code} Error", response=response)
+
+
+class RecordingSolrConnection:
+    """
+    Records the updates sent to it in place of a Solr connection,
+    failing num_failures requests with the given error (by default, a
+    503 response) once num_successes requests have succeeded.
+    """
+
+    def __init__(
+        self,
+        num_failures: int = 0,
+        error: Optional[Exception] = None,
+        num_successes: int = 0,
+    ):
+        self.requests: List[Tuple[str, Any]] = []
+        self.num_failures = num_failures
+        self.error = error if error is not None else get_http_error(503)
+        self.num_successes = num_successes
+
+    def _request(self, name: str, content: Any) -> None:
+        if len(self.requests) >= self.num_successes and self.num_failures > 0:
+            self.num_failures -= 1
+            raise self.error
+        self.requests.append((name, content))
+
+    def add_many(self, docs: List[Dict[str, Any]]) -> None:
+        self._request("add", [doc["id"] for doc in docs])
+
+    def delete(self, queries: List[str]) -> None:
+        self._request("delete", list(queries))
+
+    def commit(self) -> None:
+        self._request("commit", None)
+
+
+class SolrBatchWriterTestCase(TestCase):
+    def test_batches(self) -> None:
+        """
+        Documents are sent in batches of batch_size that span calls to
+        add_many, and deletions are sent before the documents that follow
+        them.
+        """
+        solr_conn = RecordingSolrConnection()
+        writer = SolrBatchWriter(solr_conn, batch_size=3)
+        writer.delete_query("folio:1")
+        writer.add_many({"id": f"1-{i}"} for i in range(2))
+        self.assertEqual(solr_conn.requests, [])
+        writer.delete_query("folio:2")
+        writer.add_many({"id": f"2-{i}"} for i in range(5))
+        self.assertEqual(
+            solr_conn.requests,
+            [
+                ("delete", ["folio:1", "folio:2"]),
+                ("add", ["1-0", "1-1", "2-0"]),
+                ("add", ["2-1", "2-2", "2-3"]),
+            ],
+        )
+        self.assertEqual(writer.num_uncommitted, 6)
+        writer.commit()
+        self.assertEqual(solr_conn.requests[3:], [("add", ["2-4"]), ("commit", None)])
+        self.assertEqual(writer.num_uncommitted, 0)
+
+    def test_retry(self) -> None:
+        """
+        A failed batch is sent again, until max_attempts is reached.
+        """
+        solr_conn = RecordingSolrConnection(num_failures=2)
+        writer = SolrBatchWriter(solr_conn, batch_size=2, max_attempts=3, retry_delay=0)
+        with self.assertLogs("cantusdata.helpers.solr_batch_writer") as logs:
+            writer.add_many([{"id": "a"}, {"id": "b"}])
+        self.assertEqual(len(logs.records), 2)
+        self.assertEqual(solr_conn.requests, [("add", ["a", "b"])])
+        solr_conn.num_failures = 3
+        with self.assertLogs("cantusdata.helpers.solr_batch_writer"):
+            with self.assertRaises(requests.HTTPError):
+                writer.commit()
+
+    def test_failed_batch(self) -> None:
+        """
+        When a batch fails, the batches sent before it are not sent again.
+        """
+        solr_conn = RecordingSolrConnection(
+            num_failures=1, error=get_http_error(400), num_successes=1
+        )
+        writer = SolrBatchWriter(solr_conn, batch_size=2)
+        with self.assertRaises(requests.HTTPError):
+            writer.add_many({"id": str(i)} for i in range(4))
+        self.assertEqual(writer.num_uncommitted, 2)
+        writer.commit()
+        self.assertEqual(
+            solr_conn.requests,
+            [("add", ["0", "1"]), ("add", ["2", "3"]), ("commit", None)],
+        )
+
+    def test_retryable_errors(self) -> None:
+        """
+        Only requests that failed because Solr could not be reached or was
+        briefly unavailable are sent again.
+        """
+        retryable_errors: List[Exception] = [
+            requests.ConnectionError("Connection refused"),
+            requests.Timeout("Read timed out"),
+            get_http_error(429),
+            get_http_error(503),
+        ]
+        for error in retryable_errors:
+            with self.subTest(error=str(error)):
+                solr_conn = RecordingSolrConnection(num_failures=1, error=error)
+                writer = SolrBatchWriter(solr_conn, retry_delay=0)
+                with self.assertLogs("cantusdata.helpers.solr_batch_writer"):
+                    writer.commit()
+                self.assertEqual(solr_conn.requests, [("commit", None)])
+        non_retryable_errors = [get_http_error(400), get_http_error(500), ValueError()]
+        for error in non_retryable_errors:
+            with self.subTest(error=repr(error)):
+                solr_conn = RecordingSolrConnection(num_failures=1, error=error)
+                writer = SolrBatchWriter(solr_conn, retry_delay=0)
+                with self.assertRaises(type(error)):
+                    writer.commit()
+                self.assertEqual(solr_conn.num_failures, 0)
+                self.assertEqual(solr_conn.requests, [])
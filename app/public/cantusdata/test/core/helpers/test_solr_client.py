@@ -0,0 +1,217 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest import IsolatedAsyncioTestCase, TestCase
+from urllib.parse import parse_qs
+import json
+import threading
+
+import httpx
+import requests
+
+from cantusdata.helpers.async_solr_client import AsyncSolrClient
+from cantusdata.helpers.solr_client import SolrClient
+
+
+class FakeSolrHandler(BaseHTTPRequestHandler):
+    """
+    Records the requests sent to it in place of Solr, responding with the
+    statuses queued on the server (200 once the queue is empty), in chunks
+    if the server is set to.
+    """
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "FakeSolrServer"
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        self.server.requests.append((self.path, body, self.client_address))
+        status = self.server.statuses.pop(0) if self.server.statuses else 200
+        content = json.dumps({"response": {"numFound": 0, "docs": []}}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        if self.server.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in (content[:10], content[10:], b""):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        else:
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeSolrServer(ThreadingHTTPServer):
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeSolrHandler)
+        self.requests: list[tuple[str, str, Any]] = []
+        self.statuses: list[int] = []
+        self.chunked = False
+
+
+class SolrClientTestCase(TestCase):
+    def setUp(self) -> None:
+        self.server = FakeSolrServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = SolrClient(
+            f"http://127.0.0.1:{self.server.server_address[1]}/solr/core/",
+            retry_backoff=0,
+        )
+
+    def tearDown(self) -> None:
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_select(self) -> None:
+        response = self.client.select({"q": "*:*", "fl": ["folio", "location_json"]})
+        self.assertEqual(response["response"]["numFound"], 0)
+        path, body, _ = self.server.requests[0]
+        self.assertEqual(path, "/solr/core/select")
+        self.assertEqual(
+            parse_qs(body),
+            {"q": ["*:*"], "fl": ["folio", "location_json"], "wt": ["json"]},
+        )
+
+    def test_updates(self) -> None:
+        self.client.add_many([{"id": "1", "folio": "001r", "mode": None}])
+        self.client.delete(ids=["2"], queries=["type:omr_ngram"])
+        self.client.commit()
+        self.assertEqual(
+            [(path, json.loads(body)) for path, body, _ in self.server.requests],
+            [
+                ("/solr/core/update", [{"id": "1", "folio": "001r"}]),
+                ("/solr/core/update", {"delete": ["2", {"query": "type:omr_ngram"}]}),
+                ("/solr/core/update", {"commit": {}}),
+            ],
+        )
+
+    def test_update(self) -> None:
+        self.client.update(
+            docs=[{"id": "1", "mode": None}, {"id": "2"}],
+            delete_queries=["type:cantusdata_chant AND item_id:(1 OR 2)"],
+            commit=True,
+        )
+        self.assertEqual(len(self.server.requests), 1)
+        path, body, _ = self.server.requests[0]
+        self.assertEqual(path, "/solr/core/update")
+        self.assertEqual(
+            json.loads(body, object_pairs_hook=list),
+            [
+                ("delete", [[("query", "type:cantusdata_chant AND item_id:(1 OR 2)")]]),
+                ("add", [("doc", [("id", "1")])]),
+                ("add", [("doc", [("id", "2")])]),
+                ("commit", []),
+            ],
+        )
+
+    def test_keep_alive(self) -> None:
+        for _ in range(3):
+            self.client.select({"q": "*:*"})
+        client_addresses = {address for _, _, address in self.server.requests}
+        self.assertEqual(len(client_addresses), 1)
+
+    def test_retries(self) -> None:
+        with self.subTest("Queries are retried"):
+            self.server.statuses = [503, 503]
+            self.client.select({"q": "*:*"})
+            self.assertEqual(len(self.server.requests), 3)
+        with self.subTest("Error once retries are exhausted"):
+            self.server.statuses = [503] * 4
+            with self.assertRaises(requests.HTTPError):
+                self.client.select({"q": "*:*"})
+        with self.subTest("Updates that were received are not retried"):
+            self.server.requests.clear()
+            self.server.statuses = [503]
+            with self.assertRaises(requests.HTTPError):
+                self.client.add_many([{"id": "1"}])
+            self.assertEqual(len(self.server.requests), 1)
+
+    def test_metrics(self) -> None:
+        self.client.select({"q": "*:*"})
+        self.server.statuses = [400]
+        with self.assertRaises(requests.HTTPError):
+            self.client.select({"q": "*:*"})
+        self.client.commit()
+        summary = self.client.metrics.summary()
+        self.assertEqual(summary["select"]["count"], 2)
+        self.assertEqual(summary["select"]["errors"], 1)
+        self.assertEqual(summary["commit"]["count"], 1)
+        self.assertLessEqual(
+            summary["select"]["median_ms"], summary["select"]["max_ms"]
+        )
+
+
+class AsyncSolrClientTestCase(IsolatedAsyncioTestCase):
+    def setUp(self) -> None:
+        self.server = FakeSolrServer()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = AsyncSolrClient(
+            f"http://127.0.0.1:{self.server.server_address[1]}/solr/core/",
+            retry_backoff=0,
+        )
+
+    async def asyncTearDown(self) -> None:
+        await self.client.aclose()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    async def test_select(self) -> None:
+        for chunked in (False, True):
+            with self.subTest(chunked=chunked):
+                self.server.requests.clear()
+                self.server.chunked = chunked
+                response = await self.client.select(
+                    {"q": "*:*", "fl": ["folio", "location_json"]}
+                )
+                self.assertEqual(response["response"]["numFound"], 0)
+                path, body, _ = self.server.requests[0]
+                self.assertEqual(path, "/solr/core/select")
+                self.assertEqual(
+                    parse_qs(body),
+                    {"q": ["*:*"], "fl": ["folio", "location_json"], "wt": ["json"]},
+                )
+
+    async def test_keep_alive(self) -> None:
+        for _ in range(3):
+            await self.client.select({"q": "*:*"})
+        client_addresses = {address for _, _, address in self.server.requests}
+        self.assertEqual(len(client_addresses), 1)
+
+    async def test_retries(self) -> None:
+        with self.subTest("Queries are retried"):
+            self.server.statuses = [503, 503]
+            await self.client.select({"q": "*:*"})
+            self.assertEqual(len(self.server.requests), 3)
+        with self.subTest("Error once retries are exhausted"):
+            self.server.statuses = [503] * 4
+            with self.assertRaises(requests.HTTPError) as error:
+                await self.client.select({"q": "*:*"})
+            response = error.exception.response
+            assert response is not None
+            self.assertEqual(response.status_code, 503)
+        with self.subTest("Errors that are not retried"):
+            self.server.requests.clear()
+            self.server.statuses = [400]
+            with self.assertRaises(requests.HTTPError):
+                await self.client.select({"q": "*:*"})
+            self.assertEqual(len(self.server.requests), 1)
+        summary = self.client.metrics.summary()
+        self.assertEqual(summary["select"]["count"], 3)
+        self.assertEqual(summary["select"]["errors"], 2)
+
+    async def test_connection_error(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        client = AsyncSolrClient(self.client.url, max_retries=0)
+        try:
+            with self.assertRaises(requests.ConnectionError) as error:
+                await client.select({"q": "*:*"})
+            self.assertIsInstance(error.exception.__cause__, httpx.TransportError)
+        finally:
+            await client.aclose()
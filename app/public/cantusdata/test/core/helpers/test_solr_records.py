@@ -0,0 +1,82 @@
+from django.test import TestCase
+
+from cantusdata.helpers.solr_records import iter_solr_records
+from cantusdata.models import Chant, Folio, Manuscript
+
+
+class SolrRecordsTestCase(TestCase):
+    fixtures = ["2_initial_data"]
+
+    def test_iter_solr_records(self) -> None:
+        manuscript = Manuscript.objects.order_by("pk").first()
+        folio = Folio.objects.order_by("pk").first()
+        chant = Chant.objects.order_by("pk").first()
+        assert manuscript is not None and folio is not None and chant is not None
+        expected_records = [
+            {
+                "type": "cantusdata_manuscript",
+                "id": f"manuscript-{manuscript.pk}",
+                "item_id": manuscript.pk,
+                "name": manuscript.name,
+                "siglum": manuscript.siglum,
+                "siglum_slug": manuscript.siglum_slug,
+                "date": manuscript.date,
+                "public": manuscript.public,
+                "chant_count": manuscript.chant_set.count(),
+                "folio_count": manuscript.folio_set.count(),
+                "provenance": manuscript.provenance,
+                "description": manuscript.description,
+            },
+            {
+                "type": "cantusdata_folio",
+                "id": f"folio-{folio.pk}",
+                "number": folio.number,
+                "item_id": folio.pk,
+                "image_uri": folio.image_uri,
+                "manuscript_id": folio.manuscript_id,
+                "number_wo_lead_zero": folio.number.lstrip("0"),
+            },
+            {
+                "type": "cantusdata_chant",
+                "id": f"chant-{chant.pk}",
+                "item_id": chant.pk,
+                "marginalia": chant.marginalia,
+                "manuscript": chant.manuscript.siglum,
+                "manuscript_id": chant.manuscript_id,
+                "manuscript_name_hidden": chant.manuscript.name,
+                "public": chant.manuscript.public,
+                "folio": chant.folio.number,
+                "folio_id": chant.folio_id,
+                "image_uri": chant.folio.image_uri,
+                "sequence": chant.sequence,
+                "cantus_id": chant.cantus_id,
+                "feast": chant.feast,
+                "office": chant.office,
+                "genre": chant.genre,
+                "position": chant.lit_position,
+                "mode": chant.mode,
+                "differentia": chant.differentia,
+                "differentiae_database": chant.differentiae_database,
+                "finalis": chant.finalis,
+                "incipit": chant.incipit,
+                "full_text": chant.full_text,
+                "full_text_ms": chant.full_text_ms,
+                "volpiano": chant.volpiano,
+                "cdb_uri": chant.cdb_uri,
+            },
+        ]
+        for obj, expected_record in zip([manuscript, folio, chant], expected_records):
+            queryset = type(obj).objects.all()
+            with self.subTest(model=type(obj).__name__):
+                # One query, whatever the number of records
+                with self.assertNumQueries(1):
+                    records = list(iter_solr_records(queryset))
+                self.assertEqual(len(records), queryset.count())
+                self.assertEqual(records[0], expected_record)
+
+    def test_iter_solr_records_id_range(self) -> None:
+        chant_ids = list(Chant.objects.order_by("pk").values_list("pk", flat=True))
+        records = iter_solr_records(
+            Chant.objects.all(), id_range=(chant_ids[0], chant_ids[0])
+        )
+        self.assertEqual([record["item_id"] for record in records], chant_ids[:1])
@@ -0,0 +1,54 @@
+from unittest import TestCase
+
+from cantusdata.helpers.solrsearch import (
+    SolrSearchQueryless,
+    escape_term,
+    split_filter_clauses,
+)
+
+
+class SolrSearchTestCase(TestCase):
+    def test_split_filter_clauses(self) -> None:
+        with self.subTest("Filter clauses of a conjunction"):
+            self.assertEqual(
+                split_filter_clauses(
+                    'incipit_t_hidden:(ave maria) AND manuscript_id:("123") '
+                    'AND type:"cantusdata_chant"'
+                ),
+                (
+                    ["incipit_t_hidden:(ave maria)"],
+                    ['manuscript_id:("123")', 'type:"cantusdata_chant"'],
+                ),
+            )
+        with self.subTest("Operators in parentheses and quotes"):
+            self.assertEqual(
+                split_filter_clauses('(ave OR "a AND b") AND public:true'),
+                (['(ave OR "a AND b")'], ["public:true"]),
+            )
+        with self.subTest("Queries that are not conjunctions"):
+            for query in [
+                "type:cantusdata_chant OR ave",
+                "ave maria AND type:cantusdata_chant",
+                "ave AND NOT type:cantusdata_chant",
+            ]:
+                self.assertEqual(split_filter_clauses(query), ([query], []))
+
+    def test_escape_term(self) -> None:
+        self.assertEqual(escape_term("a:b (c)"), r"a\:b\ \(c\)")
+
+    def test_prepare_query(self) -> None:
+        search = SolrSearchQueryless(
+            "q=feast_t_hidden%3A%28nativity%29+AND+manuscript_id%3A%28%22123%22%29"
+            '&genre=A&genre=R"x&start=15&not-a-field=1',
+            {"public": "true"},
+        )
+        self.assertEqual(search.prepared_query, "feast_t_hidden:(nativity)")
+        self.assertCountEqual(
+            search.filter_queries,
+            ["public:true", 'manuscript_id:("123")', r'genre:("A" OR "R\"x")'],
+        )
+        self.assertEqual(search.solr_params, {"start": 15})
+        with self.subTest("Query with only filters"):
+            search = SolrSearchQueryless("q=type%3Acantusdata_music_notation")
+            self.assertEqual(search.prepared_query, "*:*")
+            self.assertEqual(search.filter_queries, ["type:cantusdata_music_notation"])
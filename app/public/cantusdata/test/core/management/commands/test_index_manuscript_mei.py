@@ -1,10 +1,14 @@
 import os
+import shutil
+import tempfile
+from io import StringIO
 
 from django.core.management import call_command
 from django.test import TestCase
 from django.conf import settings
 
-from cantusdata.models import Manuscript, Folio
+from cantusdata.helpers.mei_processing.mei_tokenizer import NGRAM_DOCUMENT_VERSION
+from cantusdata.models import Manuscript, Folio, MEIFileFingerprint
 from cantusdata.test.core.helpers.mei_processing.test_mei_tokenizer import (
     calculate_expected_total_ngrams,
 )
@@ -82,6 +86,168 @@ class IndexManuscriptMeiTestCase(TestCase):
             results = self.solr_conn.query("*:*", fq="type:omr_ngram")
             self.assertEqual(len(results), 0)
 
+    def test_workers_option(self) -> None:
+        call_command(
+            "index_manuscript_mei",
+            "123723",
+            "--mei-dir",
+            TEST_MEI_FILES_PATH,
+        )
+        sequential_results = self.solr_conn.query("*:*", fq="type:omr_ngram", rows=0)
+        call_command(
+            "index_manuscript_mei",
+            "123723",
+            "--mei-dir",
+            TEST_MEI_FILES_PATH,
+            "--workers",
+            "2",
+        )
+        parallel_results = self.solr_conn.query("*:*", fq="type:omr_ngram", rows=0)
+        self.assertGreater(parallel_results.numFound, 0)
+        self.assertEqual(parallel_results.numFound, sequential_results.numFound)
+
+    def test_commit_every_option(self) -> None:
+        call_command(
+            "index_manuscript_mei",
+            "123723",
+            "--mei-dir",
+            TEST_MEI_FILES_PATH,
+            "--chunk-size",
+            "100",
+            "--commit-every",
+            "1",
+        )
+        results = self.solr_conn.query("*:*", fq="type:omr_ngram", rows=0)
+        self.assertEqual(
+            results.numFound,
+            sum(
+                calculate_expected_total_ngrams(
+                    f"{TEST_MEI_FILES_PATH}/123723/cdn-hsmu-m2149l4_{folio}.mei", 1, 5
+                )
+                for folio in ("001r", "001v", "999r")
+            ),
+        )
+        self.assertEqual(
+            MEIFileFingerprint.objects.filter(manuscript_id=123723).count(), 3
+        )
+
+    def test_index_scheme_option(self) -> None:
+        call_command(
+            "index_manuscript_mei",
+            "123723",
+            "--mei-dir",
+            TEST_MEI_FILES_PATH,
+            "--index-scheme",
+            "stream",
+        )
+        with self.subTest("Test one stream document per folio"):
+            results = self.solr_conn.query("*:*", fq="type:omr_stream", rows=0)
+            self.assertEqual(results.numFound, 3)
+            results = self.solr_conn.query("*:*", fq="type:omr_ngram", rows=0)
+            self.assertEqual(results.numFound, 0)
+            self.assertEqual(
+                MEIFileFingerprint.objects.filter(
+                    manuscript_id=123723, index_scheme="stream"
+                ).count(),
+                3,
+            )
+        with self.subTest("Test changing the scheme replaces documents"):
+            stdout = StringIO()
+            call_command(
+                "index_manuscript_mei",
+                "123723",
+                "--mei-dir",
+                TEST_MEI_FILES_PATH,
+                "--incremental",
+                stdout=stdout,
+            )
+            self.assertIn("Indexed 3 folio(s)", stdout.getvalue())
+            results = self.solr_conn.query("*:*", fq="type:omr_stream", rows=0)
+            self.assertEqual(results.numFound, 0)
+            results = self.solr_conn.query("*:*", fq="type:omr_ngram", rows=0)
+            self.assertGreater(results.numFound, 0)
+
+    def test_incremental_option(self) -> None:
+        with tempfile.TemporaryDirectory() as mei_dir:
+            manuscript_mei_dir = os.path.join(mei_dir, "123723")
+            shutil.copytree(
+                os.path.join(TEST_MEI_FILES_PATH, "123723"), manuscript_mei_dir
+            )
+            call_command(
+                "index_manuscript_mei", "123723", "--mei-dir", mei_dir, "--incremental"
+            )
+            with self.subTest("Test unchanged files are skipped"):
+                stdout = StringIO()
+                call_command(
+                    "index_manuscript_mei",
+                    "123723",
+                    "--mei-dir",
+                    mei_dir,
+                    "--incremental",
+                    stdout=stdout,
+                )
+                self.assertIn("Indexed 0 folio(s)", stdout.getvalue())
+                self.assertIn("skipped 3 unchanged folio(s)", stdout.getvalue())
+            with self.subTest("Test files indexed by earlier versions are indexed"):
+                MEIFileFingerprint.objects.filter(folio_number="001r").update(
+                    document_version=0
+                )
+                stdout = StringIO()
+                call_command(
+                    "index_manuscript_mei",
+                    "123723",
+                    "--mei-dir",
+                    mei_dir,
+                    "--incremental",
+                    stdout=stdout,
+                )
+                self.assertIn("Indexed 1 folio(s)", stdout.getvalue())
+                self.assertEqual(
+                    MEIFileFingerprint.objects.get(
+                        manuscript_id=123723, folio_number="001r"
+                    ).document_version,
+                    NGRAM_DOCUMENT_VERSION,
+                )
+            with self.subTest("Test changed files are indexed again"):
+                shutil.copy(
+                    os.path.join(manuscript_mei_dir, "cdn-hsmu-m2149l4_999r.mei"),
+                    os.path.join(manuscript_mei_dir, "cdn-hsmu-m2149l4_001v.mei"),
+                )
+                call_command(
+                    "index_manuscript_mei",
+                    "123723",
+                    "--mei-dir",
+                    mei_dir,
+                    "--incremental",
+                )
+                results = self.solr_conn.query(
+                    "*:*", fq='type:omr_ngram AND folio:"001v"'
+                )
+                self.assertEqual(
+                    results.numFound,
+                    calculate_expected_total_ngrams(
+                        f"{TEST_MEI_FILES_PATH}/123723/cdn-hsmu-m2149l4_999r.mei", 1, 5
+                    ),
+                )
+            with self.subTest("Test documents of removed files are deleted"):
+                os.remove(os.path.join(manuscript_mei_dir, "cdn-hsmu-m2149l4_999r.mei"))
+                call_command(
+                    "index_manuscript_mei",
+                    "123723",
+                    "--mei-dir",
+                    mei_dir,
+                    "--incremental",
+                )
+                results = self.solr_conn.query(
+                    "*:*", fq='type:omr_ngram AND folio:"999r"'
+                )
+                self.assertEqual(results.numFound, 0)
+                self.assertFalse(
+                    MEIFileFingerprint.objects.filter(
+                        manuscript_id=123723, folio_number="999r"
+                    ).exists()
+                )
+
 
 class IndexManuscriptMeiExceptionsTestCase(TestCase):
     @classmethod
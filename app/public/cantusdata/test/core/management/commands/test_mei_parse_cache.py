@@ -0,0 +1,57 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+
+class MEIParseCacheCommandTestCase(SimpleTestCase):
+    def setUp(self) -> None:
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.cache_dir)
+
+    def test_warm_and_purge(self) -> None:
+        num_mei_files = len(
+            os.listdir(os.path.join(settings.TEST_MEI_FILES_PATH, "123723"))
+        )
+        with override_settings(MEI_PARSE_CACHE_DIR=self.cache_dir):
+            call_command(
+                "mei_parse_cache",
+                "warm",
+                "--mei-dir",
+                settings.TEST_MEI_FILES_PATH,
+                "--manuscript-ids",
+                "123723",
+                stdout=StringIO(),
+            )
+            # Files with identical contents share a cache entry
+            num_entries = len(os.listdir(self.cache_dir))
+            self.assertGreater(num_entries, 0)
+            with self.subTest("Test cached files are not parsed again"):
+                stdout = StringIO()
+                call_command(
+                    "mei_parse_cache",
+                    "warm",
+                    "--mei-dir",
+                    settings.TEST_MEI_FILES_PATH,
+                    "--manuscript-ids",
+                    "123723",
+                    stdout=stdout,
+                )
+                self.assertIn(
+                    f"Parsed 0 of {num_mei_files} MEI file(s)", stdout.getvalue()
+                )
+            stdout = StringIO()
+            call_command("mei_parse_cache", "purge", stdout=stdout)
+            self.assertIn(f"Removed {num_entries} entries", stdout.getvalue())
+            self.assertEqual(os.listdir(self.cache_dir), [])
+
+    @override_settings(MEI_PARSE_CACHE_DIR="")
+    def test_disabled_cache(self) -> None:
+        with self.assertRaises(ValueError):
+            call_command("mei_parse_cache", "stats")
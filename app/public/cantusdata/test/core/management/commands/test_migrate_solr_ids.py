@@ -0,0 +1,31 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from cantusdata.helpers.solr_records import iter_solr_records
+from cantusdata.models import Chant
+
+from solr.core import SolrConnection  # type: ignore
+
+
+class MigrateSolrIdsTestCase(TransactionTestCase):
+    fixtures = ["2_initial_data"]
+
+    def test_migrate_solr_ids(self) -> None:
+        solr_conn = SolrConnection(settings.SOLR_SERVER)
+        chant = Chant.objects.get(cantus_id="1234")
+        # A record indexed with a random id by an earlier version
+        solr_conn.add(
+            **{
+                **next(iter_solr_records(Chant.objects.filter(pk=chant.pk))),
+                "id": "0b5e1a4c-5d43-4b5c-9f5a-3f2c1c1e9a10",
+            }
+        )
+        solr_conn.commit()
+        call_command("migrate_solr_ids", stdout=StringIO())
+        results = solr_conn.query(f"type:cantusdata_chant AND item_id:{chant.id}")
+        self.assertEqual(
+            [record["id"] for record in results.results], [f"chant-{chant.id}"]
+        )
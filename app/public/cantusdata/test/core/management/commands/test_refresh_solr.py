@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from cantusdata.models import Chant
+
+from solr.core import SolrConnection  # type: ignore
+
+
+class RefreshSolrTestCase(TransactionTestCase):
+    fixtures = ["2_initial_data"]
+
+    def test_refresh_solr(self) -> None:
+        chant = Chant.objects.get(cantus_id="1234")
+        for sequence in range(2, 7):
+            Chant.objects.create(
+                manuscript=chant.manuscript, folio=chant.folio, sequence=sequence
+            )
+        solr_conn = SolrConnection(settings.SOLR_SERVER)
+        solr_conn.delete_query("type:cantusdata_chant")
+        solr_conn.commit()
+        stdout = StringIO()
+        # Batches of one record, so that several are sent at once
+        call_command(
+            "refresh_solr", record_type="chants", batch_size=1, workers=2, stdout=stdout
+        )
+        results = solr_conn.query("type:cantusdata_chant", rows=100)
+        self.assertEqual(
+            sorted(record["id"] for record in results.results),
+            sorted(
+                Chant.get_solr_id(chant_id)
+                for chant_id in Chant.objects.values_list("id", flat=True)
+            ),
+        )
+        num_chants = Chant.objects.count()
+        self.assertIn(f"{num_chants} / {num_chants}", stdout.getvalue())
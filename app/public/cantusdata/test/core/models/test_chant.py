@@ -1,11 +1,16 @@
 import solr
 
 from django.conf import settings
-from django.test import TransactionTestCase
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
 
 from cantusdata.models.chant import Chant
 from cantusdata.models.manuscript import Manuscript
 from cantusdata.models.folio import Folio
+from cantusdata.models.solr_sync_change import SolrSyncChange
+from cantusdata.celery import app as celery_app
+from cantusdata.helpers.solr_client import get_solr_client
+from cantusdata.signals.solr_sync import solr_synchronizer
 
 
 class ChantModelTestCase(TransactionTestCase):
@@ -39,10 +44,66 @@ class ChantModelTestCase(TransactionTestCase):
     def test_solr_deletion(self):
         pk = self.chant.pk
 
+        self.chant.delete()
+
         solrconn = solr.SolrConnection(settings.SOLR_SERVER)
-        self.chant.delete_from_solr(solrconn)
+        indexed = solrconn.query("type:cantusdata_chant AND item_id:{}".format(pk))
+        self.assertEqual(indexed.numFound, 0)
 
-        solrconn.commit()
+    def test_solr_session_deletion(self):
+        with solr_synchronizer.get_session():
+            chants = [
+                Chant.objects.create(
+                    manuscript=self.manuscript,
+                    folio=self.folio,
+                    sequence=sequence,
+                    cantus_id="4321",
+                )
+                for sequence in range(3)
+            ]
+
+        solr_client = get_solr_client(solr_synchronizer.solr_server_url)
+        solr_client.metrics.reset()
+        with solr_synchronizer.get_session():
+            for chant in chants:
+                chant.delete()
+
+        # The deletions and the updated folio and manuscript records
+        # are sent and committed in a single request
+        self.assertEqual(list(solr_client.metrics.summary()), ["commit"])
+        self.assertEqual(solr_client.metrics.summary()["commit"]["count"], 1)
+        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
+        indexed = solrconn.query("type:cantusdata_chant AND cantus_id:4321")
+        self.assertEqual(indexed.numFound, 0)
 
-        indexed = solrconn.query("type:cantusdata_chant AND item_id:{}".format(pk))
+    @override_settings(SOLR_SYNC_DEFERRED=True)
+    def test_solr_deferred_sync(self):
+        # Run the synchronization task when it is scheduled, without a worker
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", False)
+        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
+        solr_client = get_solr_client(solr_synchronizer.solr_server_url)
+        solr_client.metrics.reset()
+
+        with transaction.atomic():
+            for sequence in [10, 11, 12]:
+                self.chant.sequence = sequence
+                self.chant.save()
+            chant = Chant.objects.create(
+                manuscript=self.manuscript, folio=self.folio, sequence=1
+            )
+            chant.delete()
+
+            # The changes are only queued until they are committed
+            self.assertEqual(solr_client.metrics.summary(), {})
+            self.assertTrue(SolrSyncChange.objects.exists())
+
+        # The changes are collapsed and applied with a single commit
+        self.assertEqual(list(solr_client.metrics.summary()), ["commit"])
+        self.assertEqual(solr_client.metrics.summary()["commit"]["count"], 1)
+        self.assertFalse(SolrSyncChange.objects.exists())
+        indexed = self.chant.fetch_solr_records(solrconn)
+        self.assertEqual(indexed.numFound, 1)
+        self.assertEqual(indexed.results[0]["sequence"], 12)
+        indexed = solrconn.query("type:cantusdata_chant AND sequence:1")
         self.assertEqual(indexed.numFound, 0)
@@ -58,10 +58,8 @@ class FolioModelTestCase(TransactionTestCase):
     def test_solr_deletion(self):
         pk = self.folio.pk
 
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
-        self.folio.delete_from_solr(solrconn)
-
-        solrconn.commit()
+        self.folio.delete()
 
+        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
         indexed = solrconn.query("type:cantusdata_folio AND item_id:{}".format(pk))
         self.assertEqual(indexed.numFound, 0)
@@ -102,10 +102,8 @@ class ManuscriptModelTestCase(TransactionTestCase):
     def test_solr_deletion(self):
         pk = self.first_manuscript.pk
 
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
-        self.first_manuscript.delete_from_solr(solrconn)
-
-        solrconn.commit()
+        self.first_manuscript.delete()
 
+        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
         indexed = solrconn.query("type:cantusdata_manuscript AND item_id:{}".format(pk))
         self.assertEqual(indexed.numFound, 0)
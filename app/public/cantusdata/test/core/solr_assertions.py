@@ -0,0 +1,36 @@
+"""
+Module containing helper functions for asserting the number of requests
+that the code under test sends to Solr.
+"""
+
+import contextlib
+from typing import Iterator, Optional
+from unittest import TestCase
+
+from cantusdata.helpers.solr_client import get_solr_client
+
+
+def _get_num_selects() -> int:
+    summary = get_solr_client().metrics.summary()
+    return summary["select"]["count"] if "select" in summary else 0
+
+
+@contextlib.contextmanager
+def assert_num_solr_selects(
+    test_case: TestCase, num_selects: Optional[int] = None
+) -> Iterator[None]:
+    """
+    Asserts that the code in the block sends num_selects select requests
+    to Solr, like assertNumQueries does for database queries.
+
+    :param test_case: The test case making the assertion
+    :param num_selects: The number of select requests (if None, at least
+        one select request must be sent)
+    """
+    num_selects_before = _get_num_selects()
+    yield
+    num_sent = _get_num_selects() - num_selects_before
+    if num_selects is None:
+        test_case.assertGreater(num_sent, 0)
+    else:
+        test_case.assertEqual(num_sent, num_selects)
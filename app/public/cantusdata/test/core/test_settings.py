@@ -1,3 +1,11 @@
 from cantusdata.settings import *
 
 SOLR_SERVER = SOLR_TEST_SERVER
+
+# The versions of the index are rolled back with the database after each
+# test, while responses cached in memory are not, so responses are not cached
+SEARCH_CACHE_MAX_ENTRIES = 0
+
+# Tests do not load MEI files from the parse cache: the tests of the cache
+# enable it in a temporary directory
+MEI_PARSE_CACHE_DIR = ""
@@ -1,6 +1,17 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import AsyncRequestFactory, override_settings
 from rest_framework.test import APITransactionTestCase
 from rest_framework import status
 
+from cantusdata.models import Chant
+from cantusdata.views.chant_set import (
+    AsyncFolioChantSetView,
+    AsyncManuscriptChantSetView,
+)
+from cantusdata.test.core.solr_assertions import assert_num_solr_selects
+
 
 class FolioChantSetViewTestCase(APITransactionTestCase):
     fixtures = ["2_initial_data"]
@@ -24,6 +35,29 @@ class FolioChantSetViewTestCase(APITransactionTestCase):
         )
         self.assertJSONEqual(response.content, expected_string)
 
+    @override_settings(SEARCH_CACHE_MAX_ENTRIES=100, SEARCH_CACHE_TTL=60)
+    def test_cached_response(self):
+        response = self.client.get("/chant-set/folio/1/")
+        # The repeated request is answered from the cache
+        with assert_num_solr_selects(self, 0):
+            cached_response = self.client.get("/chant-set/folio/1/")
+        self.assertJSONEqual(cached_response.content, response.json())
+        # Saving a chant of the manuscript (which the SolrSynchronizer
+        # indexes) invalidates the cached response
+        chant = Chant.objects.get(pk=1)
+        chant.incipit = "9012"
+        chant.save()
+        with assert_num_solr_selects(self, 1):
+            response = self.client.get("/chant-set/folio/1/")
+        self.assertEqual(response.json()[0]["incipit"], "9012")
+
+    async def test_async_view(self):
+        request = AsyncRequestFactory().get("/chant-set/folio/1/")
+        response = await AsyncFolioChantSetView.as_view()(request, pk="1")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await self.async_client.get("/chant-set/folio/1/")
+        self.assertJSONEqual(response.content, sync_response.json())
+
 
 class ManuscriptChantSetTestCase(APITransactionTestCase):
     fixtures = ["2_initial_data"]
@@ -54,3 +88,27 @@ class ManuscriptChantSetTestCase(APITransactionTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         # Empty response is just square brackets
         self.assertJSONEqual(response.content, "[]")
+
+    @override_settings(SEARCH_CACHE_MAX_ENTRIES=100, SEARCH_CACHE_TTL=60)
+    def test_cached_response(self):
+        self.client.get("/chant-set/manuscript/3/")
+        # The repeated request is answered from the cache
+        with assert_num_solr_selects(self, 0):
+            self.client.get("/chant-set/manuscript/3/")
+        # Refreshing the records of the manuscript invalidates the cached
+        # response
+        call_command(
+            "refresh_solr",
+            record_type="chants",
+            manuscript_ids=["3"],
+            stdout=StringIO(),
+        )
+        with assert_num_solr_selects(self, 1):
+            self.client.get("/chant-set/manuscript/3/")
+
+    async def test_async_view(self):
+        request = AsyncRequestFactory().get("/chant-set/manuscript/3/")
+        response = await AsyncManuscriptChantSetView.as_view()(request, pk=3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        sync_response = await self.async_client.get("/chant-set/manuscript/3/")
+        self.assertJSONEqual(response.content, sync_response.json())
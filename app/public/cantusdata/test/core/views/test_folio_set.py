@@ -1,6 +1,9 @@
+from django.test import AsyncRequestFactory
 from rest_framework.test import APITransactionTestCase
 from rest_framework import status
 
+from cantusdata.views.folio_set import AsyncManuscriptFolioSetView
+
 
 class ManuscriptFolioSetViewTestCase(APITransactionTestCase):
     fixtures = ["1_users", "2_initial_data"]
@@ -36,3 +39,23 @@ class ManuscriptFolioSetViewTestCase(APITransactionTestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         expected_string = '{"number":null}'
         self.assertJSONEqual(response.content, expected_string)
+
+    async def test_async_view(self):
+        view = AsyncManuscriptFolioSetView.as_view()
+        request_factory = AsyncRequestFactory()
+        with self.subTest("JSON"):
+            url = "/folio-set/manuscript/3/http%3A%2F%2Ftest.com/"
+            response = await view(
+                request_factory.get(url), pk=3, image_uri="http://test.com"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            sync_response = await self.async_client.get(url)
+            self.assertJSONEqual(response.content, sync_response.json())
+        with self.subTest("CSV"):
+            response = await view(
+                request_factory.get("/folio-set/manuscript/3/", {"format": "csv"}),
+                pk=3,
+            )
+            response.render()
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response["Content-Type"].startswith("text/csv"))
@@ -1,6 +1,8 @@
+from django.test import override_settings
 from rest_framework.test import APITransactionTestCase
 from rest_framework import status
 from cantusdata.models import Chant, Folio, Manuscript
+from cantusdata.test.core.solr_assertions import assert_num_solr_selects
 
 # Refer to http://www.django-rest-framework.org/api-guide/testing
 
@@ -19,6 +21,20 @@ class MainViewTestCase(APITransactionTestCase):
         response = self.client.get("/search/", {"q": "*:*"})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    @override_settings(SEARCH_CACHE_MAX_ENTRIES=100, SEARCH_CACHE_TTL=60)
+    def test_cached_results(self):
+        self.client.get("/search/", {"q": "*:*"})
+        # The repeated search is answered from the cache
+        with assert_num_solr_selects(self, 0):
+            self.client.get("/search/", {"q": "*:*"})
+        # Saving a manuscript (which the SolrSynchronizer indexes)
+        # invalidates the cached results
+        manuscript = Manuscript.objects.get(pk=1)
+        manuscript.provenance = "Montreal"
+        manuscript.save()
+        with assert_num_solr_selects(self, 1):
+            self.client.get("/search/", {"q": "*:*"})
+
     def tearDown(self):
         Chant.objects.all().delete()
         Folio.objects.all().delete()
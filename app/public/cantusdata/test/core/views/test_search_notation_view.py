@@ -1,10 +1,16 @@
+from io import StringIO
+from typing import Any
+
 from rest_framework.test import APITestCase
 from django.core.management import call_command
+from django.test import override_settings
 from django.urls import reverse
 from django.conf import settings
 
+from cantusdata.helpers.mei_processing.mei_tokenizer import MEITokenizer
 from cantusdata.views.search_notation import SearchNotationView, NotationSearchException
-from cantusdata.models import Manuscript, Folio
+from cantusdata.models import Manuscript, Folio, MEIFileFingerprint
+from cantusdata.test.core.solr_assertions import assert_num_solr_selects
 
 
 class TestSearchNotationView(APITestCase):
@@ -46,6 +52,15 @@ class TestSearchNotationView(APITestCase):
             settings.TEST_MEI_FILES_PATH,
         )
 
+    def search(self, **params: str | int) -> dict[str, Any]:
+        """
+        Runs a search with the given parameters, as the view does.
+        """
+        search = self.search_notation_view.prepare_search(
+            {key: str(value) for key, value in params.items()}
+        )
+        return search()
+
     def test_create_query_string(self) -> None:
         with self.subTest("Test invalid query"):
             with self.assertRaises(NotationSearchException):
@@ -61,15 +76,26 @@ class TestSearchNotationView(APITestCase):
             expected_query_string = "contour:u_d_u_r"
             self.assertEqual(query_string, expected_query_string)
         # We add a separate subtest for a "pitch_names_transposed" query since it
-        # has a slightly different logic (we get transpositions and chain them
-        # together with ORs).
+        # has a slightly different logic (we search the pitch names relative to
+        # the first pitch, which are the same in all transpositions).
         with self.subTest("Test pitch_names_transposed query"):
             query = "c d e"
             query_type = "pitch_names_transposed"
             query_string = self.search_notation_view.create_query_string(
                 query, query_type
             )
-            expected_query_string = "pitch_names:(c_d_e OR d_e_f OR e_f_g OR f_g_a OR g_a_b OR a_b_c OR b_c_d)"
+            expected_query_string = "pitch_names_transposed:0_1_2"
+            self.assertEqual(query_string, expected_query_string)
+        # Manuscripts indexed before n-grams had a pitch_names_transposed
+        # field are searched for each transposition of the pitch names.
+        with self.subTest("Test pitch_names_transposed query without the field"):
+            query_string = self.search_notation_view.create_query_string(
+                "c d e", "pitch_names_transposed", relative_pitch_names=False
+            )
+            expected_query_string = (
+                "pitch_names:(c_d_e OR d_e_f OR e_f_g OR f_g_a OR g_a_b"
+                " OR a_b_c OR b_c_d)"
+            )
             self.assertEqual(query_string, expected_query_string)
         # An intervals query translates interval directions before joining them
         # with underscores.
@@ -82,7 +108,7 @@ class TestSearchNotationView(APITestCase):
             expected_query_string = "intervals:2_-3_1_12"
             self.assertEqual(query_string, expected_query_string)
 
-    def test_do_query(self) -> None:
+    def test_search(self) -> None:
         with self.subTest("Test fields returned"):
             # Test that, in general, the fields returned are as expected
             expected_results_fields = [
@@ -91,55 +117,189 @@ class TestSearchNotationView(APITestCase):
                 "semitones",
                 "pnames",
             ]
-            results, _ = self.search_notation_view.do_query(
-                123723, "contour:u d u", 100, 0
-            )
+            results = self.search(q="u d u", type="contour", manuscript_id=123723)[
+                "results"
+            ]
             results_fields = list(results[0].keys())
             self.assertTrue(set(expected_results_fields).issubset(results_fields))
             # Test a case where we know that neume names are returned and ensure
             # that the "neumes" field is present in the results
-            results_neume_names, _ = self.search_notation_view.do_query(
-                123723, "neume_names:punctum", 100, 0
-            )
+            results_neume_names = self.search(
+                q="punctum", type="neume_names", manuscript_id=123723
+            )["results"]
             results_neume_names_fields = list(results_neume_names[0].keys())
             expected_results_fields.append("neumes")
             self.assertTrue(
                 set(expected_results_fields).issubset(results_neume_names_fields)
             )
         with self.subTest("Test rows and start parameters"):
-            results_rows_100_start_0, _ = self.search_notation_view.do_query(
-                123723, "neume_names:punctum", 100, 0
-            )
+            results_rows_100_start_0 = self.search(
+                q="punctum", type="neume_names", manuscript_id=123723, rows=100
+            )["results"]
             self.assertEqual(len(results_rows_100_start_0), 100)
-            results_rows_10_start_0, _ = self.search_notation_view.do_query(
-                123723, "neume_names:punctum", 10, 0
-            )
+            results_rows_10_start_0 = self.search(
+                q="punctum", type="neume_names", manuscript_id=123723, rows=10
+            )["results"]
             self.assertEqual(len(results_rows_10_start_0), 10)
             self.assertEqual(results_rows_100_start_0[:10], results_rows_10_start_0)
-            results_rows_10_start_10, _ = self.search_notation_view.do_query(
-                123723, "neume_names:punctum", 10, 10
-            )
+            results_rows_10_start_10 = self.search(
+                q="punctum",
+                type="neume_names",
+                manuscript_id=123723,
+                rows=10,
+                start=10,
+            )["results"]
             self.assertEqual(len(results_rows_10_start_10), 10)
             self.assertEqual(results_rows_100_start_0[10:20], results_rows_10_start_10)
         with self.subTest("Test manuscript_id parameter"):
-            _, num_found_123723 = self.search_notation_view.do_query(
-                123723, "neume_names:punctum", 100, 0
-            )
-            _, num_found_123724 = self.search_notation_view.do_query(
-                123724, "neume_names:punctum", 100, 0
-            )
+            num_found_123723 = self.search(
+                q="punctum", type="neume_names", manuscript_id=123723
+            )["numFound"]
+            num_found_123724 = self.search(
+                q="punctum", type="neume_names", manuscript_id=123724
+            )["numFound"]
             self.assertGreater(num_found_123723, 0)
             self.assertEqual(num_found_123724, 0)
 
+    def test_relative_pitch_names_fallback(self) -> None:
+        # Transposed searches find the same results in manuscripts indexed
+        # before n-grams had a pitch_names_transposed field.
+        self.assertTrue(
+            self.search_notation_view.get_index_info(123723).relative_pitch_names
+        )
+        response = self.search(
+            q="c d e", type="pitch_names_transposed", manuscript_id=123723
+        )
+        self.assertGreater(response["numFound"], 0)
+        MEIFileFingerprint.objects.filter(manuscript_id=123723).update(
+            document_version=0
+        )
+        self.assertFalse(
+            self.search_notation_view.get_index_info(123723).relative_pitch_names
+        )
+        self.assertEqual(
+            self.search(q="c d e", type="pitch_names_transposed", manuscript_id=123723),
+            response,
+        )
+
+    def test_do_long_query(self) -> None:
+        # A query of 12 pitch names found on folio 001r is longer than the
+        # indexed 5-grams, so it is split into pieces.
+        tokenizer = MEITokenizer(
+            f"{settings.TEST_MEI_FILES_PATH}/123723/cdn-hsmu-m2149l4_001r.mei",
+            min_ngram=1,
+            max_ngram=5,
+        )
+        pitch_names = tokenizer.pitch_sequence.tokens().pitch_names[20:32]
+        results, num_found = self.search_notation_view.do_long_query(
+            123723, " ".join(pitch_names), "pitch_names", 5, True, 100, 0
+        )
+        self.assertGreater(num_found, 0)
+        self.assertEqual(len(results), num_found)
+        for result in results:
+            self.assertEqual(result["pnames"], pitch_names)
+            self.assertEqual(len(result["contour"]), len(pitch_names) - 1)
+            self.assertEqual(result["boxes"][0]["f"], "001r")
+        with self.subTest("Test rows and start parameters"):
+            results_start_1, _ = self.search_notation_view.do_long_query(
+                123723, " ".join(pitch_names), "pitch_names", 5, True, 100, 1
+            )
+            self.assertEqual(results_start_1, results[1:])
+
+    def test_do_approximate_query(self) -> None:
+        # A query of 12 pitch names found on folio 001r, with one pitch
+        # mis-entered, is found at a distance of 1.
+        tokenizer = MEITokenizer(
+            f"{settings.TEST_MEI_FILES_PATH}/123723/cdn-hsmu-m2149l4_001r.mei",
+            min_ngram=1,
+            max_ngram=5,
+        )
+        pitch_names = tokenizer.pitch_sequence.tokens().pitch_names[20:32]
+        q_terms = pitch_names[:5] + ["a" if pitch_names[5] != "a" else "b"]
+        q_terms += pitch_names[6:]
+        results, num_found, complete = self.search_notation_view.do_approximate_query(
+            123723, " ".join(q_terms), "pitch_names", 5, 1, 10.0, 100, 0
+        )
+        self.assertTrue(complete)
+        self.assertEqual(len(results), num_found)
+        self.assertIn(
+            {"pnames": pitch_names, "distance": 1},
+            [
+                {"pnames": result["pnames"], "distance": result.get("distance")}
+                for result in results
+            ],
+        )
+        distances = [result.get("distance", 0) for result in results]
+        self.assertEqual(distances, sorted(distances))
+        with self.subTest("Test query too short for the maximum distance"):
+            with self.assertRaises(NotationSearchException):
+                self.search_notation_view.do_approximate_query(
+                    123723, "a b c", "pitch_names", 5, 1, 10.0, 100, 0
+                )
+
+    def test_do_stream_query(self) -> None:
+        # The same query finds the same results in the manuscript's
+        # n-gram documents and in its stream documents.
+        ngram_response = self.search(
+            q="d d c", type="pitch_names", manuscript_id=123723
+        )
+        call_command(
+            "index_manuscript_mei",
+            "123723",
+            "--mei-dir",
+            settings.TEST_MEI_FILES_PATH,
+            "--index-scheme",
+            "stream",
+        )
+        try:
+            self.assertEqual(
+                self.search_notation_view.get_index_info(123723).index_scheme,
+                "stream",
+            )
+            stream_results, stream_num_found = (
+                self.search_notation_view.do_stream_query(
+                    123723, "d d c", "pitch_names", 3, 100, 0
+                )
+            )
+        finally:
+            call_command(
+                "index_manuscript_mei",
+                "123723",
+                "--min-ngram",
+                "1",
+                "--max-ngram",
+                "5",
+                "--mei-dir",
+                settings.TEST_MEI_FILES_PATH,
+            )
+        self.assertGreater(ngram_response["numFound"], 0)
+        self.assertEqual(stream_num_found, ngram_response["numFound"])
+        self.assertCountEqual(stream_results, ngram_response["results"])
+
+    def test_grouped_search(self) -> None:
+        response = self.search(q="punctum", type="neume_names", manuscript_id=123723)
+        grouped_response = self.search(
+            q="punctum", type="neume_names", hits_per_manuscript=10
+        )
+        groups = grouped_response["manuscripts"]
+        self.assertEqual(grouped_response["numManuscripts"], 1)
+        self.assertEqual(grouped_response["numFound"], response["numFound"])
+        self.assertEqual(groups[0]["manuscript_id"], 123723)
+        self.assertEqual(groups[0]["numFound"], response["numFound"])
+        self.assertEqual(groups[0]["results"], response["results"][:10])
+        with self.subTest("Test pagination over manuscripts"):
+            grouped_response_start_1 = self.search(
+                q="punctum", type="neume_names", start=1, hits_per_manuscript=10
+            )
+            self.assertEqual(grouped_response_start_1["manuscripts"], [])
+            self.assertEqual(grouped_response_start_1["numManuscripts"], 1)
+        with self.subTest("Test query longer than the indexed n-grams"):
+            with self.assertRaises(NotationSearchException):
+                self.search(q="a b c d e f", type="pitch_names")
+
     def test_get(self) -> None:
         url = reverse("search-notation-view")
         with self.subTest("Test missing required parameters"):
-            params_no_manuscript: dict[str, str | int] = {
-                "q": "u d u",
-                "type": "contour",
-            }
-            response_no_manuscript = self.client.get(url, params_no_manuscript)
-            self.assertEqual(response_no_manuscript.status_code, 400)
             params_no_type: dict[str, str | int] = {
                 "q": "u d u",
                 "manuscript_id": 123723,
@@ -163,6 +323,75 @@ class TestSearchNotationView(APITestCase):
             response_data = response.json()
             self.assertIn("results", response_data)
             self.assertIn("numFound", response_data)
+        with self.subTest("Test response without manuscript_id"):
+            params_no_manuscript: dict[str, str | int] = {
+                "q": "u d u",
+                "type": "contour",
+                "hits_per_manuscript": 5,
+            }
+            response = self.client.get(url, params_no_manuscript)
+            self.assertEqual(response.status_code, 200)
+            response_data = response.json()
+            self.assertEqual(response_data["numManuscripts"], 1)
+            self.assertEqual(response_data["manuscripts"][0]["manuscript_id"], 123723)
+            self.assertEqual(len(response_data["manuscripts"][0]["results"]), 5)
+
+    @override_settings(SEARCH_CACHE_MAX_ENTRIES=100, SEARCH_CACHE_TTL=60)
+    def test_cached_response(self) -> None:
+        url = reverse("search-notation-view")
+        params: dict[str, str | int] = {
+            "q": "u d u",
+            "type": "contour",
+            "manuscript_id": 123723,
+        }
+        response = self.client.get(url, params)
+        # The repeated search is answered from the cache
+        with assert_num_solr_selects(self, 0):
+            cached_response = self.client.get(url, params)
+        self.assertEqual(cached_response.json(), response.json())
+        # Indexing the MEI files of the manuscript again invalidates the
+        # cached response
+        call_command(
+            "index_manuscript_mei",
+            "123723",
+            "--min-ngram",
+            "1",
+            "--max-ngram",
+            "5",
+            "--mei-dir",
+            settings.TEST_MEI_FILES_PATH,
+            stdout=StringIO(),
+        )
+        with assert_num_solr_selects(self):
+            response = self.client.get(url, params)
+        self.assertEqual(response.json(), cached_response.json())
+
+    def test_batch(self) -> None:
+        url = reverse("search-notation-batch-view")
+        with self.subTest("Test invalid batch"):
+            response = self.client.post(
+                url, {"q": "u d u", "type": "contour"}, format="json"
+            )
+            self.assertEqual(response.status_code, 400)
+        with self.subTest("Test responses in order, with per-search errors"):
+            batch: list[dict[str, str | int]] = [
+                {"q": "punctum", "type": "neume_names", "manuscript_id": 123723},
+                {"q": "a b q", "type": "pitch_names", "manuscript_id": 123723},
+                {"q": "u d u", "type": "contour", "manuscript_id": 123723, "rows": 5},
+                {"q": "u d u", "type": "contour", "manuscript_id": "x"},
+            ]
+            response = self.client.post(url, batch, format="json")
+            self.assertEqual(response.status_code, 200)
+            responses = response.json()
+            self.assertEqual(len(responses), 4)
+            num_found = self.search(
+                q="punctum", type="neume_names", manuscript_id=123723
+            )["numFound"]
+            self.assertEqual(responses[0]["numFound"], num_found)
+            self.assertEqual(responses[1]["status"], 400)
+            self.assertIn("error", responses[1])
+            self.assertEqual(len(responses[2]["results"]), 5)
+            self.assertEqual(responses[3]["status"], 400)
 
     @classmethod
     def tearDownClass(cls) -> None:
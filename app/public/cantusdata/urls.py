@@ -8,13 +8,22 @@ from cantusdata.views.manuscript import ManuscriptList, ManuscriptDetail
 from cantusdata.views.chant import ChantList, ChantDetail
 from cantusdata.views.folio import FolioList, FolioDetail
 from cantusdata.views.search import SearchView
-from cantusdata.views.suggestion import SuggestionView
-from cantusdata.views.search_notation import SearchNotationView
+from cantusdata.views.suggestion import AsyncSuggestionView, SuggestionView
+from cantusdata.views.search_notation import (
+    AsyncSearchNotationView,
+    SearchNotationView,
+    SearchNotationBatchView,
+)
 from cantusdata.views.chant_set import (
+    AsyncFolioChantSetView,
+    AsyncManuscriptChantSetView,
     FolioChantSetView,
     ManuscriptChantSetView,
 )
-from cantusdata.views.folio_set import ManuscriptFolioSetView
+from cantusdata.views.folio_set import (
+    AsyncManuscriptFolioSetView,
+    ManuscriptFolioSetView,
+)
 from cantusdata.views.manuscript_glyph_set import ManuscriptGlyphSetView
 from cantusdata.views.map_folios import MapFoliosView
 from cantusdata.views.load_chants import LoadChantsView
@@ -27,6 +36,21 @@ from cantusdata.views.neume_exemplars import (
 from cantusdata.views import staticpages
 from django.contrib.admin.views.decorators import staff_member_required
 
+# Views that query Solr directly, in their async variants if ASYNC_SOLR_VIEWS
+# is set (see settings)
+if settings.ASYNC_SOLR_VIEWS:
+    folio_chant_set_view = AsyncFolioChantSetView.as_view()
+    manuscript_chant_set_view = AsyncManuscriptChantSetView.as_view()
+    manuscript_folio_set_view = AsyncManuscriptFolioSetView.as_view()
+    suggestion_view = AsyncSuggestionView.as_view()
+    search_notation_view = AsyncSearchNotationView.as_view()
+else:
+    folio_chant_set_view = FolioChantSetView.as_view()
+    manuscript_chant_set_view = ManuscriptChantSetView.as_view()
+    manuscript_folio_set_view = ManuscriptFolioSetView.as_view()
+    suggestion_view = SuggestionView.as_view()
+    search_notation_view = SearchNotationView.as_view()
+
 urlpatterns = [
     # Admin pages
     # All custom admin pages should be added above the root
@@ -71,18 +95,18 @@ urlpatterns = [
     # Query chants by folio
     path(
         "chant-set/folio/<str:pk>/",
-        FolioChantSetView.as_view(),
+        folio_chant_set_view,
         name="folio-chant-set-view",
     ),
     # Query chants by manuscript
     path(
         "chant-set/manuscript/<int:pk>/",
-        ManuscriptChantSetView.as_view(),
+        manuscript_chant_set_view,
         name="manuscript-chant-set-view",
     ),
     path(
         "chant-set/manuscript/<int:pk>/page-<int:start>/",
-        ManuscriptChantSetView.as_view(),
+        manuscript_chant_set_view,
         name="manuscript-chant-set-view-page",
     ),
     path(
@@ -93,12 +117,12 @@ urlpatterns = [
     # Query folios by manuscript
     path(
         "folio-set/manuscript/<int:pk>/",
-        ManuscriptFolioSetView.as_view(),
+        manuscript_folio_set_view,
         name="manuscript-folio-set-view",
     ),
     path(
         "folio-set/manuscript/<int:pk>/<path:image_uri>/",
-        ManuscriptFolioSetView.as_view(),
+        manuscript_folio_set_view,
         name="manuscript-folio-set-view-index",
     ),
     # Query neume images by manuscript and neume name
@@ -114,7 +138,7 @@ urlpatterns = [
     ),
     # Search
     path("search/", SearchView.as_view(), name="search-view"),
-    path("suggest/", SuggestionView.as_view(), name="suggestion-view"),
+    path("suggest/", suggestion_view, name="suggestion-view"),
     # Work around Mixed Content errors in third-party manifest files
     path(
         "manifest-proxy/<path:manifest_url>/",
@@ -124,9 +148,14 @@ urlpatterns = [
     # Notation search
     path(
         "notation-search/",
-        SearchNotationView.as_view(),
+        search_notation_view,
         name="search-notation-view",
     ),
+    path(
+        "notation-search/batch/",
+        SearchNotationBatchView.as_view(),
+        name="search-notation-batch-view",
+    ),
 ]
 
 # Disambiguates json/html/browsable-api urls
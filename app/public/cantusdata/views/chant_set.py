@@ -1,11 +1,20 @@
-from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.views import View
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.renderers import JSONRenderer
 
 # from rest_framework_jsonp.renderers import JSONPRenderer
 from cantusdata.serializers.search import SearchSerializer
-import solr
+from cantusdata.renderers import render_json_response
+from cantusdata.helpers.async_solr_client import get_async_solr_client
+from cantusdata.helpers.search_cache import (
+    aget_cache_key,
+    get_cache_key,
+    search_cache,
+)
+from cantusdata.helpers.solr_client import get_solr_client
+from cantusdata.models.folio import Folio
 
 
 CHANT_FIELDS = [
@@ -35,27 +44,78 @@ CHANT_FIELDS = [
 ]
 
 
+def get_folio_chants_query(folio_ids):
+    folio_ids_list = [f"folio_id:{id}" for id in folio_ids]
+    folio_ids_str = " OR ".join(folio_ids_list)
+    # We want to get all chants of a particular folio of a particular
+    # manuscript.  It is fastest to pull these from Solr!
+    composed_request = f'type:"cantusdata_chant" AND ({folio_ids_str})'
+    return {
+        "q": composed_request,
+        "sort": "folio asc, sequence asc",
+        "rows": 100,
+        "fl": CHANT_FIELDS,
+    }
+
+
+def get_manuscript_chants_query(manuscript_id, start):
+    composed_request = 'type:"cantusdata_chant" AND manuscript_id:{0}'.format(
+        manuscript_id
+    )
+    return {
+        "q": composed_request,
+        "sort": "sequence asc",
+        "start": start,
+        "rows": 100,
+        "fl": CHANT_FIELDS,
+    }
+
+
 class FolioChantSetView(APIView):
     serializer_class = SearchSerializer
     renderer_classes = (JSONRenderer,)
 
     def get(self, request, *args, **kwargs):
-        folio_ids_list = [f"folio_id:{id}" for id in kwargs["pk"].split(",")]
-        folio_ids_str = " OR ".join(folio_ids_list)
-        # We want to get all chants of a particular folio of a particular
-        # manuscript.  It is fastest to pull these from Solr!
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
-        composed_request = f'type:"cantusdata_chant" AND ({folio_ids_str})'
-        results = solrconn.query(
-            composed_request,
-            sort="folio asc, sequence asc",
-            rows=100,
-            fields=CHANT_FIELDS,
-            score=False,
+        folio_ids = kwargs["pk"].split(",")
+        cache_key = self.get_cache_key(folio_ids)
+        results = search_cache.get_or_compute(
+            cache_key, lambda: self.get_chants(folio_ids)
         )
-
         return Response(results)
 
+    def get_cache_key(self, folio_ids):
+        manuscript_ids = Folio.objects.filter(
+            id__in=[id for id in folio_ids if id.isdigit()]
+        ).values_list("manuscript_id", flat=True)
+        return get_cache_key(
+            "folio-chant-set", {"folio_ids": folio_ids}, manuscript_ids
+        )
+
+    def get_chants(self, folio_ids):
+        results = get_solr_client().select(get_folio_chants_query(folio_ids))
+        return results["response"]["docs"]
+
+
+class AsyncFolioChantSetView(View):
+    """
+    The async variant of FolioChantSetView, which waits for Solr without
+    blocking a thread when served over ASGI (see ASYNC_SOLR_VIEWS).
+    """
+
+    async def get(self, request, *args, **kwargs):
+        folio_ids = kwargs["pk"].split(",")
+        cache_key = await sync_to_async(FolioChantSetView().get_cache_key)(folio_ids)
+        results = await search_cache.aget_or_compute(
+            cache_key, lambda: self.get_chants(folio_ids)
+        )
+        return render_json_response(results)
+
+    async def get_chants(self, folio_ids):
+        results = await get_async_solr_client().select(
+            get_folio_chants_query(folio_ids)
+        )
+        return results["response"]["docs"]
+
 
 class ManuscriptChantSetView(APIView):
     serializer_class = SearchSerializer
@@ -63,24 +123,44 @@ class ManuscriptChantSetView(APIView):
 
     def get(self, request, *args, **kwargs):
         manuscript_id = kwargs["pk"]
+        start = kwargs.get("start", 0)
+        cache_key = get_cache_key(
+            "manuscript-chant-set",
+            {"manuscript_id": manuscript_id, "start": start},
+            [manuscript_id],
+        )
+        results = search_cache.get_or_compute(
+            cache_key, lambda: self.get_chants(manuscript_id, start)
+        )
+        return Response(results)
+
+    def get_chants(self, manuscript_id, start):
+        results = get_solr_client().select(
+            get_manuscript_chants_query(manuscript_id, start)
+        )
+        return results["response"]["docs"]
 
-        if "start" in kwargs:
-            start = kwargs["start"]
-        else:
-            start = 0
 
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
+class AsyncManuscriptChantSetView(View):
+    """
+    The async variant of ManuscriptChantSetView (see AsyncFolioChantSetView).
+    """
 
-        composed_request = 'type:"cantusdata_chant" AND manuscript_id:{0}'.format(
-            manuscript_id
+    async def get(self, request, *args, **kwargs):
+        manuscript_id = kwargs["pk"]
+        start = kwargs.get("start", 0)
+        cache_key = await aget_cache_key(
+            "manuscript-chant-set",
+            {"manuscript_id": manuscript_id, "start": start},
+            [manuscript_id],
         )
-        results = solrconn.query(
-            composed_request,
-            sort="sequence asc",
-            start=start,
-            rows=100,
-            fields=CHANT_FIELDS,
-            score=False,
+        results = await search_cache.aget_or_compute(
+            cache_key, lambda: self.get_chants(manuscript_id, start)
         )
+        return render_json_response(results)
 
-        return Response(results)
+    async def get_chants(self, manuscript_id, start):
+        results = await get_async_solr_client().select(
+            get_manuscript_chants_query(manuscript_id, start)
+        )
+        return results["response"]["docs"]
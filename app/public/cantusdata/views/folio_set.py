@@ -1,10 +1,13 @@
-from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.http import Http404
+from django.views import View
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.renderers import JSONRenderer
+from cantusdata.renderers import render_json_response
 from cantusdata.renderers.csv_renderer import CSVRenderer
-import solr
+from cantusdata.helpers.async_solr_client import get_async_solr_client
+from cantusdata.helpers.solr_client import get_solr_client
 
 
 FOLIO_FIELDS = [
@@ -16,6 +19,63 @@ FOLIO_FIELDS = [
 ]
 
 
+def get_folio_set_query(request, kwargs):
+    manuscript_id = kwargs["pk"]
+
+    # If the request contains an image_uri parameter, return the folio(s)
+    # associated with that image.
+    if "image_uri" in kwargs:
+        image_uri = kwargs["image_uri"]
+        composed_request = f'''type:"cantusdata_folio" AND
+             manuscript_id:{manuscript_id} AND image_uri:"{image_uri}"'''
+        return {
+            "q": composed_request,
+            "sort": "number asc",
+            "rows": 2,
+            "fl": FOLIO_FIELDS,
+        }
+    # If a query parameter is passed, return suggested folios
+    # for navigation.
+    if "q" in request.GET:
+        query_str = request.GET["q"]
+        # Query for suggested folio numbers should return folios associated with
+        # the manuscript that have the form:
+        # [some number of leading zeros][the user-entered string][wildcard of characters].
+        composed_request = f"""type:"cantusdata_folio" AND manuscript_id:{manuscript_id}
+                            AND number_wo_lead_zero:{query_str}*"""
+        return {
+            "q": composed_request,
+            "sort": "number asc",
+            "rows": 8,
+            "fl": "number",
+        }
+    # Otherwise, simply return the given manuscript's folios.
+    composed_request = f'type:"cantusdata_folio" AND manuscript_id:{manuscript_id}'
+    return {
+        "q": composed_request,
+        "sort": "number asc",
+        "rows": 10000,
+        "fl": FOLIO_FIELDS,
+    }
+
+
+def create_folio_set_data(kwargs, response):
+    results = response["response"]
+    if "image_uri" not in kwargs:
+        return results["docs"]
+    if results["numFound"] > 0:
+        result_contents = results["docs"]
+        combined_results = {}
+        for field in FOLIO_FIELDS:
+            combined_results[field] = [
+                result_contents[i][field] for i in range(results["numFound"])
+            ]
+        return combined_results
+    if results["numFound"] == 0:
+        return {"number": None}
+    raise Http404("Folio set query failed.")
+
+
 class ManuscriptFolioSetView(APIView):
     renderer_classes = (
         JSONRenderer,
@@ -23,58 +83,27 @@ class ManuscriptFolioSetView(APIView):
     )
 
     def get(self, request, *args, **kwargs):
-        solrconn = solr.SolrConnection(settings.SOLR_SERVER)
+        response = get_solr_client().select(get_folio_set_query(request, kwargs))
+        return Response(create_folio_set_data(kwargs, response))
 
-        manuscript_id = kwargs["pk"]
 
-        # If the request contains an image_uri parameter, return the folio(s)
-        # associated with that image.
-        if "image_uri" in kwargs:
-            image_uri = kwargs["image_uri"]
-            composed_request = f'''type:"cantusdata_folio" AND
-                 manuscript_id:{manuscript_id} AND image_uri:"{image_uri}"'''
-            results = solrconn.query(
-                composed_request,
-                sort="number asc",
-                rows=2,
-                fields=FOLIO_FIELDS,
-                score=False,
-            )
-            if results.numFound > 0:
-                result_contents = results.results
-                combined_results = {}
-                for field in FOLIO_FIELDS:
-                    combined_results[field] = [
-                        result_contents[i][field] for i in range(results.numFound)
-                    ]
-                return Response(combined_results)
-            if results.numFound == 0:
-                return Response({"number": None})
-            raise Http404("Folio set query failed.")
-        # If a query parameter is passed, return suggested folios
-        # for navigation.
-        if "q" in request.GET:
-            query_str = request.GET["q"]
-            # Query for suggested folio numbers should return folios associated with
-            # the manuscript that have the form:
-            # [some number of leading zeros][the user-entered string][wildcard of characters].
-            composed_request = f"""type:"cantusdata_folio" AND manuscript_id:{manuscript_id}
-                                AND number_wo_lead_zero:{query_str}*"""
-            results = solrconn.query(
-                composed_request,
-                sort="number asc",
-                rows=8,
-                fields="number",
-                score=False,
+class AsyncManuscriptFolioSetView(View):
+    """
+    The async variant of ManuscriptFolioSetView, which waits for Solr without
+    blocking a thread when served over ASGI (see ASYNC_SOLR_VIEWS). Requests
+    for CSV are passed on to ManuscriptFolioSetView.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        if (
+            kwargs.get("format") == CSVRenderer.format
+            or request.GET.get("format") == CSVRenderer.format
+            or CSVRenderer.media_type in request.headers.get("Accept", "")
+        ):
+            return await sync_to_async(ManuscriptFolioSetView.as_view())(
+                request, *args, **kwargs
             )
-            return Response(results.results)
-        # Otherwise, simply return the given manuscript's folios.
-        composed_request = f'type:"cantusdata_folio" AND manuscript_id:{manuscript_id}'
-        results = solrconn.query(
-            composed_request,
-            sort="number asc",
-            rows=10000,
-            fields=FOLIO_FIELDS,
-            score=False,
+        response = await get_async_solr_client().select(
+            get_folio_set_query(request, kwargs)
         )
-        return Response(results.results)
+        return render_json_response(create_folio_set_data(kwargs, response))
@@ -12,13 +12,9 @@ class ManuscriptGlyphSetView(APIView):
 
     def get(self, request, *args, **kwargs):
         manuscript = Manuscript.objects.get(id=kwargs["pk"])
-        result = (
-            SolrSearchQueryless(
-                'q=type%3Acantusdata_music_notation+AND+siglum_slug%3A"{0}"'.format(
-                    manuscript.siglum_slug
-                )
+        result = SolrSearchQueryless(
+            'q=type%3Acantusdata_music_notation+AND+siglum_slug%3A"{0}"'.format(
+                manuscript.siglum_slug
             )
-            .facets(["neumes"])
-            .facet_counts["facet_fields"]["neumes"]
-        )
+        ).facets(["neumes"])["facet_counts"]["facet_fields"]["neumes"]
         return Response(result)
@@ -6,7 +6,6 @@ from rest_framework.request import Request
 from rest_framework.generics import GenericAPIView
 from rest_framework.mixins import ListModelMixin
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from django.conf import settings
 from django.views.generic import TemplateView
 from django.db.models.query import QuerySet
 from django.http import HttpResponse
@@ -14,11 +13,11 @@ from django.urls import reverse
 from django.contrib import messages
 from django.shortcuts import redirect
 import requests
-from requests import Response as RequestsResponse
 
 from cantusdata.models import Manuscript, NeumeExemplar
 from cantusdata.models.neume_exemplar import EXEMPLAR_IMAGE_SIDE_LENGTH
 from cantusdata.helpers.iiif_helpers import construct_image_api_url
+from cantusdata.helpers.solr_client import get_solr_client
 from cantusdata.serializers.neume_exemplar import NeumeExemplarSerializer
 
 
@@ -120,11 +119,7 @@ class NeumeSetAPIView(APIView):
             "start": start,
             "fl": "*",
         }
-        response: RequestsResponse = requests.get(
-            f"{settings.SOLR_SERVER}/select", timeout=10, params=params
-        )
-        response.raise_for_status()
-        results_json = response.json()["response"]
+        results_json = get_solr_client().select(params)["response"]
         if results_json["numFound"] > 0:
             exemplars: List[NeumeSetItem] = []
             for result in results_json["docs"]:
@@ -282,13 +277,8 @@ class PickNeumeExemplarsView(TemplateView):
             "q": f"manuscript_id:{manuscript.pk} AND type:omr_ngram",
             "rows": 1,
         }
-        omr_ngram_request = requests.get(
-            f"{settings.SOLR_SERVER}/select",
-            params=params,
-            timeout=10,
-        )
-        omr_ngram_request.raise_for_status()
-        num_omr_ngrams_found: int = omr_ngram_request.json()["response"]["numFound"]
+        omr_ngram_response = get_solr_client().select(params)
+        num_omr_ngrams_found: int = omr_ngram_response["response"]["numFound"]
         return num_omr_ngrams_found > 0
 
     def get_neume_name_counts(self, manuscript: Manuscript) -> dict[str, int]:
@@ -309,14 +299,9 @@ class PickNeumeExemplarsView(TemplateView):
             "facet.field": "neume_names",
             "facet.mincount": 1,
         }
-        omr_ngram_request = requests.get(
-            f"{settings.SOLR_SERVER}/select",
-            params=params,
-            timeout=10,
-        )
-        omr_ngram_request.raise_for_status()
+        omr_ngram_response = get_solr_client().select(params)
         # Facets are returned as a list of alternating neume names and counts.
-        neume_names: list[str | int] = omr_ngram_request.json()["facet_counts"][
+        neume_names: list[str | int] = omr_ngram_response["facet_counts"][
             "facet_fields"
         ]["neume_names"]
         neume_name_counts: dict[str, int] = {}
@@ -3,6 +3,7 @@ from rest_framework.response import Response
 
 from cantusdata.serializers.search import SearchSerializer
 from cantusdata.helpers.solrsearch import SolrSearch
+from cantusdata.helpers.search_cache import get_cache_key, search_cache
 from cantusdata.renderers import templated_view_renderers
 
 
@@ -14,11 +15,20 @@ class SearchView(APIView):
     def get(self, request, *args, **kwargs):
         querydict = request.GET
 
-        s = SolrSearch(request, {"public": "true"})
-
         if not querydict:
             return Response({"query": "", "numFound": 0, "results": []})
 
+        # Searches span all manuscripts, so their responses are cached
+        # until the documents of any manuscript change
+        cache_key = get_cache_key("search", dict(querydict.lists()), None)
+        result = search_cache.get_or_compute(cache_key, lambda: self.search(request))
+        return Response(result)
+
+    def search(self, request):
+        querydict = request.GET
+
+        s = SolrSearch(request, {"public": "true"})
+
         # Search for fifteen rows by default
         s.solr_params.setdefault("rows", 15)
 
@@ -26,11 +36,10 @@ class SearchView(APIView):
 
         result = {
             "query": querydict["q"],
-            "numFound": search_results.numFound,
-            "results": search_results,
+            "numFound": search_results["response"]["numFound"],
+            "results": search_results["response"]["docs"],
         }
 
         result.update(s.solr_params)
 
-        response = Response(result)
-        return response
+        return result
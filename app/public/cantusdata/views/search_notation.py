@@ -1,7 +1,23 @@
-from typing import Any, TypedDict, Union, Optional, NotRequired
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Collection,
+    Hashable,
+    Mapping,
+    NamedTuple,
+    TypedDict,
+    Union,
+    Optional,
+    NotRequired,
+)
 
 import requests
-from django.conf import settings
+from asgiref.sync import sync_to_async
+from django.db.models import Count, Min, Q
+from django.http import HttpResponse
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.request import Request
@@ -9,9 +25,38 @@ from rest_framework.exceptions import APIException
 
 from cantusdata.helpers.search_utils import (
     validate_query,
-    get_transpositions,
     translate_interval_query_direction,
 )
+from cantusdata.helpers.notation_query_planner import (
+    DEFAULT_MAX_NGRAM,
+    LongQueryPlanner,
+    PieceQuery,
+    SolrQueryResultItem,
+    get_max_piece_length,
+    get_piece_query,
+)
+from cantusdata.helpers.notation_approximate_search import (
+    DEFAULT_TIME_BUDGET,
+    ApproximateSearch,
+)
+from cantusdata.helpers.notation_stream_search import (
+    MATCH_FIELDS,
+    StreamMatcher,
+    get_box_index,
+    get_stream_query,
+)
+from cantusdata.helpers.mei_processing.mei_parsing_types import (
+    IndexScheme,
+    StreamDocument,
+)
+from cantusdata.helpers.mei_processing.mei_tokenizer import (
+    PITCH_NAMES_TRANSPOSED_VERSION,
+)
+from cantusdata.helpers.async_solr_client import get_async_solr_client
+from cantusdata.helpers.search_cache import get_cache_key, search_cache
+from cantusdata.helpers.solr_client import get_solr_client
+from cantusdata.models.mei_file_fingerprint import MEIFileFingerprint
+from cantusdata.renderers import render_json_response
 
 RETURNED_FIELDS = [
     "manuscript_id",
@@ -25,17 +70,10 @@ RETURNED_FIELDS = [
     "location_json",
 ]
 
-
-class SolrQueryResultItem(TypedDict):
-    manuscript_id: int
-    folio: str
-    image_uri: str
-    pitch_names: str
-    contour: str
-    semitone_intervals: str
-    neume_names: str
-    intervals: str
-    location_json: list[dict[str, int]]
+# The maximum number of searches in a request to SearchNotationBatchView,
+# and the maximum number of them that are run at once
+MAX_BATCH_SIZE = 100
+BATCH_MAX_WORKERS = 8
 
 
 class NotationSearchResultItem(TypedDict):
@@ -45,6 +83,13 @@ class NotationSearchResultItem(TypedDict):
     intervals: list[int]
     pnames: list[str]
     neumes: NotRequired[list[str]]
+    distance: NotRequired[int]
+
+
+class NotationSearchGroup(TypedDict):
+    manuscript_id: int
+    numFound: int
+    results: list[NotationSearchResultItem]
 
 
 class NotationSearchException(APIException):
@@ -52,59 +97,331 @@ class NotationSearchException(APIException):
     default_detail = "Notation search request invalid."
 
 
+class NotationIndexInfo(NamedTuple):
+    """
+    How a manuscript's MEI files are indexed, as recorded by the
+    index_manuscript_mei command.
+
+    index_scheme: "stream" if all the manuscript's folios are indexed as
+        stream documents, otherwise "ngram"
+    max_ngram: The length of the longest n-grams indexed for all folios
+        (DEFAULT_MAX_NGRAM if the manuscript has no record)
+    num_folios: The number of folios indexed
+    relative_pitch_names: Whether the n-grams of all folios have a
+        pitch_names_transposed field (False if the manuscript has no record,
+        or was indexed before the field was added)
+    """
+
+    index_scheme: IndexScheme
+    max_ngram: int
+    num_folios: int
+    relative_pitch_names: bool
+
+
+class PreparedSearch:
+    """
+    A search validated by SearchNotationView.prepare_search. Calling it runs
+    the search and returns its response data, which is cached (see
+    cantusdata.helpers.search_cache) if it is cacheable.
+
+    arun runs the search from a coroutine: with run_async, for searches that
+    send a single query to Solr through the AsyncSolrClient, and otherwise
+    by calling run in a thread.
+    """
+
+    def __init__(
+        self,
+        cache_key: Hashable,
+        run: Callable[[], dict[str, Any]],
+        run_async: Optional[Callable[[], Awaitable[dict[str, Any]]]] = None,
+        cacheable: Callable[[dict[str, Any]], bool] = lambda response: True,
+    ) -> None:
+        self.cache_key = cache_key
+        self.run = run
+        self.run_async = run_async
+        self.cacheable = cacheable
+
+    def __call__(self) -> dict[str, Any]:
+        return search_cache.get_or_compute(self.cache_key, self.run, self.cacheable)
+
+    async def arun(self) -> dict[str, Any]:
+        run_async = self.run_async or sync_to_async(self.run, thread_sensitive=False)
+        return await search_cache.aget_or_compute(
+            self.cache_key, run_async, self.cacheable
+        )
+
+
+def select_from_solr(params: dict[str, Any]) -> dict[str, Any]:
+    """
+    Sends a query to Solr's select handler through the client shared by
+    the process (see get_solr_client).
+    """
+    return get_solr_client().select(params)
+
+
+class SolrNgramSource:
+    """
+    Fetches the omr_ngram documents of a manuscript from Solr
+    for a LongQueryPlanner.
+    """
+
+    def __init__(self, manuscript_id: int) -> None:
+        self.manuscript_fq = f"type:omr_ngram AND manuscript_id:{manuscript_id}"
+
+    def count(self, piece_queries: list[PieceQuery]) -> list[int]:
+        solr_queries = [piece_query.to_solr() for piece_query in piece_queries]
+        response = select_from_solr(
+            {
+                "q": "*:*",
+                "fq": self.manuscript_fq,
+                "rows": 0,
+                "facet": "true",
+                "facet.query": sorted(set(solr_queries)),
+            }
+        )
+        facet_counts: dict[str, int] = response["facet_counts"]["facet_queries"]
+        return [facet_counts[solr_query] for solr_query in solr_queries]
+
+    def fetch(
+        self, piece_query: PieceQuery, folios: Optional[Collection[str]], rows: int
+    ) -> list[SolrQueryResultItem]:
+        fq = [self.manuscript_fq, piece_query.to_solr()]
+        if folios is not None:
+            fq.append("{!terms f=folio}" + ",".join(folios))
+        return self._select_docs(fq, rows)
+
+    def fetch_pitch_pairs(
+        self, positions: Collection[tuple[str, int]]
+    ) -> list[SolrQueryResultItem]:
+        positions_fq = " OR ".join(
+            f'(folio:"{folio}" AND ngram_start:{ngram_start})'
+            for folio, ngram_start in positions
+        )
+        fq = [self.manuscript_fq, "pitch_names:/[a-g]_[a-g]/", positions_fq]
+        return self._select_docs(fq, len(positions))
+
+    def _select_docs(self, fq: list[str], rows: int) -> list[SolrQueryResultItem]:
+        response = select_from_solr(
+            {
+                "q": "*:*",
+                "fq": fq,
+                "fl": ",".join(RETURNED_FIELDS + ["ngram_start"]),
+                "rows": rows,
+            }
+        )
+        docs: list[SolrQueryResultItem] = response["response"]["docs"]
+        return docs
+
+
 class SearchNotationView(APIView):
     """
     Search algorithm adapted from the Liber Usualis code
+
+    Queries that are longer than the n-grams indexed for the manuscript
+    are run by a LongQueryPlanner (see do_long_query). Queries on manuscripts
+    indexed as stream documents are run by do_stream_query.
+
+    Without a manuscript_id, the query is run on all manuscripts and the
+    results are grouped by manuscript (see get_grouped_query_params): "rows"
+    and "start" then paginate the manuscripts, and "hits_per_manuscript"
+    sets the number of results returned for each.
+
+    With a max_distance, the query is run approximately (see
+    do_approximate_query) within a time budget of time_budget_ms milliseconds.
     """
 
     def get(self, request: Request, *args: Any, **kwargs: Any) -> Response:
-        q = request.GET.get("q", None)
-        stype = request.GET.get("type", None)
-        manuscript_param = request.GET.get("manuscript_id", None)
-        rows_param = request.GET.get("rows", "100")
-        start_param = request.GET.get("start", "0")
+        search = self.prepare_search(request.GET)
+        return Response(search())
+
+    def prepare_search(self, params: Mapping[str, str]) -> PreparedSearch:
+        """
+        Validates the parameters of a search and looks up how the manuscript
+        is indexed. The search itself is returned as a PreparedSearch that
+        only sends requests to Solr (and makes no database queries), so that
+        the searches of a batch can run concurrently (see
+        SearchNotationBatchView), and searches can be run by an async view
+        (see AsyncSearchNotationView).
+
+        Responses are cached (see cantusdata.helpers.search_cache), except
+        those of approximate searches that ran out of time.
+
+        :param params: The parameters of the search (see the class docstring)
+        :return: The search, which returns its response data when run
+        """
+        q = params.get("q", None)
+        stype = params.get("type", None)
+        manuscript_param = params.get("manuscript_id", None)
+        rows_param = params.get("rows", "100")
+        start_param = params.get("start", "0")
 
         # Do some parameter validation and cast to appropriate types
-        if not q or not stype or not manuscript_param:
+        if not q or not stype:
             raise NotationSearchException("Missing required parameters.")
         if not rows_param.isdigit() or not start_param.isdigit():
             raise NotationSearchException("'Rows' and 'Start' must be integers.")
-        if not manuscript_param.isdigit():
-            raise NotationSearchException("Manuscript ID must be digits.")
+        if not validate_query(q.lower().split(), stype):
+            raise NotationSearchException("Invalid query.")
         rows = int(rows_param)
         start = int(start_param)
+        cache_params = {**params, "q": " ".join(q.lower().split())}
+
+        max_distance_param = params.get("max_distance", None)
+        if max_distance_param is not None and not manuscript_param:
+            raise NotationSearchException(
+                "Approximate search requires a manuscript ID."
+            )
+
+        if not manuscript_param:
+            hits_param = params.get("hits_per_manuscript", "10")
+            if not hits_param.isdigit():
+                raise NotationSearchException(
+                    "'Hits per manuscript' must be an integer."
+                )
+            grouped_query_params = self.get_grouped_query_params(
+                q,
+                stype,
+                self.get_collection_max_ngram(),
+                self.collection_has_relative_pitch_names(),
+                rows,
+                start,
+                int(hits_param),
+            )
+
+            def create_grouped_response(
+                solr_response: dict[str, Any]
+            ) -> dict[str, Any]:
+                groups, num_found, num_groups = self.parse_grouped_response(
+                    solr_response
+                )
+                return {
+                    "numFound": num_found,
+                    "numManuscripts": num_groups,
+                    "manuscripts": groups,
+                }
+
+            async def grouped_search_async() -> dict[str, Any]:
+                return create_grouped_response(
+                    await get_async_solr_client().select(grouped_query_params)
+                )
+
+            return PreparedSearch(
+                get_cache_key("notation-search", cache_params, None),
+                lambda: create_grouped_response(select_from_solr(grouped_query_params)),
+                grouped_search_async,
+            )
+
+        if not manuscript_param.isdigit():
+            raise NotationSearchException("Manuscript ID must be digits.")
         manuscript_id = int(manuscript_param)
 
-        query_str = self.create_query_string(q, stype)
-        results, num_found = self.do_query(manuscript_id, query_str, rows, start)
+        index_info = self.get_index_info(manuscript_id)
+        cache_key = get_cache_key("notation-search", cache_params, [manuscript_id])
+        if max_distance_param is not None:
+            time_budget_param = params.get(
+                "time_budget_ms", str(int(DEFAULT_TIME_BUDGET * 1000))
+            )
+            if not max_distance_param.isdigit() or not time_budget_param.isdigit():
+                raise NotationSearchException(
+                    "'Max distance' and 'Time budget' must be integers."
+                )
+            if index_info.index_scheme == "stream":
+                raise NotationSearchException(
+                    "Approximate search is not available for this manuscript."
+                )
+
+            def approximate_search() -> dict[str, Any]:
+                results, num_found, complete = self.do_approximate_query(
+                    manuscript_id,
+                    q,
+                    stype,
+                    index_info.max_ngram,
+                    int(max_distance_param),
+                    int(time_budget_param) / 1000,
+                    rows,
+                    start,
+                )
+                return {"numFound": num_found, "results": results, "complete": complete}
+
+            return PreparedSearch(
+                cache_key,
+                approximate_search,
+                cacheable=lambda response: response["complete"],
+            )
+
+        if index_info.index_scheme == "stream":
+            return PreparedSearch(
+                cache_key,
+                lambda: self.create_search_response(
+                    *self.do_stream_query(
+                        manuscript_id, q, stype, index_info.num_folios, rows, start
+                    )
+                ),
+            )
+        if len(q.split()) > get_max_piece_length(stype, index_info.max_ngram):
+            return PreparedSearch(
+                cache_key,
+                lambda: self.create_search_response(
+                    *self.do_long_query(
+                        manuscript_id,
+                        q,
+                        stype,
+                        index_info.max_ngram,
+                        index_info.relative_pitch_names,
+                        rows,
+                        start,
+                    )
+                ),
+            )
+
+        query_params = self.get_query_params(
+            manuscript_id,
+            self.create_query_string(q, stype, index_info.relative_pitch_names),
+            rows,
+            start,
+        )
+
+        async def search_async() -> dict[str, Any]:
+            return self.create_search_response(
+                *self.parse_query_response(
+                    await get_async_solr_client().select(query_params)
+                )
+            )
+
+        return PreparedSearch(
+            cache_key,
+            lambda: self.create_search_response(
+                *self.parse_query_response(select_from_solr(query_params))
+            ),
+            search_async,
+        )
 
-        return Response({"numFound": num_found, "results": results})
+    def create_search_response(
+        self, results: list[NotationSearchResultItem], num_found: int
+    ) -> dict[str, Any]:
+        return {"numFound": num_found, "results": results}
 
-    def create_query_string(self, q: str, q_type: str) -> str:
+    def create_query_string(
+        self, q: str, q_type: str, relative_pitch_names: bool = True
+    ) -> str:
         """
         Format the query and query type into a string for solr.
+
+        All transpositions of a pitch_names_transposed query have the same
+        relative pitch names, so a single term matches n-grams in any
+        transposition. N-grams indexed before they had a
+        pitch_names_transposed field (relative_pitch_names is False) are
+        matched against each transposition instead (see get_piece_query).
         """
         normalized_q_elems = q.lower().split()
         q_valid = validate_query(normalized_q_elems, q_type)
         if not q_valid:
             raise NotationSearchException("Invalid query.")
-        if q_type == "pitch_names_transposed":
-            transpositions = get_transpositions(normalized_q_elems)
-            # Create a query string for the tranpositions:
-            # e.g. if transpositions are [["a", "b" , "c"], "b","c","d"], etc.]
-            # then the query string will be:
-            # "(a_b_c OR b_c_d OR etc.)"
-            q_str = " OR ".join(
-                "_".join(pitch for pitch in transposition)
-                for transposition in transpositions
-            )
-            q_str = f"({q_str})"
-            q_type = "pitch_names"
-        elif q_type == "intervals":
-            q_str = "_".join(translate_interval_query_direction(normalized_q_elems))
-        else:
-            q_str = "_".join(normalized_q_elems)
-        return f"{q_type}:{q_str}"
+        if q_type == "intervals":
+            normalized_q_elems = translate_interval_query_direction(normalized_q_elems)
+        return get_piece_query(
+            normalized_q_elems, q_type, relative_pitch_names
+        ).to_solr()
 
     def create_boxes(
         self, locations: list[dict[str, int]], image_uri: str, folio: str
@@ -123,36 +440,384 @@ class SearchNotationView(APIView):
             )
         return boxes
 
-    def do_query(
+    def get_query_params(
         self, manuscript_id: int, q_str: str, rows: int, start: int
-    ) -> tuple[list[NotationSearchResultItem], int]:
+    ) -> dict[str, Any]:
+        """
+        Returns the parameters of the Solr query of a search on the n-gram
+        documents of a manuscript (see parse_query_response).
+
+        :param manuscript_id: The ID of the manuscript to search
+        :param q_str: The query, formatted by create_query_string
+        :param rows: The number of results to return
+        :param start: The number of results to skip
+        """
         # Add type and manuscript parameters to the query string
         query_str_w_manuscript = (
             f"type:omr_ngram AND manuscript_id:{manuscript_id} AND {q_str}"
         )
-        complete_query_str = (
-            f"{settings.SOLR_SERVER}/select?q=*:*&fq={query_str_w_manuscript}"
-            f"&fl={','.join(RETURNED_FIELDS)}&sort=folio+asc&rows={rows}&start={start}"
-        )
-        response = requests.get(complete_query_str, timeout=10).json()
+        return {
+            "q": "*:*",
+            "fq": query_str_w_manuscript,
+            "fl": ",".join(RETURNED_FIELDS),
+            "sort": "folio asc",
+            "rows": rows,
+            "start": start,
+        }
+
+    def parse_query_response(
+        self, response: dict[str, Any]
+    ) -> tuple[list[NotationSearchResultItem], int]:
         request_results: list[SolrQueryResultItem] = response["response"]["docs"]
         num_found = response["response"]["numFound"]
-        results = []
-        for d in request_results:
-            boxes = self.create_boxes(d["location_json"], d["image_uri"], d["folio"])
-            result: NotationSearchResultItem = {
-                "boxes": boxes,
-                "contour": d["contour"].split("_"),
-                "semitones": [
-                    int(st) for st in d["semitone_intervals"].split("_") if len(st) > 0
-                ],
-                "intervals": [int(i) for i in d["intervals"].split("_") if len(i) > 0],
-                "pnames": d["pitch_names"].split("_"),
+        results = [self.create_result(d) for d in request_results]
+        return results, num_found
+
+    def get_grouped_query_params(
+        self,
+        q: str,
+        q_type: str,
+        max_ngram: int,
+        relative_pitch_names: bool,
+        rows: int,
+        start: int,
+        hits_per_manuscript: int,
+    ) -> dict[str, Any]:
+        """
+        Returns the parameters of a query on the n-gram documents of all
+        manuscripts, sent in a single request that groups the results by
+        manuscript with Solr's result grouping (see parse_grouped_response).
+        Groups are sorted by manuscript ID, and the results of each group
+        by folio.
+
+        Manuscripts indexed as stream documents are not searched, and the
+        query cannot be longer than the n-grams indexed for every manuscript.
+
+        :param q: The query
+        :param q_type: The type of the query
+        :param max_ngram: The length of the longest n-grams indexed for all
+            manuscripts (see get_collection_max_ngram)
+        :param relative_pitch_names: Whether the n-grams of all manuscripts
+            have a pitch_names_transposed field (see
+            collection_has_relative_pitch_names)
+        :param rows: The number of manuscripts to return
+        :param start: The number of manuscripts to skip
+        :param hits_per_manuscript: The number of results to return
+            for each manuscript
+        """
+        max_piece_length = get_max_piece_length(q_type, max_ngram)
+        if len(q.split()) > max_piece_length:
+            raise NotationSearchException(
+                "Queries on all manuscripts cannot be longer than "
+                f"{max_piece_length} terms."
+            )
+        query_str = self.create_query_string(q, q_type, relative_pitch_names)
+        return {
+            "q": "*:*",
+            "fq": ["type:omr_ngram", query_str],
+            "fl": ",".join(RETURNED_FIELDS),
+            "sort": "manuscript_id asc",
+            "rows": rows,
+            "start": start,
+            "group": "true",
+            "group.field": "manuscript_id",
+            "group.limit": hits_per_manuscript,
+            "group.sort": "folio asc",
+            "group.ngroups": "true",
+        }
+
+    def parse_grouped_response(
+        self, response: dict[str, Any]
+    ) -> tuple[list[NotationSearchGroup], int, int]:
+        """
+        :return: The groups of results, the total number of results and
+            the total number of manuscripts with results
+        """
+        grouped = response["grouped"]["manuscript_id"]
+        groups: list[NotationSearchGroup] = [
+            {
+                "manuscript_id": group["groupValue"],
+                "numFound": group["doclist"]["numFound"],
+                "results": [self.create_result(d) for d in group["doclist"]["docs"]],
             }
-            neume_names: Optional[str] = d.get("neume_names")
-            if neume_names:
-                neume_names_list = neume_names.split("_")
-                result["neumes"] = neume_names_list
+            for group in grouped["groups"]
+        ]
+        return groups, grouped["matches"], grouped["ngroups"]
+
+    def do_long_query(
+        self,
+        manuscript_id: int,
+        q: str,
+        q_type: str,
+        max_ngram: int,
+        relative_pitch_names: bool,
+        rows: int,
+        start: int,
+    ) -> tuple[list[NotationSearchResultItem], int]:
+        """
+        Runs a query that is longer than the indexed n-grams by matching
+        consecutive pieces of it to adjacent n-grams (see LongQueryPlanner).
+        Results are sorted by folio and by position in the folio.
+        """
+        normalized_q_elems = q.lower().split()
+        if not validate_query(normalized_q_elems, q_type):
+            raise NotationSearchException("Invalid query.")
+        try:
+            planner = LongQueryPlanner(
+                SolrNgramSource(manuscript_id),
+                normalized_q_elems,
+                q_type,
+                max_ngram,
+                relative_pitch_names,
+            )
+        except ValueError as error:
+            raise NotationSearchException(str(error)) from error
+        chains = planner.find_chains()
+        stitched_docs = planner.stitch_chains(chains[start : start + rows])
+        results = [self.create_result(d) for d in stitched_docs]
+        return results, len(chains)
+
+    def do_approximate_query(
+        self,
+        manuscript_id: int,
+        q: str,
+        q_type: str,
+        max_ngram: int,
+        max_distance: int,
+        time_budget: float,
+        rows: int,
+        start: int,
+    ) -> tuple[list[NotationSearchResultItem], int, bool]:
+        """
+        Runs a query approximately, finding the passages within max_distance
+        edits of it (see ApproximateSearch). Results are sorted by distance,
+        folio and position in the folio, and include their distance.
+
+        :return: The results, the number of results, and whether all the
+            candidate passages were verified within the time budget (in seconds)
+        """
+        normalized_q_elems = q.lower().split()
+        if not validate_query(normalized_q_elems, q_type):
+            raise NotationSearchException("Invalid query.")
+        try:
+            search = ApproximateSearch(
+                SolrNgramSource(manuscript_id),
+                normalized_q_elems,
+                q_type,
+                max_ngram,
+                max_distance,
+            )
+        except ValueError as error:
+            raise NotationSearchException(str(error)) from error
+        matches, complete = search.find_matches(time_budget)
+        page = matches[start : start + rows]
+        results: list[NotationSearchResultItem] = []
+        for match, result_item in zip(page, search.create_result_items(page)):
+            result = self.create_result(result_item)
+            result["distance"] = match.distance
             results.append(result)
+        return results, len(matches), complete
 
-        return results, num_found
+    def do_stream_query(
+        self,
+        manuscript_id: int,
+        q: str,
+        q_type: str,
+        num_folios: int,
+        rows: int,
+        start: int,
+    ) -> tuple[list[NotationSearchResultItem], int]:
+        """
+        Runs a query on the stream documents of a manuscript. Solr finds the
+        folios that match the query with a phrase query, and a StreamMatcher
+        finds the positions of the matches in each folio. The bounding boxes
+        of the pitches are only fetched for the folios of the returned results.
+        Results are sorted by folio and by position in the folio.
+        """
+        normalized_q_elems = q.lower().split()
+        if not validate_query(normalized_q_elems, q_type):
+            raise NotationSearchException("Invalid query.")
+        response = select_from_solr(
+            {
+                "q": "*:*",
+                "fq": [
+                    f"type:omr_stream AND manuscript_id:{manuscript_id}",
+                    get_stream_query(normalized_q_elems, q_type),
+                ],
+                "fl": ",".join(MATCH_FIELDS),
+                "sort": "folio asc",
+                "rows": num_folios,
+            }
+        )
+        stream_docs: list[StreamDocument] = response["response"]["docs"]
+        matches: list[tuple[StreamMatcher, int, int]] = []
+        for stream_doc in stream_docs:
+            matcher = StreamMatcher(stream_doc)
+            for match_start, match_end in matcher.find_matches(
+                normalized_q_elems, q_type
+            ):
+                matches.append((matcher, match_start, match_end))
+        page = matches[start : start + rows]
+        page_doc_ids = {matcher.doc["id"] for matcher, _, _ in page}
+        box_indexes = {}
+        if page_doc_ids:
+            boxes_response = select_from_solr(
+                {
+                    "q": "*:*",
+                    "fq": "{!terms f=id}" + ",".join(page_doc_ids),
+                    "fl": "id,pitch_boxes_json",
+                    "rows": len(page_doc_ids),
+                }
+            )
+            box_indexes = {
+                doc["id"]: get_box_index(doc["pitch_boxes_json"])
+                for doc in boxes_response["response"]["docs"]
+            }
+        results = [
+            self.create_result(
+                matcher.create_result_item(
+                    match_start, match_end, box_indexes[matcher.doc["id"]]
+                )
+            )
+            for matcher, match_start, match_end in page
+        ]
+        return results, len(matches)
+
+    def get_index_info(self, manuscript_id: int) -> NotationIndexInfo:
+        """
+        Returns how a manuscript's MEI files are indexed (see NotationIndexInfo).
+        """
+        fingerprint_stats = MEIFileFingerprint.objects.filter(
+            manuscript_id=manuscript_id
+        ).aggregate(
+            max_ngram=Min("max_ngram"),
+            num_folios=Count("id"),
+            num_stream_folios=Count("id", filter=Q(index_scheme="stream")),
+            document_version=Min("document_version"),
+        )
+        max_ngram: Optional[int] = fingerprint_stats["max_ngram"]
+        num_folios: int = fingerprint_stats["num_folios"]
+        all_streams = num_folios > 0 and (
+            fingerprint_stats["num_stream_folios"] == num_folios
+        )
+        return NotationIndexInfo(
+            index_scheme="stream" if all_streams else "ngram",
+            max_ngram=max_ngram if max_ngram is not None else DEFAULT_MAX_NGRAM,
+            num_folios=num_folios,
+            relative_pitch_names=num_folios > 0
+            and fingerprint_stats["document_version"] >= PITCH_NAMES_TRANSPOSED_VERSION,
+        )
+
+    def get_collection_max_ngram(self) -> int:
+        """
+        Returns the length of the longest n-grams indexed for all the
+        folios indexed as n-grams (DEFAULT_MAX_NGRAM if there are none).
+        """
+        max_ngram: Optional[int] = MEIFileFingerprint.objects.filter(
+            index_scheme="ngram"
+        ).aggregate(max_ngram=Min("max_ngram"))["max_ngram"]
+        return max_ngram if max_ngram is not None else DEFAULT_MAX_NGRAM
+
+    def collection_has_relative_pitch_names(self) -> bool:
+        """
+        Returns whether the n-grams of all the folios indexed as n-grams
+        have a pitch_names_transposed field. Manuscripts indexed before
+        index_manuscript_mei recorded fingerprints are not taken into
+        account, and must be indexed again.
+        """
+        return not MEIFileFingerprint.objects.filter(
+            index_scheme="ngram", document_version__lt=PITCH_NAMES_TRANSPOSED_VERSION
+        ).exists()
+
+    def create_result(self, d: SolrQueryResultItem) -> NotationSearchResultItem:
+        boxes = self.create_boxes(d["location_json"], d["image_uri"], d["folio"])
+        result: NotationSearchResultItem = {
+            "boxes": boxes,
+            "contour": d["contour"].split("_"),
+            "semitones": [
+                int(st) for st in d["semitone_intervals"].split("_") if len(st) > 0
+            ],
+            "intervals": [int(i) for i in d["intervals"].split("_") if len(i) > 0],
+            "pnames": d["pitch_names"].split("_"),
+        }
+        neume_names: Optional[str] = d.get("neume_names")
+        if neume_names:
+            neume_names_list = neume_names.split("_")
+            result["neumes"] = neume_names_list
+        return result
+
+
+class SearchNotationBatchView(APIView):
+    """
+    Runs a batch of notation searches in a single request.
+
+    The request body is a JSON list of up to MAX_BATCH_SIZE objects, each
+    with the parameters of a SearchNotationView search (q, type, manuscript_id,
+    rows, start, ...). The searches are validated, then their Solr requests
+    are run concurrently. The response is a list with an item for each search,
+    in the order of the request: the response of the search, or an object
+    with the "error" and "status" of a search that failed.
+    """
+
+    def post(self, request: Request, *args: Any, **kwargs: Any) -> Response:
+        batch = request.data
+        if not isinstance(batch, list) or not all(
+            isinstance(params, dict) for params in batch
+        ):
+            raise NotationSearchException("The request must be a list of searches.")
+        if len(batch) > MAX_BATCH_SIZE:
+            raise NotationSearchException(
+                f"A batch cannot contain more than {MAX_BATCH_SIZE} searches."
+            )
+        search_view = SearchNotationView()
+        responses: list[dict[str, Any]] = [{} for _ in batch]
+        searches: dict[int, PreparedSearch] = {}
+        for search_idx, params in enumerate(batch):
+            try:
+                searches[search_idx] = search_view.prepare_search(
+                    {
+                        key: str(value)
+                        for key, value in params.items()
+                        if value is not None
+                    }
+                )
+            except APIException as error:
+                responses[search_idx] = self._get_error_response(error)
+        with ThreadPoolExecutor(max_workers=BATCH_MAX_WORKERS) as executor:
+            for search_idx, response in zip(
+                searches, executor.map(self._run_search, searches.values())
+            ):
+                responses[search_idx] = response
+        return Response(responses)
+
+    def _run_search(self, search: PreparedSearch) -> dict[str, Any]:
+        try:
+            return search()
+        except APIException as error:
+            return self._get_error_response(error)
+        except requests.RequestException:
+            return {"error": "The search could not be completed.", "status": 502}
+
+    def _get_error_response(self, error: APIException) -> dict[str, Any]:
+        return {"error": str(error.detail), "status": error.status_code}
+
+
+class AsyncSearchNotationView(View):
+    """
+    The async variant of SearchNotationView, which waits for Solr without
+    blocking a thread when served over ASGI (see ASYNC_SOLR_VIEWS). The
+    parameters are validated by SearchNotationView.prepare_search in a
+    thread, since it queries the database, and the search is then run by
+    PreparedSearch.arun.
+    """
+
+    async def get(self, request: Any, *args: Any, **kwargs: Any) -> HttpResponse:
+        try:
+            search = await sync_to_async(SearchNotationView().prepare_search)(
+                request.GET
+            )
+            return render_json_response(await search.arun())
+        except APIException as error:
+            return render_json_response(
+                {"detail": error.detail}, status=error.status_code
+            )
@@ -1,9 +1,48 @@
+from typing import Any, Optional
+
+from django.http import HttpResponse
+from django.views import View
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.conf import settings
 
-import solr
-import requests
+from cantusdata.helpers.async_solr_client import get_async_solr_client
+from cantusdata.helpers.solr_client import get_solr_client
+from cantusdata.renderers import render_json_response
+
+
+def get_suggestion_query(params) -> Optional[dict[str, Any]]:
+    """
+    Returns the parameters of the Solr query for the suggestions requested
+    with params, or None if suggestions cannot be provided.
+    """
+    if not ("q" in params and "field" in params):
+        return None
+
+    query = params["q"]
+    field = params["field"]
+    # '*' when searching through all manuscripts
+    manuscript_id = params["manuscript_id"]
+
+    if field not in ["office", "genre", "feast"]:
+        return None
+
+    return {
+        "q": "*:*",
+        "rows": 0,
+        "facet": "true",
+        "fq": f"manuscript_id:{manuscript_id}",
+        "facet.field": field,
+        "facet.limit": 8,
+        "facet.contains": query,
+        "facet.contains.ignoreCase": "true",
+    }
+
+
+def create_suggestions(field, results) -> list[dict[str, str]]:
+    facet_counts = results["facet_counts"]["facet_fields"][field]
+    # The names of the facets (ie. the suggestions) are in the even indices of the list
+    facet_counts = facet_counts[::2]
+    return [{"term": term} for term in facet_counts]
 
 
 class SuggestionView(APIView):
@@ -18,35 +57,24 @@ class SuggestionView(APIView):
     """
 
     def get(self, request, *args, **kwargs):
-        if not ("q" in request.GET and "field" in request.GET):
+        query_params = get_suggestion_query(request.GET)
+        if query_params is None:
             return Response()
 
-        query = request.GET["q"]
-        field = request.GET["field"]
-        manuscript_id = request.GET[
-            "manuscript_id"
-        ]  # '*' when searching through all manuscripts
+        results = get_solr_client().select(query_params)
+        return Response(create_suggestions(request.GET["field"], results))
 
-        if field not in ["office", "genre", "feast"]:
-            return Response()
 
-        solr_server = settings.SOLR_SERVER
-        results = requests.get(
-            f"{solr_server}/select",
-            params={
-                "q": "*:*",
-                "rows": 0,
-                "facet": "true",
-                "fq": f"manuscript_id:{manuscript_id}",
-                "facet.field": field,
-                "facet.limit": 8,
-                "facet.contains": query,
-                "facet.contains.ignoreCase": "true",
-            },
-        )
-        if results.status_code == 200:
-            facet_counts = results.json()["facet_counts"]["facet_fields"][field]
-            # The names of the facets (ie. the suggestions) are in the even indices of the list
-            facet_counts = facet_counts[::2]
-            suggestion_objs = [{"term": term} for term in facet_counts]
-            return Response(suggestion_objs)
+class AsyncSuggestionView(View):
+    """
+    The async variant of SuggestionView, which waits for Solr without
+    blocking a thread when served over ASGI (see ASYNC_SOLR_VIEWS).
+    """
+
+    async def get(self, request, *args, **kwargs) -> HttpResponse:
+        query_params = get_suggestion_query(request.GET)
+        if query_params is None:
+            return HttpResponse()
+
+        results = await get_async_solr_client().select(query_params)
+        return render_json_response(create_suggestions(request.GET["field"], results))